@@ -0,0 +1,138 @@
+"""
+Benchmark checkpoint serializer modes.
+
+Compares the legacy "jsonplus" path (JSON size estimates for dropped
+fields) against "msgpack" with and without zstd compression, reporting
+mean encode latency and stored bytes per checkpoint and per pending write.
+
+Usage (from the backend directory):
+    python -m benchmarks.checkpoint_serializer --iterations 500 --turns 20
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from rag_system.utils import LightweightCheckpointSerializer
+from schemas import AnswerWithCitations, Citation, RetrievedChunk, RetrievedContext
+
+PARAGRAPH = (
+    "Transformer models rely on multi-head self-attention to relate tokens across "
+    "the sequence. The encoder stacks six identical layers, each with attention and "
+    "a position-wise feed-forward network, followed by residual connections and "
+    "layer normalization. "
+)
+
+_rng = random.Random(0)
+_WORDS = PARAGRAPH.replace(".", "").replace(",", "").split()
+
+
+def text(paragraphs: int) -> str:
+    """Varied text built from the paragraph's vocabulary.
+
+    Repeating PARAGRAPH verbatim compresses unrealistically well; shuffled
+    words give ratios closer to real answers and chunks.
+    """
+    words = [_rng.choice(_WORDS) for _ in range(len(_WORDS) * paragraphs)]
+    return " ".join(words)
+
+
+def build_retrieved_context(num_chunks: int = 8) -> RetrievedContext:
+    """Build a retrieved context similar to a real retrieval step."""
+    chunks = [
+        RetrievedChunk(
+            content=text(5),
+            page_number=i + 1,
+            source_file="attention_is_all_you_need.pdf",
+            category="NarrativeText",
+        )
+        for i in range(num_chunks)
+    ]
+    return RetrievedContext(
+        chunks=chunks,
+        unique_page_numbers=list(range(1, num_chunks + 1)),
+        source_files=["attention_is_all_you_need.pdf"],
+    )
+
+
+def build_final_answer() -> AnswerWithCitations:
+    """Build a final answer with document citations."""
+    return AnswerWithCitations(
+        answer=text(4),
+        answer_type="direct",
+        citations=[
+            Citation(
+                source_type="document",
+                source_id="attention_is_all_you_need.pdf",
+                page_number=i + 1,
+                snippet=text(1)[:200],
+                confidence=0.85,
+            )
+            for i in range(5)
+        ],
+        uncertainty=0.1,
+    )
+
+
+def build_checkpoint(turns: int) -> dict[str, Any]:
+    """Build a checkpoint dict for a session with the given number of turns."""
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"Question {i}: how does attention scale?", id=f"h{i}"))
+        messages.append(AIMessage(content=text(3), id=f"a{i}"))
+
+    return {
+        "v": 4,
+        "id": "1f0a0000-0000-6000-8000-000000000000",
+        "ts": "2025-01-01T00:00:00+00:00",
+        "channel_values": {
+            "messages": messages,
+            "query": "How does attention scale with sequence length?",
+            "retrieved_context": build_retrieved_context(),
+            "sub_query_results": [],
+            "web_results": [],
+            "intermediate_reasoning": text(2),
+            "final_answer": build_final_answer(),
+        },
+        "channel_versions": {"messages": 3, "query": 2, "final_answer": 5},
+        "versions_seen": {},
+    }
+
+
+def measure(fn: Callable[[], tuple[str, bytes]], iterations: int) -> tuple[float, int]:
+    """Return mean latency (microseconds) and stored size (bytes) of an encode call."""
+    _, data = fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1_000_000, len(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    checkpoint = build_checkpoint(args.turns)
+    pending_write = build_retrieved_context()
+
+    variants = {
+        "jsonplus (legacy)": LightweightCheckpointSerializer(mode="jsonplus", compression="none"),
+        "msgpack": LightweightCheckpointSerializer(mode="msgpack", compression="none"),
+        "msgpack+zstd": LightweightCheckpointSerializer(mode="msgpack", compression="zstd"),
+    }
+
+    print(f"{'mode':<20}{'checkpoint us':>15}{'checkpoint B':>14}{'write us':>12}{'write B':>10}")
+    for name, serde in variants.items():
+        cp_us, cp_bytes = measure(lambda: serde.dumps_typed(checkpoint), args.iterations)
+        wr_us, wr_bytes = measure(lambda: serde.dumps_typed(pending_write), args.iterations)
+        print(f"{name:<20}{cp_us:>15.1f}{cp_bytes:>14}{wr_us:>12.1f}{wr_bytes:>10}")
+
+
+if __name__ == "__main__":
+    main()
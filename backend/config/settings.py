@@ -34,6 +34,171 @@ class MongoDBSettings(BaseSettings):
     checkpoints_collection: str = Field(default="langgraph_checkpoints")
     checkpoint_writes_collection: str = Field(
         default="langgraph_checkpoint_writes")
+    session_run_queues_collection: str = Field(
+        default="session_run_queues")
+    checkpoint_threads_collection: str = Field(
+        default="langgraph_checkpoint_threads")
+
+
+class CheckpointRetentionSettings(BaseSettings):
+    """LangGraph checkpoint retention and compaction configuration."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="CHECKPOINT_RETENTION_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Run the background checkpoint compaction task",
+    )
+    keep_last: int = Field(
+        default=2,
+        gt=0,
+        description="Checkpoints kept per session thread (latest is enough to resume)",
+    )
+    inactive_ttl_days: int = Field(
+        default=30,
+        gt=0,
+        description="Purge checkpoints of sessions inactive for this many days",
+    )
+    interval_seconds: int = Field(
+        default=3600,
+        gt=0,
+        description="Seconds between compaction passes",
+    )
+    batch_size: int = Field(
+        default=200,
+        gt=0,
+        description="Maximum threads compacted per pass",
+    )
+    measure_bytes: bool = Field(
+        default=False,
+        description="Report bytes reclaimed (an extra $bsonSize aggregate per delete)",
+    )
+
+
+class CheckpointSerializerSettings(BaseSettings):
+    """LangGraph checkpoint serialization configuration."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="CHECKPOINT_SERDE_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    mode: Literal["msgpack", "jsonplus"] = Field(
+        default="msgpack",
+        description="'msgpack' (sizes from encoded buffers, optional compression) or 'jsonplus' (legacy)",
+    )
+    compression: Literal["zstd", "none"] = Field(
+        default="zstd",
+        description="Compression for msgpack checkpoint payloads",
+    )
+    compression_level: int = Field(
+        default=1,
+        ge=1,
+        le=22,
+        description="zstd compression level (1 is fastest; higher levels cost latency for little size)",
+    )
+    min_compress_bytes: int = Field(
+        default=4096,
+        ge=0,
+        description="Only compress checkpoints at least this large",
+    )
+
+
+class AdmissionSettings(BaseSettings):
+    """Per-process admission control for query and upload endpoints."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="ADMISSION_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Limit concurrent queries and ingestions per process",
+    )
+    max_inflight_queries: int = Field(
+        default=32,
+        gt=0,
+        description="Queries running at once in this process",
+    )
+    max_queued_queries: int = Field(
+        default=16,
+        ge=0,
+        description="Queries allowed to wait for a free slot (more are rejected with 429)",
+    )
+    max_inflight_ingestions: int = Field(
+        default=4,
+        gt=0,
+        description="Document ingestions running at once in this process",
+    )
+    max_queued_ingestions: int = Field(
+        default=8,
+        ge=0,
+        description="Ingestions allowed to wait for a free slot (more are rejected with 429)",
+    )
+    queue_timeout_seconds: float = Field(
+        default=2.0,
+        gt=0.0,
+        description="Seconds a request waits for a slot before it is rejected with 429",
+    )
+    retry_after_seconds: int = Field(
+        default=2,
+        gt=0,
+        description="Retry-After sent with admission 429 responses",
+    )
+    executor_max_workers: int = Field(
+        default=48,
+        gt=0,
+        description=(
+            "Worker threads of the default executor used by asyncio.to_thread "
+            "(PDF parsing, vector store calls); size for in-flight queries plus ingestions"
+        ),
+    )
+
+
+class SessionQueueSettings(BaseSettings):
+    """Per-session serialization of query runs (shared across API processes)."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="SESSION_QUEUE_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Run queries of one session one at a time, in arrival order",
+    )
+    max_depth: int = Field(
+        default=4,
+        gt=0,
+        description="Queries allowed to wait behind the running one (more are rejected with 429)",
+    )
+    lease_ttl_seconds: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Seconds a queue slot survives without a heartbeat (frees slots of crashed processes)",
+    )
+    poll_interval: float = Field(
+        default=0.25,
+        gt=0.0,
+        description="Seconds between queue position checks while waiting",
+    )
+    retry_after_seconds: int = Field(
+        default=5,
+        gt=0,
+        description="Retry-After sent with 429 responses for a full queue",
+    )
 
 
 class JWTSettings(BaseSettings):
@@ -103,6 +268,308 @@ class LLMSettings(BaseSettings):
         default="last",
         description="Strategy for trimming messages: 'last' keeps most recent, 'first' keeps oldest",
     )
+    enable_history_summary: bool = Field(
+        default=True,
+        description="Fold older turns into a running summary once history grows too large",
+    )
+    history_summary_threshold_tokens: int = Field(
+        default=6000,
+        gt=0,
+        description="Checkpointed history tokens that trigger summarization",
+    )
+    history_summary_keep_messages: int = Field(
+        default=6,
+        gt=0,
+        description="Most recent messages kept verbatim after summarization",
+    )
+    history_summary_max_words: int = Field(
+        default=300,
+        gt=0,
+        description="Target maximum length of the running summary in words",
+    )
+    history_summary_timeout_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        description="Timeout of the background summarization call run after a turn",
+    )
+
+
+class LLMClientSettings(BaseSettings):
+    """Pooled HTTP client configuration for LLM and embedding calls."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="LLM_CLIENT_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    max_connections: int = Field(
+        default=100,
+        gt=0,
+        description="Maximum concurrent connections per client pool",
+    )
+    max_keepalive_connections: int = Field(
+        default=20,
+        gt=0,
+        description="Maximum idle keep-alive connections per client pool",
+    )
+    keepalive_expiry: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Seconds an idle keep-alive connection is kept open",
+    )
+    http2: bool = Field(
+        default=True,
+        description="Enable HTTP/2 (requires the h2 package)",
+    )
+    timeout: float = Field(
+        default=60.0,
+        gt=0.0,
+        description="Request timeout in seconds",
+    )
+    connect_timeout: float = Field(
+        default=10.0,
+        gt=0.0,
+        description="Connection timeout in seconds",
+    )
+    max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="Maximum provider retries per request",
+    )
+
+
+class LLMGovernorSettings(BaseSettings):
+    """Process-wide rate limiting and fair scheduling of LLM and embedding calls."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="LLM_GOVERNOR_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Schedule provider calls through the governor",
+    )
+    chat_rpm: int = Field(
+        default=500,
+        gt=0,
+        description="Chat completion requests per minute",
+    )
+    chat_tpm: int = Field(
+        default=200000,
+        gt=0,
+        description="Chat completion tokens per minute (prompt + max completion)",
+    )
+    chat_max_concurrency: int = Field(
+        default=32,
+        gt=0,
+        description="Maximum concurrent chat completion requests",
+    )
+    embedding_rpm: int = Field(
+        default=3000,
+        gt=0,
+        description="Embedding requests per minute",
+    )
+    embedding_tpm: int = Field(
+        default=1000000,
+        gt=0,
+        description="Embedding tokens per minute",
+    )
+    embedding_max_concurrency: int = Field(
+        default=16,
+        gt=0,
+        description="Maximum concurrent embedding requests",
+    )
+    default_completion_tokens: int = Field(
+        default=512,
+        gt=0,
+        description="Completion tokens charged for chat requests without max_tokens",
+    )
+    chars_per_token: float = Field(
+        default=4.0,
+        gt=0.0,
+        description="Characters per token used to estimate request size",
+    )
+    interactive_weight: float = Field(
+        default=4.0,
+        gt=0.0,
+        description="Fair-queuing weight of interactive (query) calls",
+    )
+    ingestion_weight: float = Field(
+        default=1.0,
+        gt=0.0,
+        description="Fair-queuing weight of ingestion calls",
+    )
+
+
+class LLMHedgingSettings(BaseSettings):
+    """Hedged (duplicate) requests for small deterministic LLM calls."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="LLM_HEDGING_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Send a duplicate request when a hedgeable call is slow",
+    )
+    percentile: float = Field(
+        default=95.0,
+        gt=0.0,
+        lt=100.0,
+        description="Latency percentile of a call type after which the hedge is sent",
+    )
+    window_size: int = Field(
+        default=200,
+        gt=0,
+        description="Recent latencies kept per call type",
+    )
+    min_samples: int = Field(
+        default=20,
+        gt=0,
+        description="Latencies needed before the percentile is used",
+    )
+    initial_delay_ms: int = Field(
+        default=3000,
+        gt=0,
+        description="Hedge delay used until enough latencies are recorded",
+    )
+    min_delay_ms: int = Field(
+        default=250,
+        ge=0,
+        description="Lower bound of the hedge delay",
+    )
+    max_extra_percent: float = Field(
+        default=5.0,
+        ge=0.0,
+        le=100.0,
+        description="Maximum hedges as a percentage of hedgeable calls",
+    )
+
+
+class LLMCacheSettings(BaseSettings):
+    """Structured-output LLM response cache configuration."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="LLM_CACHE_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Cache structured-output responses of deterministic (temperature 0) calls",
+    )
+    max_entries: int = Field(
+        default=2048,
+        gt=0,
+        description="Maximum in-memory cache entries",
+    )
+    ttl_seconds: int = Field(
+        default=3600,
+        gt=0,
+        description="Seconds a cached response stays valid",
+    )
+    persist_path: str | None = Field(
+        default=None,
+        description="Optional SQLite file for persisting cached responses across restarts",
+    )
+
+
+class AnswerCacheSettings(BaseSettings):
+    """Per-session semantic answer cache configuration."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="ANSWER_CACHE_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Serve repeated (or paraphrased) questions from the session's answer cache",
+    )
+    similarity_threshold: float = Field(
+        default=0.92,
+        ge=0.0,
+        le=1.0,
+        description="Minimum cosine similarity between queries to reuse an answer",
+    )
+    max_entries_per_session: int = Field(
+        default=100,
+        gt=0,
+        description="Maximum cached answers per session",
+    )
+    max_sessions: int = Field(
+        default=1000,
+        gt=0,
+        description="Maximum sessions kept in the cache (least recently used evicted)",
+    )
+    ttl_seconds: int = Field(
+        default=86400,
+        gt=0,
+        description="Seconds a cached answer stays valid",
+    )
+
+
+class DeadlineSettings(BaseSettings):
+    """Per-query latency budget configuration."""
+
+    model_config = SettingsConfigDict(
+        env_prefix="DEADLINE_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Enforce a latency budget per query, degrading optional steps to meet it",
+    )
+    default_ms: int = Field(
+        default=30000,
+        gt=0,
+        description="Latency budget when the request does not set one",
+    )
+    max_ms: int = Field(
+        default=120000,
+        gt=0,
+        description="Upper bound for request-supplied budgets",
+    )
+    rerank_min_ms: int = Field(
+        default=2000,
+        ge=0,
+        description="Remaining budget needed to rerank retrieved chunks",
+    )
+    visual_min_ms: int = Field(
+        default=10000,
+        ge=0,
+        description="Remaining budget needed for the visual decision and page images",
+    )
+    web_fallback_min_ms: int = Field(
+        default=8000,
+        ge=0,
+        description="Remaining budget needed for the web search fallback",
+    )
+    synthesis_min_ms: int = Field(
+        default=5000,
+        ge=0,
+        description="Remaining budget needed for LLM synthesis of sub-query answers",
+    )
+    answer_min_ms: int = Field(
+        default=5000,
+        gt=0,
+        description="Time answer generation always gets, even past the deadline",
+    )
 
 
 class EmbeddingSettings(BaseSettings):
@@ -156,7 +623,16 @@ class VectorStoreSettings(BaseSettings):
     )
     enable_reranking: bool = Field(
         default=True,
-        description="Enable LLM-based reranking of results",
+        description="Enable reranking of results",
+    )
+    # BM25 adds a lexical signal to semantic retrieval without a network call
+    reranker: Literal["embedding", "bm25", "onnx", "llm"] = Field(
+        default="bm25",
+        description="Reranker: 'bm25', 'embedding' (stored vectors), 'onnx' (local cross-encoder) or 'llm'",
+    )
+    reranker_onnx_model_dir: str = Field(
+        default="./app/models/reranker",
+        description="Directory with model.onnx and tokenizer.json for the ONNX reranker",
     )
     rerank_top_k: int = Field(
         default=5,
@@ -175,6 +651,34 @@ class VectorStoreSettings(BaseSettings):
         le=1.0,
         description="Weight for lexical search in hybrid mode",
     )
+    batch_sub_query_retrieval: bool = Field(
+        default=True,
+        description="Retrieve all complex-query sub-queries in one batched embedding + Chroma query",
+    )
+    # Cosine scale of text-embedding-3-small: unrelated passages score about
+    # 0.0-0.15, on-topic ones often only 0.25-0.5, so the floor stays low
+    relevance_floor: float = Field(
+        default=0.15,
+        ge=0.0,
+        le=1.0,
+        description="Top relevance score below which retrieval is a miss (skips RAG answer generation)",
+    )
+    rerank_skip_margin: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Score gap between the k-th and next chunk at which reranking is skipped",
+    )
+    enable_adaptive_k: bool = Field(
+        default=True,
+        description="Drop retrieved chunks scoring far below the top chunk",
+    )
+    adaptive_k_margin: float = Field(
+        default=0.15,
+        ge=0.0,
+        le=1.0,
+        description="Chunks scoring more than this below the top chunk are dropped",
+    )
 
 
 class ChunkingSettings(BaseSettings):
@@ -250,6 +754,20 @@ class ImageProcessingSettings(BaseSettings):
         default="high",
         description="Vision API detail level: 'low', 'high', 'auto'",
     )
+    enable_budget_optimizer: bool = Field(
+        default=True,
+        description="Pick detail level, resolution and image count per request",
+    )
+    token_budget: int = Field(
+        default=1500,
+        gt=0,
+        description="Maximum estimated vision tokens per multimodal answer",
+    )
+    page_aspect_ratio: float = Field(
+        default=1.294,
+        gt=0.0,
+        description="Assumed page height/width ratio for token estimates (US Letter)",
+    )
 
 
 class QueryAnalyzerSettings(BaseSettings):
@@ -268,6 +786,26 @@ class QueryAnalyzerSettings(BaseSettings):
         le=5,
         description="Maximum number of sub-queries allowed for complex queries",
     )
+    max_parallel_sub_queries: int = Field(
+        default=3,
+        gt=0,
+        description="Maximum sub-queries processed concurrently",
+    )
+    enable_local_classifier: bool = Field(
+        default=True,
+        description="Skip the LLM analysis call for queries the local classifier labels simple",
+    )
+    local_classifier_max_words: int = Field(
+        default=20,
+        gt=0,
+        description="Longest query (in words) the local classifier may label simple",
+    )
+    shadow_sample_rate: float = Field(
+        default=0.05,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of local classifications re-checked by the LLM in the background",
+    )
 
 
 class RAGSettings(BaseSettings):
@@ -307,6 +845,53 @@ class RAGSettings(BaseSettings):
         le=1.0,
         description="Default confidence score for citations",
     )
+    enable_context_packing: bool = Field(
+        default=True,
+        description="Deduplicate and pack retrieved chunks under a token budget",
+    )
+    prompt_token_budget: int = Field(
+        default=12000,
+        gt=0,
+        description="Default prompt token budget for RAG answers",
+    )
+    prompt_token_budgets: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-model prompt token budgets (JSON), overriding the default",
+    )
+    prompt_reserved_tokens: int = Field(
+        default=1000,
+        ge=0,
+        description="Tokens reserved for the prompt template and question",
+    )
+    min_context_tokens: int = Field(
+        default=1000,
+        gt=0,
+        description="Minimum token budget for retrieved chunks",
+    )
+    dedup_threshold: float = Field(
+        default=0.8,
+        gt=0.0,
+        le=1.0,
+        description="Shingle containment ratio at which chunks are treated as duplicates",
+    )
+    enable_speculative_web_search: bool = Field(
+        default=True,
+        description="Start the web search fallback alongside answer generation when retrieval is weak",
+    )
+    speculative_web_search_threshold: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="Query term coverage of unscored (lexical) chunks below which the web search is started speculatively",
+    )
+    # Same cosine scale as VECTORSTORE_RELEVANCE_FLOOR; between the floor and
+    # this threshold the RAG answer runs and the web search starts alongside it
+    speculative_web_search_score_threshold: float = Field(
+        default=0.3,
+        ge=0.0,
+        le=1.0,
+        description="Top chunk relevance score below which the web search is started speculatively",
+    )
 
 
 class UploadSettings(BaseSettings):
@@ -390,8 +975,21 @@ class AppSettings(BaseSettings):
     )
 
     mongodb: MongoDBSettings = Field(default_factory=MongoDBSettings)
+    checkpoint_retention: CheckpointRetentionSettings = Field(
+        default_factory=CheckpointRetentionSettings)
+    checkpoint_serde: CheckpointSerializerSettings = Field(
+        default_factory=CheckpointSerializerSettings)
+    admission: AdmissionSettings = Field(default_factory=AdmissionSettings)
+    session_queue: SessionQueueSettings = Field(
+        default_factory=SessionQueueSettings)
     jwt: JWTSettings = Field(default_factory=JWTSettings)
     llm: LLMSettings = Field(default_factory=LLMSettings)
+    llm_client: LLMClientSettings = Field(default_factory=LLMClientSettings)
+    llm_governor: LLMGovernorSettings = Field(default_factory=LLMGovernorSettings)
+    llm_hedging: LLMHedgingSettings = Field(default_factory=LLMHedgingSettings)
+    llm_cache: LLMCacheSettings = Field(default_factory=LLMCacheSettings)
+    answer_cache: AnswerCacheSettings = Field(default_factory=AnswerCacheSettings)
+    deadline: DeadlineSettings = Field(default_factory=DeadlineSettings)
     embedding: EmbeddingSettings = Field(default_factory=EmbeddingSettings)
     vectorstore: VectorStoreSettings = Field(
         default_factory=VectorStoreSettings)
@@ -5,6 +5,7 @@ from .session import SessionCRUD, session_crud
 from .session_message import SessionMessageCRUD, session_message_crud
 from .document import DocumentCRUD, document_crud
 from .refresh_token_revocations import RefreshTokenRevocationCRUD
+from .session_run_queue import SessionRunQueueCRUD, session_run_queue_crud
 
 __all__ = [
     "UserCRUD",
@@ -16,4 +17,6 @@ __all__ = [
     "DocumentCRUD",
     "document_crud",
     "RefreshTokenRevocationCRUD",
+    "SessionRunQueueCRUD",
+    "session_run_queue_crud",
 ]
@@ -215,6 +215,9 @@ class SessionCRUD:
         """
         Update last activity timestamp.
 
+        Clears the checkpoint purge marker, so the session is considered
+        for purging again once it goes inactive.
+
         Args:
             session_id: Session identifier
 
@@ -225,7 +228,10 @@ class SessionCRUD:
 
         result = await collection.update_one(
             {"session_id": session_id},
-            {"$set": {"last_activity_at": datetime.now(timezone.utc)}},
+            {
+                "$set": {"last_activity_at": datetime.now(timezone.utc)},
+                "$unset": {"checkpoints_purged_at": ""},
+            },
         )
 
         return result.modified_count > 0
@@ -235,6 +241,9 @@ class SessionCRUD:
         """
         Increment document count for session.
 
+        Also bumps the document-set version so caches keyed on the
+        session's documents are invalidated.
+
         Args:
             session_id: Session identifier
             delta: Amount to increment (can be negative)
@@ -247,13 +256,34 @@ class SessionCRUD:
         result = await collection.update_one(
             {"session_id": session_id},
             {
-                "$inc": {"document_count": delta},
+                "$inc": {"document_count": delta, "document_set_version": 1},
                 "$set": {"last_activity_at": datetime.now(timezone.utc)},
+                "$unset": {"checkpoints_purged_at": ""},
             },
         )
 
         return result.modified_count > 0
 
+    @classmethod
+    async def increment_document_set_version(cls, session_id: str) -> bool:
+        """
+        Bump the document-set version (e.g. after a document finishes indexing).
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            True if updated
+        """
+        collection = cls._get_collection()
+
+        result = await collection.update_one(
+            {"session_id": session_id},
+            {"$inc": {"document_set_version": 1}},
+        )
+
+        return result.modified_count > 0
+
     @classmethod
     async def delete(cls, session_id: str, user_id: PyObjectId) -> bool:
         """
@@ -107,6 +107,21 @@ class SessionMessageCRUD:
             {"session_id": session_id, "user_id": user_id}
         )
 
+    @classmethod
+    async def delete(cls, message_id: PyObjectId) -> bool:
+        """
+        Delete a single message.
+
+        Args:
+            message_id: Message ID
+
+        Returns:
+            True if a message was deleted
+        """
+        collection = cls._get_collection()
+        result = await collection.delete_one({"_id": ObjectId(message_id)})
+        return result.deleted_count > 0
+
     @classmethod
     async def delete_by_session_id(
         cls,
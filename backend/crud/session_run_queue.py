@@ -0,0 +1,158 @@
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from db.mongo import get_session_run_queues_collection
+
+
+class SessionRunQueueCRUD:
+    """
+    CRUD operations for per-session run queues.
+
+    Each session has one document whose `waiters` array holds the queued
+    runs in arrival order; the first entry is the run holding the lease.
+    Entries carry an expiry that their process keeps extending, so slots
+    of crashed processes are dropped.
+    """
+
+    @staticmethod
+    def _get_collection() -> AsyncIOMotorCollection:
+        """Get session run queues collection."""
+        return get_session_run_queues_collection()
+
+    @classmethod
+    async def _prune(cls, session_id: str) -> None:
+        """Drop entries whose expiry has passed."""
+        await cls._get_collection().update_one(
+            {"_id": session_id},
+            {"$pull": {"waiters": {"expires_at": {"$lt": datetime.now(timezone.utc)}}}},
+        )
+
+    @classmethod
+    async def enqueue(
+        cls,
+        session_id: str,
+        ticket: str,
+        expires_at: datetime,
+        max_depth: int,
+    ) -> Optional[int]:
+        """
+        Append a run to a session's queue.
+
+        Args:
+            session_id: Session identifier
+            ticket: Unique run ticket
+            expires_at: Expiry of the entry unless extended
+            max_depth: Maximum runs waiting behind the running one
+
+        Returns:
+            Queue position (0 = may run now), or None if the queue is full
+        """
+        await cls._prune(session_id)
+
+        collection = cls._get_collection()
+        query = {"_id": session_id, f"waiters.{max_depth}": {"$exists": False}}
+        update = {"$push": {"waiters": {"ticket": ticket, "expires_at": expires_at}}}
+        try:
+            # Upserting against a full queue collides with the existing _id
+            doc = await collection.find_one_and_update(
+                query,
+                update,
+                projection={"waiters.ticket": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Also raised when a concurrent enqueue created the document first;
+            # retry against the existing document before treating it as full
+            doc = await collection.find_one_and_update(
+                query,
+                update,
+                projection={"waiters.ticket": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                return None
+
+        tickets = [waiter["ticket"] for waiter in doc["waiters"]]
+        return tickets.index(ticket)
+
+    @classmethod
+    async def get_position(cls, session_id: str, ticket: str) -> Optional[int]:
+        """
+        Get a run's position in its session's queue.
+
+        Args:
+            session_id: Session identifier
+            ticket: Run ticket
+
+        Returns:
+            Queue position (0 = may run now), or None if the entry is gone
+        """
+        await cls._prune(session_id)
+
+        doc = await cls._get_collection().find_one(
+            {"_id": session_id},
+            projection={"waiters.ticket": 1},
+        )
+        tickets = [waiter["ticket"] for waiter in doc["waiters"]] if doc else []
+        return tickets.index(ticket) if ticket in tickets else None
+
+    @classmethod
+    async def extend(cls, session_id: str, ticket: str, expires_at: datetime) -> bool:
+        """
+        Extend a queue entry's expiry.
+
+        Args:
+            session_id: Session identifier
+            ticket: Run ticket
+            expires_at: New expiry
+
+        Returns:
+            True if the entry still exists
+        """
+        result = await cls._get_collection().update_one(
+            {"_id": session_id, "waiters.ticket": ticket},
+            {"$set": {"waiters.$.expires_at": expires_at}},
+        )
+        return result.matched_count > 0
+
+    @classmethod
+    async def get_leased_sessions(cls, session_ids: Iterable[str]) -> set[str]:
+        """
+        Find which of the given sessions have an unexpired queue entry.
+
+        Args:
+            session_ids: Session identifiers to check
+
+        Returns:
+            Session IDs with a run running or queued
+        """
+        cursor = cls._get_collection().find(
+            {
+                "_id": {"$in": list(session_ids)},
+                "waiters": {"$elemMatch": {"expires_at": {"$gt": datetime.now(timezone.utc)}}},
+            },
+            projection={"_id": 1},
+        )
+        return {doc["_id"] async for doc in cursor}
+
+    @classmethod
+    async def dequeue(cls, session_id: str, ticket: str) -> None:
+        """
+        Remove a run from its session's queue.
+
+        Args:
+            session_id: Session identifier
+            ticket: Run ticket
+        """
+        collection = cls._get_collection()
+        await collection.update_one(
+            {"_id": session_id},
+            {"$pull": {"waiters": {"ticket": ticket}}},
+        )
+        await collection.delete_one({"_id": session_id, "waiters": {"$size": 0}})
+
+
+session_run_queue_crud = SessionRunQueueCRUD()
@@ -8,8 +8,11 @@ from .mongo import (
     get_sessions_collection,
     get_documents_collection,
     get_checkpoints_collection,
+    get_checkpoint_writes_collection,
     get_session_messages_collection,
     get_refresh_token_revocations_collection,
+    get_session_run_queues_collection,
+    get_checkpoint_threads_collection,
 )
 
 __all__ = [
@@ -20,6 +23,9 @@ __all__ = [
     "get_sessions_collection",
     "get_documents_collection",
     "get_checkpoints_collection",
+    "get_checkpoint_writes_collection",
     "get_session_messages_collection",
     "get_refresh_token_revocations_collection",
+    "get_session_run_queues_collection",
+    "get_checkpoint_threads_collection",
 ]
@@ -58,6 +58,10 @@ class MongoDB:
         await sessions.create_index("session_id", unique=True)
         await sessions.create_index("user_id")
         await sessions.create_index([("user_id", 1), ("created_at", -1)])
+        await sessions.create_index("last_activity_at")
+        # Checkpoint purge candidates (sessions not yet purged)
+        await sessions.create_index([("checkpoints_purged_at", 1), ("is_active", 1)])
+        await sessions.create_index([("checkpoints_purged_at", 1), ("last_activity_at", 1)])
 
         # Documents collection indexes
         documents = cls.database[settings.mongodb.documents_collection]
@@ -71,10 +75,29 @@ class MongoDB:
         await session_messages.create_index([("session_id", 1), ("user_id", 1)])
         await session_messages.create_index([("session_id", 1), ("created_at", 1)])
 
-        # LangGraph checkpoints indexes
+        # LangGraph checkpoints indexes (the compound index also serves thread_id lookups)
         checkpoints = cls.database[settings.mongodb.checkpoints_collection]
-        await checkpoints.create_index("thread_id")
-        await checkpoints.create_index([("thread_id", 1), ("checkpoint_ns", 1)])
+        await checkpoints.create_index(
+            [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)],
+            unique=True,
+        )
+
+        # LangGraph checkpoint writes indexes
+        checkpoint_writes = cls.database[settings.mongodb.checkpoint_writes_collection]
+        await checkpoint_writes.create_index(
+            [
+                ("thread_id", 1),
+                ("checkpoint_ns", 1),
+                ("checkpoint_id", -1),
+                ("task_id", 1),
+                ("idx", 1),
+            ],
+            unique=True,
+        )
+
+        # Per-thread checkpoint counters (threads due for compaction)
+        checkpoint_threads = cls.database[settings.mongodb.checkpoint_threads_collection]
+        await checkpoint_threads.create_index("checkpoint_count")
 
     @classmethod
     def get_database(cls) -> AsyncIOMotorDatabase:
@@ -182,6 +205,21 @@ def get_checkpoints_collection() -> AsyncIOMotorCollection:
     return MongoDB.get_collection(settings.mongodb.checkpoints_collection)
 
 
+def get_checkpoint_writes_collection() -> AsyncIOMotorCollection:
+    """Get LangGraph checkpoint writes collection."""
+    return MongoDB.get_collection(settings.mongodb.checkpoint_writes_collection)
+
+
+def get_session_run_queues_collection() -> AsyncIOMotorCollection:
+    """Get per-session run queues collection."""
+    return MongoDB.get_collection(settings.mongodb.session_run_queues_collection)
+
+
+def get_checkpoint_threads_collection() -> AsyncIOMotorCollection:
+    """Get LangGraph checkpoint thread counters collection."""
+    return MongoDB.get_collection(settings.mongodb.checkpoint_threads_collection)
+
+
 def get_session_messages_collection() -> AsyncIOMotorCollection:
     """Get session messages collection."""
     return MongoDB.get_collection("session_messages")
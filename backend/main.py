@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
@@ -8,6 +10,18 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from config import settings
 from db import MongoDB
+from rag_system.agents import QueryAnalyzerAgent, WebSearchAgent
+from rag_system.core import LLMGovernor, LLMHedger, StructuredOutputCache
+from rag_system.core.llm_client import LLMClientFactory
+from rag_system.utils import LightweightCheckpointSerializer, MotorCheckpointSaver, RunDeadline
+from rag_system.workflow import init_rag_workflow
+from services import (
+    admission_service,
+    answer_cache_service,
+    checkpoint_retention_service,
+    query_service,
+    session_queue_service,
+)
 from router import auth_router, sessions_router, documents_router, query_router, workflow_router
 
 
@@ -28,8 +42,13 @@ async def lifespan(app: FastAPI):
     
     Handles startup and shutdown events:
     - Connect to MongoDB on startup
+    - Compile the RAG workflow once with the shared async checkpointer
+    - Run background checkpoint compaction
+    - Bind the LLM governor to the event loop
     - Disconnect from MongoDB on shutdown
+    - Close pooled LLM HTTP clients on shutdown
     - Create necessary directories
+    - Size the default thread pool used by asyncio.to_thread
     """
     logger.info("Starting up...")
     
@@ -37,6 +56,12 @@ async def lifespan(app: FastAPI):
     
     Path(settings.vectorstore.persist_directory).mkdir(parents=True, exist_ok=True)
     
+    # asyncio.to_thread work (PDF parsing, vector store calls) runs on this pool
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(
+        max_workers=settings.admission.executor_max_workers,
+        thread_name_prefix="worker",
+    ))
+    
     try:
         await MongoDB.connect()
         logger.info("Connected to MongoDB")
@@ -44,9 +69,18 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
     
+    init_rag_workflow(MotorCheckpointSaver(MongoDB.get_database()))
+    logger.info("Compiled RAG workflow")
+    
+    checkpoint_retention_service.start()
+    
+    LLMGovernor.bind_loop()
+    
     yield
     
     logger.info("Shutting down...")
+    await checkpoint_retention_service.stop()
+    await LLMClientFactory.aclose()
     await MongoDB.disconnect()
     logger.info("Disconnected from MongoDB")
 
@@ -136,7 +170,8 @@ async def health_check():
 @app.get("/health/ready", tags=["Health"])
 async def readiness_check():
     """
-    Readiness check - verifies all dependencies are available.
+    Readiness check - verifies all dependencies are available and the
+    process is not saturated (so load balancers can route around it).
     """
     checks = {
         "mongodb": False,
@@ -150,16 +185,47 @@ async def readiness_check():
         logger.warning(f"MongoDB health check failed: {e}")
     
     all_healthy = all(checks.values())
+    admission = admission_service.get_status()
+    ready = all_healthy and not admission["saturated"]
+    
+    if not all_healthy:
+        readiness = "not_ready"
+    elif admission["saturated"]:
+        readiness = "saturated"
+    else:
+        readiness = "ready"
     
     return JSONResponse(
-        status_code=status.HTTP_200_OK if all_healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
         content={
-            "status": "ready" if all_healthy else "not_ready",
+            "status": readiness,
             "checks": checks,
+            "admission": admission,
         },
     )
 
 
+@app.get("/health/metrics", tags=["Health"])
+async def metrics():
+    """
+    Operational metrics for background maintenance tasks.
+    """
+    return {
+        "checkpoint_retention": await checkpoint_retention_service.get_metrics(),
+        "checkpoint_serializer": LightweightCheckpointSerializer.get_stats(),
+        "query_analyzer": QueryAnalyzerAgent.get_stats(),
+        "llm_cache": StructuredOutputCache.get_stats(),
+        "llm_governor": LLMGovernor.get_stats(),
+        "llm_hedging": LLMHedger.get_stats(),
+        "answer_cache": answer_cache_service.get_stats(),
+        "speculative_web_search": WebSearchAgent.get_stats(),
+        "deadline": RunDeadline.get_stats(),
+        "query": query_service.get_stats(),
+        "session_queue": session_queue_service.get_stats(),
+        "admission": admission_service.get_stats(),
+    }
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information."""
@@ -5,6 +5,6 @@ This module provides a well-structured RAG (Retrieval-Augmented Generation) syst
 with proper separation of concerns and modular design.
 """
 
-from rag_system.workflow.graph import RAGWorkflow, ragGraph
+from rag_system.workflow.graph import RAGWorkflow, ragGraph, get_rag_workflow
 
-__all__ = ["RAGWorkflow", "ragGraph"]
+__all__ = ["RAGWorkflow", "ragGraph", "get_rag_workflow"]
@@ -11,6 +11,7 @@ from rag_system.agents.query_analyzer_agent import QueryAnalyzerAgent
 from rag_system.agents.sub_query_processor import SubQueryProcessorAgent
 from rag_system.agents.sub_query_collector import SubQueryCollectorAgent
 from rag_system.agents.answer_synthesis_agent import AnswerSynthesisAgent
+from rag_system.agents.history_compaction_agent import HistoryCompactionAgent
 
 __all__ = [
     "RoutingAgent",
@@ -24,4 +25,5 @@ __all__ = [
     "SubQueryProcessorAgent",
     "SubQueryCollectorAgent",
     "AnswerSynthesisAgent",
+    "HistoryCompactionAgent",
 ]
@@ -7,12 +7,15 @@ final answers from multiple sub-query results.
 
 import logging
 from typing import Optional
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
 from config import settings
+from rag_system.core.llm_client import get_chat_model
 from rag_system.prompts import SYNTHESIZE_ANSWERS_PROMPT
+from rag_system.utils.run_config import get_deadline
 from schemas import (
     GraphState,
     QueryAnalysisResult,
@@ -42,18 +45,23 @@ class AnswerSynthesisAgent:
         """
         self.model = model or settings.llm.model
         self.session_id = session_id
-        self.llm = ChatOpenAI(
-            model=self.model,
-            temperature=settings.llm.temperature,
-        )
+        self.llm = get_chat_model(model=self.model)
     
     @traceable(name="synthesize_answers_node", metadata={"step": "answer_synthesis"})
-    async def synthesize_answers(self, state: GraphState) -> dict:
+    async def synthesize_answers(
+        self,
+        state: GraphState,
+        config: Optional[RunnableConfig] = None,
+    ) -> dict:
         """
         Synthesize a final answer from all sub-query results.
         
+        Falls back to concatenating the sub-query answers when the latency
+        budget is too short for another LLM call.
+        
         Args:
             state: Current graph state
+            config: Run config (latency budget)
             
         Returns:
             State updates with synthesized final answer
@@ -64,13 +72,13 @@ class AnswerSynthesisAgent:
         
         # Get original query from state (should be preserved)
         # We need to access the original query before sub-query processing modified it
-        # This is stored in the routing_decision or we use the first message
+        # This is the latest human message of the current turn
         messages = state.get("messages", [])
         original_query = ""
         
         # Find the original human message
-        for msg in messages:
-            if hasattr(msg, "content") and isinstance(msg.content, str):
+        for msg in reversed(messages):
+            if isinstance(msg, HumanMessage) and isinstance(msg.content, str):
                 original_query = msg.content
                 break
         
@@ -84,6 +92,14 @@ class AnswerSynthesisAgent:
             logger.warning("[SYNTHESIS] No sub-query results to synthesize")
             return {}
         
+        deadline = get_deadline(config)
+        if not deadline.has_budget(settings.deadline.synthesis_min_ms):
+            deadline.degrade("skipped_synthesis")
+            return {
+                "query": original_query,
+                "final_answer": self._create_fallback_answer(sub_query_results),
+            }
+        
         try:
             # Format sub-query results for synthesis
             formatted_results = self._format_sub_query_results(sub_query_results)
@@ -0,0 +1,110 @@
+"""
+History compaction agent for long-lived sessions.
+
+This module contains the agent responsible for folding older
+conversation turns into a running summary so checkpointed history
+stays bounded.
+"""
+
+import logging
+from typing import Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langsmith import traceable
+
+from config import settings
+from rag_system.core.base_agent import BaseAgent
+from rag_system.prompts import HISTORY_SUMMARY_PROMPT
+from rag_system.utils.message_utils import (
+    HISTORY_SUMMARY_ID,
+    estimate_history_tokens,
+    format_history_for_prompt,
+    is_history_summary,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCompactionAgent(BaseAgent):
+    """Fold older turns into a running summary once history exceeds a token threshold."""
+
+    def _split_history(
+        self,
+        messages: list[BaseMessage],
+        keep_messages: int,
+    ) -> tuple[Optional[SystemMessage], list[BaseMessage], list[BaseMessage]]:
+        """
+        Split history into (summary, messages to fold, messages to keep).
+
+        The kept tail always starts on a human message so a turn is never split.
+        """
+        summary = next((m for m in messages if is_history_summary(m)), None)
+        turns = [m for m in messages if not is_history_summary(m)]
+
+        split = max(len(turns) - keep_messages, 0)
+        while split > 0 and not isinstance(turns[split], HumanMessage):
+            split -= 1
+
+        return summary, turns[:split], turns[split:]
+
+    @traceable(name="summarize_history", metadata={"step": "history_compaction"})
+    async def summarize_history(
+        self,
+        messages: list[BaseMessage],
+    ) -> Optional[tuple[SystemMessage, list[BaseMessage]]]:
+        """
+        Summarize older turns once history exceeds the token threshold.
+
+        Runs after a turn has been answered (off the request path), so the
+        summary is applied separately by the caller.
+
+        Args:
+            messages: Checkpointed conversation history
+
+        Returns:
+            (new summary, leading messages it replaces), or None if history
+            does not need compaction or summarization failed
+        """
+        if not settings.llm.enable_history_summary:
+            return None
+
+        history_tokens = estimate_history_tokens(messages)
+
+        if history_tokens <= settings.llm.history_summary_threshold_tokens:
+            return None
+
+        summary, to_fold, to_keep = self._split_history(
+            messages, settings.llm.history_summary_keep_messages
+        )
+        if not to_fold:
+            return None
+
+        try:
+            prompt = ChatPromptTemplate.from_template(HISTORY_SUMMARY_PROMPT)
+            chain = prompt | self.llm
+
+            response = await chain.ainvoke({
+                "existing_summary": summary.content if summary else "None",
+                "conversation": format_history_for_prompt(
+                    to_fold,
+                    max_messages=len(to_fold),
+                    truncate_content=2000,
+                ),
+                "max_words": settings.llm.history_summary_max_words,
+            })
+
+            new_summary = SystemMessage(content=response.content, id=HISTORY_SUMMARY_ID)
+
+            logger.info(
+                f"[HISTORY] Folded {len(to_fold)} messages into summary "
+                f"(~{history_tokens} → ~{estimate_history_tokens([new_summary, *to_keep])} tokens)"
+            )
+
+            # The summary is kept first, so it replaces a leading prefix of history
+            return new_summary, [summary, *to_fold] if summary else to_fold
+
+        except Exception as e:
+            # History stays intact; compaction is retried after the next turn
+            logger.error(f"[HISTORY] Compaction failed: {str(e)}")
+            return None
@@ -11,10 +11,7 @@ from langsmith import traceable
 
 from rag_system.core.base_agent import BaseAgent
 from rag_system.prompts import GENERAL_KNOWLEDGE_PROMPT
-from rag_system.utils.message_utils import (
-    get_trimmed_messages,
-    format_history_for_prompt,
-)
+from rag_system.utils.message_utils import get_history_context
 from schemas import (
     GraphState,
     AnswerWithCitations,
@@ -44,14 +41,12 @@ class LLMAnswerAgent(BaseAgent):
             State updates with final answer
         """
         query = state.get("query", "")
-        messages = list(state.get("messages", []))
         
         logger.info("[ANSWER] Generating LLM-based answer...")
         
         try:
-            # Get trimmed conversation history for context
-            trimmed_messages = get_trimmed_messages(messages)
-            history_context = format_history_for_prompt(trimmed_messages)
+            # Conversation history computed once per run
+            history_context = get_history_context(state)
             
             prompt = ChatPromptTemplate.from_template(GENERAL_KNOWLEDGE_PROMPT)
             chain = prompt | self.llm
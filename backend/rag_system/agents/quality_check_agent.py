@@ -9,6 +9,7 @@ import logging
 from langsmith import traceable
 
 from config import settings
+from rag_system.agents.web_search_agent import WebSearchAgent
 from schemas import GraphState, AnswerWithCitations
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,27 @@ class QualityCheckAgent:
     to web search is needed.
     """
     
+    @staticmethod
+    def is_low_quality(final_answer: AnswerWithCitations | None) -> bool:
+        """
+        Check whether an answer needs the web search fallback.
+        
+        Args:
+            final_answer: Generated answer (may be None)
+            
+        Returns:
+            True if the answer is missing, too short, uncertain or uncited
+        """
+        if not final_answer:
+            return True
+        
+        # Quality checks using config values
+        is_empty = not final_answer.answer or len(final_answer.answer.strip()) < settings.rag.min_answer_length
+        has_high_uncertainty = final_answer.uncertainty > settings.rag.quality_uncertainty_threshold
+        has_no_citations = len(final_answer.citations) == 0
+        
+        return is_empty or has_high_uncertainty or has_no_citations
+    
     @traceable(name="check_rag_quality_node", metadata={"step": "rag_quality_check"})
     def check_quality(self, state: GraphState) -> dict:
         """
@@ -31,7 +53,8 @@ class QualityCheckAgent:
             state: Current graph state
             
         Returns:
-            Empty dict (routing is handled by graph conditional edges)
+            Empty dict (routing is handled by graph conditional edges); a
+            speculative web search is discarded when the answer is good
         """
         final_answer: AnswerWithCitations | None = state.get("final_answer")
         
@@ -39,14 +62,14 @@ class QualityCheckAgent:
             logger.info("[CHECK] No RAG answer - will try web search")
             return {}
         
-        # Quality checks using config values
-        is_empty = not final_answer.answer or len(final_answer.answer.strip()) < settings.rag.min_answer_length
-        has_high_uncertainty = final_answer.uncertainty > settings.rag.quality_uncertainty_threshold
-        has_no_citations = len(final_answer.citations) == 0
-        
-        if is_empty or has_high_uncertainty or has_no_citations:
+        if self.is_low_quality(final_answer):
             logger.info(f"[CHECK] RAG quality low - falling back to web search")
             return {}
         
         logger.info(f"[CHECK] RAG quality good")
+        
+        search_id = state.get("speculative_search_id")
+        if search_id:
+            WebSearchAgent.discard_speculative_search(search_id)
+            return {"speculative_search_id": None}
         return {}
@@ -5,14 +5,18 @@ This module contains the agent responsible for analyzing
 and classifying user queries.
 """
 
+import asyncio
 import logging
-from typing import Optional
-from langchain_openai import ChatOpenAI
+import random
+from typing import Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langsmith import traceable
 
 from config import settings
+from rag_system.core.llm_cache import StructuredOutputCache
+from rag_system.core.llm_client import get_chat_model
 from rag_system.prompts import QUERY_ANALYZER_PROMPT
+from rag_system.tools.query_classifier import classify_query_locally
 from schemas import (
     GraphState,
     QueryAnalysisResult,
@@ -28,18 +32,77 @@ class QueryAnalyzerAgent:
     
     Determines if a query is simple (single intent) or complex
     (multiple sub-questions, comparisons, or multi-part queries).
+    Obviously simple queries are labelled by a local classifier and
+    skip the LLM call; a sample is re-checked by the LLM in the
+    background to track agreement.
     """
     
+    _stats: dict[str, int] = {
+        "local_hits": 0,
+        "llm_calls": 0,
+        "shadow_checks": 0,
+        "shadow_agreements": 0,
+    }
+    _shadow_tasks: set[asyncio.Task] = set()
+    
     def __init__(self, model: Optional[str] = None, session_id: Optional[str] = None):
         """Initialize query analyzer agent."""
         self.model = model or settings.llm.model
         self.session_id = session_id
-        self.llm = ChatOpenAI(
-            model=self.model,
-            temperature=settings.llm.temperature,
-        )
+        self.llm = get_chat_model(model=self.model)
         self.max_sub_queries = settings.query_analyzer.max_sub_queries
     
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """Get local classifier hit rate and shadow agreement counters."""
+        total = cls._stats["local_hits"] + cls._stats["llm_calls"]
+        shadow_checks = cls._stats["shadow_checks"]
+        return {
+            **cls._stats,
+            "local_hit_rate": round(cls._stats["local_hits"] / total, 4) if total else 0.0,
+            "shadow_agreement_rate": (
+                round(cls._stats["shadow_agreements"] / shadow_checks, 4) if shadow_checks else None
+            ),
+        }
+    
+    async def _analyze_with_llm(self, query: str) -> QueryAnalysisResult:
+        """Classify and decompose a query with the LLM (cached per exact prompt)."""
+        prompt = ChatPromptTemplate.from_template(QUERY_ANALYZER_PROMPT)
+        messages = prompt.format_prompt(
+            query=query,
+            max_sub_queries=self.max_sub_queries,
+        ).to_messages()
+        
+        return await StructuredOutputCache.ainvoke_structured(
+            node="analyze_query",
+            llm=self.llm,
+            schema=QueryAnalysisResult,
+            messages=messages,
+            hedge=True,
+        )
+    
+    async def _shadow_check(self, query: str) -> None:
+        """Re-classify a locally labelled query with the LLM and record agreement."""
+        try:
+            analysis = await self._analyze_with_llm(query)
+        except Exception as e:
+            logger.warning(f"[QUERY_ANALYZER] Shadow check failed: {str(e)}")
+            return
+        
+        QueryAnalyzerAgent._stats["shadow_checks"] += 1
+        if analysis.classification == "simple":
+            QueryAnalyzerAgent._stats["shadow_agreements"] += 1
+        else:
+            logger.info(f"[QUERY_ANALYZER] Shadow disagreement (LLM: complex): {query}")
+    
+    def _schedule_shadow_check(self, query: str) -> None:
+        """Sample a local classification for a background LLM re-check."""
+        if random.random() >= settings.query_analyzer.shadow_sample_rate:
+            return
+        task = asyncio.create_task(self._shadow_check(query))
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+    
     @traceable(name="query_analyzer_node", metadata={"step": "query_analysis"})
     async def analyze_query(self, state: GraphState) -> dict:
         """Analyze the user query and classify as simple or complex."""
@@ -47,16 +110,25 @@ class QueryAnalyzerAgent:
         
         logger.info(f"[QUERY_ANALYZER] Analyzing query: {query}")
         
+        if settings.query_analyzer.enable_local_classifier:
+            analysis = classify_query_locally(
+                query, max_words=settings.query_analyzer.local_classifier_max_words
+            )
+            if analysis is not None:
+                QueryAnalyzerAgent._stats["local_hits"] += 1
+                self._schedule_shadow_check(query)
+                logger.info("[QUERY_ANALYZER] Classification: simple (local classifier)")
+                return {
+                    "query_analysis": analysis,
+                    "current_sub_query_index": 0,
+                    "sub_query_results": [],
+                    "intermediate_reasoning": state.get("intermediate_reasoning", "") + 
+                        f"\n[QUERY_ANALYSIS] {analysis.reasoning}",
+                }
+        
         try:
-            # Use structured output for query analysis
-            structured_llm = self.llm.with_structured_output(QueryAnalysisResult)
-            prompt = ChatPromptTemplate.from_template(QUERY_ANALYZER_PROMPT)
-            chain = prompt | structured_llm
-            
-            analysis: QueryAnalysisResult = await chain.ainvoke({
-                "query": query,
-                "max_sub_queries": self.max_sub_queries,
-            })
+            QueryAnalyzerAgent._stats["llm_calls"] += 1
+            analysis = await self._analyze_with_llm(query)
             
             # Enforce max sub-queries limit
             if len(analysis.sub_queries) > self.max_sub_queries:
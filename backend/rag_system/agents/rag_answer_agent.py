@@ -6,17 +6,19 @@ from retrieved context with optional vision-based processing.
 """
 
 import logging
+from typing import Optional
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
 from config import settings
 from rag_system.core.base_agent import BaseAgent
 from rag_system.prompts import RAG_ANSWER_PROMPT
+from rag_system.tools.context_packer import get_context_token_budget, pack_context
 from rag_system.tools.multimodal_answer import generate_multimodal_answer
-from rag_system.utils.message_utils import (
-    get_trimmed_messages,
-    format_history_for_prompt,
-)
+from rag_system.utils.message_utils import count_text_tokens, get_history_context
+from rag_system.utils.deadline import deadline_fallback_answer
+from rag_system.utils.run_config import get_deadline
 from schemas import (
     GraphState,
     RetrievedContext,
@@ -36,19 +38,23 @@ class RAGAnswerAgent(BaseAgent):
     """
     
     @traceable(name="generate_rag_answer_node", metadata={"step": "rag_answer_generation"})
-    async def generate_answer(self, state: GraphState) -> dict:
+    async def generate_answer(
+        self,
+        state: GraphState,
+        config: Optional[RunnableConfig] = None,
+    ) -> dict:
         """
         Generate answer from RAG context asynchronously, optionally using vision for images.
         
         Args:
             state: Current graph state
+            config: Run config (latency budget)
             
         Returns:
             State updates with final answer
         """
         query = state.get("query", "")
         retrieved_context: RetrievedContext | None = state.get("retrieved_context")
-        messages = list(state.get("messages", []))
         
         logger.info("[ANSWER] Generating RAG-based answer...")
         
@@ -56,35 +62,41 @@ class RAGAnswerAgent(BaseAgent):
             logger.warning("[ANSWER] No retrieved context")
             return {}
         
+        deadline = get_deadline(config)
+        
         try:
-            # Get trimmed conversation history for context
-            trimmed_messages = get_trimmed_messages(messages)
-            history_context = format_history_for_prompt(trimmed_messages)
+            # Conversation history computed once per run
+            history_context = get_history_context(state)
+            
+            # Deduplicate and fit chunks to the prompt budget
+            retrieved_context = self._pack_context(retrieved_context, history_context)
             
             # Build context with source metadata for proper citations
             context_text = self._build_context_with_sources(retrieved_context)
             
-            # Check if we have images for multimodal processing
-            if retrieved_context.images and len(retrieved_context.images) > 0:
-                logger.info(f"[ANSWER] Using vision model with {len(retrieved_context.images)} images")
-                response = await generate_multimodal_answer(
-                    query=query,
-                    context_text=context_text,
-                    images=retrieved_context.images,
-                    images_justification=retrieved_context.images_justification,
-                    history_context=history_context,
-                )
-            else:
-                # Text-only RAG answer
-                prompt = ChatPromptTemplate.from_template(RAG_ANSWER_PROMPT)
-                chain = prompt | self.llm
+            async with deadline.timeout(settings.deadline.answer_min_ms):
+                # Check if we have images for multimodal processing
+                if retrieved_context.images and len(retrieved_context.images) > 0:
+                    logger.info(f"[ANSWER] Using vision model with {len(retrieved_context.images)} images")
+                    response = await generate_multimodal_answer(
+                        query=query,
+                        context_text=context_text,
+                        images=retrieved_context.images,
+                        images_justification=retrieved_context.images_justification,
+                        history_context=history_context,
+                        detail=retrieved_context.images_detail,
+                    )
+                else:
+                    # Text-only RAG answer
+                    prompt = ChatPromptTemplate.from_template(RAG_ANSWER_PROMPT)
+                    chain = prompt | self.llm
                 
-                response = await chain.ainvoke({
-                    "question": query,
-                    "context": context_text,
-                    "visual_context_text": "",
-                    "history_context": history_context,
-                })
+                    response = await chain.ainvoke({
+                        "question": query,
+                        "context": context_text,
+                        "visual_context_text": "",
+                        "history_context": history_context,
+                    })
             
             # Build citations with Pydantic validation
             citations = self._build_citations(retrieved_context)
@@ -100,6 +112,12 @@ class RAGAnswerAgent(BaseAgent):
             
             return {"final_answer": answer}
             
+        except TimeoutError:
+            deadline.degrade("answer_timeout")
+            return {
+                "final_answer": deadline_fallback_answer(),
+                "error_message": "Answer generation exceeded the latency budget",
+            }
         except Exception as e:
             logger.error(f"[ANSWER] Error: {str(e)}")
             return {"error_message": f"Answer generation failed: {str(e)}"}
@@ -121,11 +139,44 @@ class RAGAnswerAgent(BaseAgent):
                     source_id=chunk.source_file,
                     page_number=chunk.page_number,
                     snippet=chunk.content[:snippet_length] if chunk.content else "",
-                    confidence=settings.rag.default_confidence,
+                    confidence=(
+                        chunk.relevance_score
+                        if chunk.relevance_score is not None
+                        else settings.rag.default_confidence
+                    ),
                 ))
         
         return citations
     
+    def _pack_context(
+        self,
+        retrieved_context: RetrievedContext,
+        history_context: str,
+    ) -> RetrievedContext:
+        """
+        Deduplicate and pack chunks under the model's context token budget.
+        
+        Space is reserved for the conversation history and any page images.
+        
+        Args:
+            retrieved_context: Retrieved context with ranked chunks
+            history_context: Formatted conversation history for the prompt
+            
+        Returns:
+            Retrieved context with only the packed chunks
+        """
+        if not settings.rag.enable_context_packing or not retrieved_context.chunks:
+            return retrieved_context
+        
+        token_budget = get_context_token_budget(
+            model=self.model,
+            history_tokens=count_text_tokens(history_context),
+            image_tokens=retrieved_context.vision_tokens_estimated if retrieved_context.images else 0,
+        )
+        packed = pack_context(retrieved_context.chunks, token_budget)
+        
+        return retrieved_context.model_copy(update={"chunks": packed.chunks})
+    
     def _build_context_with_sources(self, retrieved_context: RetrievedContext) -> str:
         """
         Build formatted context string with source metadata for LLM citations.
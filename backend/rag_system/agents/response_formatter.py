@@ -61,10 +61,13 @@ class ResponseFormattingAgent:
             "final_answer": final_answer,
             "retrieved_context": None,
             "sub_query_results": [],
+            "sub_query_contexts": None,
             "web_results": [],
+            "speculative_search_id": None,
             "visual_decision": None,
             "query_analysis": None,
             "intermediate_reasoning": "",
+            "history_context": None,
             "current_sub_query_index": 0,
         }
         
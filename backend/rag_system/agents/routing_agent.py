@@ -12,8 +12,7 @@ from langsmith import traceable
 from rag_system.core.base_agent import BaseAgent
 from rag_system.prompts import ROUTING_PROMPT
 from rag_system.utils.message_utils import (
-    get_trimmed_messages,
-    format_history_for_prompt,
+    get_history_context,
     get_history_summary,
 )
 from schemas import GraphState, RoutingDecision
@@ -34,7 +33,7 @@ class RoutingAgent(BaseAgent):
         """
         Route the query to appropriate handler using session history + current query.
         
-        Uses trimmed messages to prevent unbounded token growth.
+        Uses the run's trimmed history context to prevent unbounded token growth.
         
         Args:
             state: Current graph state
@@ -50,12 +49,8 @@ class RoutingAgent(BaseAgent):
         logger.info(f"[ROUTE] Processing query: {query}")
         logger.info(f"[ROUTE] Full history: {history_stats['total']} messages (~{history_stats['estimated_tokens']} tokens)")
         
-        # Get trimmed messages for routing context (prevents token explosion)
-        trimmed_messages = get_trimmed_messages(messages)
-        logger.info(f"[ROUTE] Using trimmed history: {len(trimmed_messages)} messages")
-        
-        # Format trimmed session history for routing context
-        history_context = format_history_for_prompt(trimmed_messages)
+        # Trimmed session history for routing context (prevents token explosion)
+        history_context = get_history_context(state)
         
         # Use structured output for routing with Pydantic validation
         structured_llm = self.llm.with_structured_output(RoutingDecision)
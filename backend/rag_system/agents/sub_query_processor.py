@@ -1,56 +1,117 @@
 """
 Sub-query processor for complex query handling.
 
-This module contains the agent responsible for preparing
-sub-queries for RAG processing.
+This module contains the agent responsible for running a single
+sub-query through the RAG pipeline as an independent parallel branch.
 """
 
 import logging
-from typing import Optional
+from typing import Awaitable, Callable, Optional
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
-from schemas import GraphState, QueryAnalysisResult
+from config import settings
+from rag_system.agents.quality_check_agent import QualityCheckAgent
+from rag_system.agents.rag_answer_agent import RAGAnswerAgent
+from rag_system.agents.visual_agent import VisualDecisionAgent
+from rag_system.agents.web_search_agent import WebSearchAgent
+from rag_system.utils.run_config import get_deadline
+from schemas import AnswerWithCitations, SubQueryResult, SubQueryState, VisualDecision
 
 logger = logging.getLogger(__name__)
 
+ConfigNode = Callable[[dict, RunnableConfig], Awaitable[dict]]
+
 
 class SubQueryProcessorAgent:
     """
-    Agent responsible for preparing sub-queries for RAG processing.
+    Agent responsible for processing one sub-query end to end.
     
-    Sets up the state for processing individual sub-queries
-    through the existing RAG pipeline.
+    Each sub-query is dispatched with its own branch state and runs
+    retrieval, visual decision, answer generation, quality check and
+    web fallback without touching the shared graph state.
     """
     
-    def __init__(self, session_id: Optional[str] = None):
-        """Initialize sub-query processor agent."""
+    def __init__(
+        self,
+        rag_retrieve_node: ConfigNode,
+        retrieve_images_node: ConfigNode,
+        visual_agent: VisualDecisionAgent,
+        rag_agent: RAGAnswerAgent,
+        web_agent: WebSearchAgent,
+        session_id: Optional[str] = None,
+    ):
+        """
+        Initialize sub-query processor agent.
+        
+        Args:
+            rag_retrieve_node: Document retrieval node function
+            retrieve_images_node: Image retrieval node function
+            visual_agent: Visual decision agent
+            rag_agent: RAG answer agent
+            web_agent: Web search agent (fallback)
+            session_id: Session ID for tracking
+        """
+        self.rag_retrieve_node = rag_retrieve_node
+        self.retrieve_images_node = retrieve_images_node
+        self.visual_agent = visual_agent
+        self.rag_agent = rag_agent
+        self.web_agent = web_agent
         self.session_id = session_id
     
-    @traceable(name="prepare_sub_query_node", metadata={"step": "sub_query_preparation"})
-    async def prepare_sub_query(self, state: GraphState) -> dict:
-        """Prepare the next sub-query for RAG processing."""
+    @traceable(name="process_sub_query_node", metadata={"step": "sub_query_processing"})
+    async def process_sub_query(self, state: SubQueryState, config: RunnableConfig) -> dict:
+        """
+        Run one sub-query through the RAG pipeline.
         
-        query_analysis: QueryAnalysisResult | None = state.get("query_analysis")
-        current_index = state.get("current_sub_query_index", 0)
-        original_query = state.get("query", "")
+        Args:
+            state: Branch state for this sub-query
+            config: Run config (session and collection)
+            
+        Returns:
+            State update with this sub-query's result
+        """
+        sub_query = state.get("query", "")
+        index = state.get("sub_query_index", 0)
+        branch = dict(state)
         
-        if not query_analysis or not query_analysis.sub_queries:
-            logger.warning("[SUB_QUERY] No sub-queries available")
-            return {}
+        logger.info(f"[SUB_QUERY] Processing sub-query {index + 1}: {sub_query}")
         
-        if current_index >= len(query_analysis.sub_queries):
-            logger.info("[SUB_QUERY] All sub-queries processed")
-            return {}
+        try:
+            # Context may already be prefetched by batched retrieval
+            if "retrieved_context" not in branch:
+                branch.update(await self.rag_retrieve_node(branch, config))
+            
+            # Nothing relevant retrieved: go straight to web search
+            if branch.get("retrieved_context"):
+                branch.update(await self.visual_agent.decide_visual_context(branch, config))
+                
+                visual_decision: VisualDecision | None = branch.get("visual_decision")
+                if visual_decision and visual_decision.requires_visual:
+                    branch.update(await self.retrieve_images_node(branch, config))
+                
+                branch.update(await self.rag_agent.generate_answer(branch, config))
+            
+            if QualityCheckAgent.is_low_quality(branch.get("final_answer")):
+                deadline = get_deadline(config)
+                if deadline.has_budget(settings.deadline.web_fallback_min_ms):
+                    logger.info(f"[SUB_QUERY] Sub-query {index + 1} RAG quality low - trying web search")
+                    branch.update(await self.web_agent.search(branch))
+                    branch.update(await self.web_agent.generate_answer(branch, config))
+                else:
+                    deadline.degrade("skipped_web_fallback")
+                
+        except Exception as e:
+            logger.error(f"[SUB_QUERY] Sub-query {index + 1} failed: {str(e)}")
         
-        current_sub_query = query_analysis.sub_queries[current_index]
-        logger.info(
-            f"[SUB_QUERY] Processing sub-query {current_index + 1}/{len(query_analysis.sub_queries)}: "
-            f"{current_sub_query}"
-        )
+        final_answer: AnswerWithCitations | None = branch.get("final_answer")
         
         return {
-            "query": current_sub_query,
-            # Clear previous retrieval state for fresh RAG run
-            "retrieved_context": None,
-            "visual_decision": None,
+            "sub_query_results": [
+                SubQueryResult(
+                    sub_query=sub_query,
+                    answer=final_answer.answer if final_answer else "",
+                    citations=final_answer.citations if final_answer else [],
+                )
+            ],
         }
@@ -6,12 +6,17 @@ context (PDF page images) would enhance the answer.
 """
 
 import logging
+from typing import Optional
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
+from config import settings
 from rag_system.core.base_agent import BaseAgent
+from rag_system.core.llm_cache import StructuredOutputCache
 from rag_system.prompts import VISUAL_DECISION_PROMPT
 from rag_system.tools.visual_detection import detect_visual_elements
+from rag_system.utils.run_config import get_deadline, get_document_scope
 from schemas import GraphState, VisualDecision, RetrievedContext
 
 logger = logging.getLogger(__name__)
@@ -26,12 +31,17 @@ class VisualDecisionAgent(BaseAgent):
     """
     
     @traceable(name="visual_context_decision_node", metadata={"step": "visual_decision"})
-    async def decide_visual_context(self, state: GraphState) -> dict:
+    async def decide_visual_context(
+        self,
+        state: GraphState,
+        config: Optional[RunnableConfig] = None,
+    ) -> dict:
         """
         Decide if visual context is needed asynchronously.
         
         Args:
             state: Current graph state
+            config: Run config (document-set cache scope and latency budget)
             
         Returns:
             State updates with visual decision
@@ -49,6 +59,16 @@ class VisualDecisionAgent(BaseAgent):
             )
             return {"visual_decision": decision}
         
+        deadline = get_deadline(config)
+        if not deadline.has_budget(settings.deadline.visual_min_ms):
+            deadline.degrade("skipped_images")
+            decision = VisualDecision(
+                requires_visual=False,
+                reasoning="Latency budget too short for visual context",
+                confidence=0.5,
+            )
+            return {"visual_decision": decision}
+        
         # Quick check: does query explicitly ask for visual content?
         query_lower = query.lower()
         visual_query_keywords = [
@@ -71,16 +91,22 @@ class VisualDecisionAgent(BaseAgent):
         # Check if text mentions visual elements
         visual_elements_mentioned = detect_visual_elements(retrieved_context.text_chunks)
         
-        # Use structured output with Pydantic validation
-        structured_llm = self.llm.with_structured_output(VisualDecision)
+        # Use structured output with Pydantic validation (cached per document set)
         prompt = ChatPromptTemplate.from_template(VISUAL_DECISION_PROMPT)
-        chain = prompt | structured_llm
+        messages = prompt.format_prompt(
+            query=query,
+            total_pages=len(retrieved_context.page_numbers),
+            visual_elements_mentioned=visual_elements_mentioned,
+        ).to_messages()
         
-        decision: VisualDecision = await chain.ainvoke({
-            "query": query,
-            "total_pages": len(retrieved_context.page_numbers),
-            "visual_elements_mentioned": visual_elements_mentioned,
-        })
+        decision: VisualDecision = await StructuredOutputCache.ainvoke_structured(
+            node="visual_decide",
+            llm=self.llm,
+            schema=VisualDecision,
+            messages=messages,
+            scope=get_document_scope(config),
+            hedge=True,
+        )
         
         logger.info(f"[VISUAL] Requires visual: {decision.requires_visual}")
         
@@ -8,18 +8,23 @@ web searches and generating answers from web results.
 import asyncio
 import json
 import logging
+import re
+from typing import Any, Optional
+from uuid import uuid4
+
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
 from config import settings
 from rag_system.core.base_agent import BaseAgent
 from rag_system.prompts import WEB_SEARCH_PROMPT
-from rag_system.utils.message_utils import (
-    get_trimmed_messages,
-    format_history_for_prompt,
-)
+from rag_system.utils.message_utils import get_history_context
+from rag_system.utils.deadline import deadline_fallback_answer
+from rag_system.utils.run_config import get_deadline
 from schemas import (
     GraphState,
+    RetrievedContext,
     WebSearchResult,
     AnswerWithCitations,
     Citation,
@@ -27,19 +32,131 @@ from schemas import (
 
 logger = logging.getLogger(__name__)
 
+_TERM = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset({
+    "the", "and", "for", "are", "was", "were", "what", "how", "why", "when", "where",
+    "which", "who", "does", "did", "this", "that", "these", "those", "with", "from",
+    "about", "into", "paper", "explain", "describe", "can", "you", "its", "their",
+})
+
+# Unclaimed speculative searches are dropped after this long
+SPECULATIVE_SEARCH_TTL_SECONDS = 120
+
 
 class WebSearchAgent(BaseAgent):
     """
     Agent responsible for web search operations.
     
-    Performs web searches using Tavily and processes results.
+    Performs web searches using Tavily and processes results. When
+    retrieval looks weak, the search can be started speculatively while
+    the RAG answer is generated and claimed if the quality check fails.
     """
     
+    _speculative_searches: dict[str, asyncio.Task] = {}
+    _stats: dict[str, int] = {"started": 0, "used": 0, "discarded": 0}
+    
+    @staticmethod
+    def retrieval_confidence(
+        query: str,
+        retrieved_context: Optional[RetrievedContext],
+    ) -> tuple[float, float]:
+        """
+        Estimate how well the retrieved chunks match the query.
+        
+        Scored chunks are judged by their top cosine relevance, unscored
+        (lexical) chunks by query term coverage. The two scales differ, so
+        each has its own threshold.
+        
+        Args:
+            query: User query
+            retrieved_context: Retrieved context (may be None)
+            
+        Returns:
+            Tuple of (confidence, threshold below which retrieval is weak)
+        """
+        if not retrieved_context or not retrieved_context.chunks:
+            return 0.0, settings.rag.speculative_web_search_threshold
+        
+        scores = [c.relevance_score for c in retrieved_context.chunks if c.relevance_score is not None]
+        if scores:
+            return max(scores), settings.rag.speculative_web_search_score_threshold
+        
+        threshold = settings.rag.speculative_web_search_threshold
+        terms = {t for t in _TERM.findall(query.lower()) if len(t) > 2 and t not in _STOPWORDS}
+        if not terms:
+            return 1.0, threshold
+        
+        chunk_terms = set(_TERM.findall(
+            " ".join(chunk.content for chunk in retrieved_context.chunks).lower()
+        ))
+        return len(terms & chunk_terms) / len(terms), threshold
+    
+    @classmethod
+    def start_speculative_search(
+        cls,
+        query: str,
+        retrieved_context: Optional[RetrievedContext],
+    ) -> dict:
+        """
+        Start the web search in the background if retrieval looks weak.
+        
+        Args:
+            query: User query
+            retrieved_context: Retrieved context (may be None)
+            
+        Returns:
+            State updates with the speculative search ID (empty if not started)
+        """
+        if not settings.rag.enable_speculative_web_search:
+            return {}
+        
+        confidence, threshold = cls.retrieval_confidence(query, retrieved_context)
+        if confidence >= threshold:
+            return {}
+        
+        search_id = uuid4().hex
+        cls._speculative_searches[search_id] = asyncio.create_task(cls._run_search(query))
+        asyncio.get_running_loop().call_later(
+            SPECULATIVE_SEARCH_TTL_SECONDS, cls.discard_speculative_search, search_id
+        )
+        cls._stats["started"] += 1
+        
+        logger.info(f"[WEB] Speculative search started (retrieval confidence {confidence:.2f})")
+        return {"speculative_search_id": search_id}
+    
+    @classmethod
+    def discard_speculative_search(cls, search_id: Optional[str]) -> None:
+        """
+        Cancel an unclaimed speculative search.
+        
+        Args:
+            search_id: Speculative search ID (no-op if None or already claimed)
+        """
+        task = cls._speculative_searches.pop(search_id, None) if search_id else None
+        if task is None:
+            return
+        task.cancel()
+        cls._stats["discarded"] += 1
+        logger.info("[WEB] Speculative search discarded")
+    
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get speculative search counters.
+        
+        Returns:
+            Metrics dictionary
+        """
+        return {**cls._stats, "in_flight": len(cls._speculative_searches)}
+    
     @traceable(name="web_search_node", metadata={"step": "web_search"})
     async def search(self, state: GraphState) -> dict:
         """
         Perform web search using Tavily asynchronously.
         
+        Reuses the speculative search for this run if one was started.
+        
         Args:
             state: Current graph state
             
@@ -48,6 +165,18 @@ class WebSearchAgent(BaseAgent):
         """
         query = state.get("query", "")
         
+        search_id = state.get("speculative_search_id")
+        task = self._speculative_searches.pop(search_id, None) if search_id else None
+        if task is not None:
+            self._stats["used"] += 1
+            logger.info(f"[WEB] Using speculative search for: {query}")
+            return {**await task, "speculative_search_id": None}
+        
+        return await self._run_search(query)
+    
+    @staticmethod
+    async def _run_search(query: str) -> dict:
+        """Run a Tavily search and build web results."""
         logger.info(f"[WEB] Searching web for: {query}")
         
         try:
@@ -83,19 +212,23 @@ class WebSearchAgent(BaseAgent):
             }
     
     @traceable(name="generate_web_answer_node", metadata={"step": "web_answer_generation"})
-    async def generate_answer(self, state: GraphState) -> dict:
+    async def generate_answer(
+        self,
+        state: GraphState,
+        config: Optional[RunnableConfig] = None,
+    ) -> dict:
         """
         Generate answer from web results asynchronously.
         
         Args:
             state: Current graph state
+            config: Run config (latency budget)
             
         Returns:
             State updates with final answer
         """
         query = state.get("query", "")
         web_results: list[WebSearchResult] = state.get("web_results", [])
-        messages = list(state.get("messages", []))
         
         logger.info("[ANSWER] Generating web-based answer...")
         
@@ -104,9 +237,8 @@ class WebSearchAgent(BaseAgent):
             return {"route": "llm"}
         
         try:
-            # Get trimmed conversation history for context
-            trimmed_messages = get_trimmed_messages(messages)
-            history_context = format_history_for_prompt(trimmed_messages)
+            # Conversation history computed once per run
+            history_context = get_history_context(state)
             
             # Format web results
             formatted_results = "\n\n".join([
@@ -117,11 +249,12 @@ class WebSearchAgent(BaseAgent):
             prompt = ChatPromptTemplate.from_template(WEB_SEARCH_PROMPT)
             chain = prompt | self.llm
             
-            response = await chain.ainvoke({
-                "question": query,
-                "web_results": formatted_results,
-                "history_context": history_context,
-            })
+            async with get_deadline(config).timeout(settings.deadline.answer_min_ms):
+                response = await chain.ainvoke({
+                    "question": query,
+                    "web_results": formatted_results,
+                    "history_context": history_context,
+                })
             
             # Build citations with Pydantic validation
             max_citations = settings.rag.max_citations
@@ -150,6 +283,13 @@ class WebSearchAgent(BaseAgent):
             
             return {"final_answer": answer}
             
+        except TimeoutError:
+            get_deadline(config).degrade("answer_timeout")
+            # Fall back to this run's RAG answer (reset at run start), if any
+            return {
+                "final_answer": deadline_fallback_answer(state.get("final_answer")),
+                "error_message": "Web answer generation exceeded the latency budget",
+            }
         except Exception as e:
             logger.error(f"[ANSWER] Error: {str(e)}")
             return {"error_message": f"Web answer generation failed: {str(e)}"}
@@ -1,5 +1,22 @@
 """Core components for the RAG system."""
 
 from rag_system.core.base_agent import BaseAgent
+from rag_system.core.llm_cache import StructuredOutputCache
+from rag_system.core.llm_client import (
+    LLMClientFactory,
+    get_chat_model,
+    get_embeddings,
+)
+from rag_system.core.llm_governor import LLMGovernor, set_llm_caller
+from rag_system.core.llm_hedging import LLMHedger
 
-__all__ = ["BaseAgent"]
+__all__ = [
+    "BaseAgent",
+    "StructuredOutputCache",
+    "LLMClientFactory",
+    "get_chat_model",
+    "get_embeddings",
+    "LLMGovernor",
+    "set_llm_caller",
+    "LLMHedger",
+]
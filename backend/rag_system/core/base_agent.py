@@ -6,8 +6,8 @@ LLM initialization and configuration.
 """
 
 from typing import Optional
-from langchain_openai import ChatOpenAI
 from config import settings
+from rag_system.core.llm_client import get_chat_model
 
 
 class BaseAgent:
@@ -17,7 +17,7 @@ class BaseAgent:
     Attributes:
         model: LLM model name
         session_id: Session ID for tracking
-        llm: Initialized ChatOpenAI instance
+        llm: Shared ChatOpenAI instance from the pooled client factory
     """
     
     def __init__(self, model: Optional[str] = None, session_id: Optional[str] = None):
@@ -30,7 +30,4 @@ class BaseAgent:
         """
         self.model = model or settings.llm.model
         self.session_id = session_id
-        self.llm = ChatOpenAI(
-            model=self.model,
-            temperature=settings.llm.temperature,
-        )
+        self.llm = get_chat_model(model=self.model)
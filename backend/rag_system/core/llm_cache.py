@@ -0,0 +1,222 @@
+"""
+Exact-prompt cache for structured-output LLM calls.
+
+Deterministic (temperature 0) structured-output calls often see the same
+prompt again: retries, regenerated answers, identical sub-queries. This
+module caches their parsed results keyed by a hash of model, messages,
+output schema and an optional scope (e.g. the session's document-set
+version), with size/TTL-bounded eviction and optional SQLite persistence.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional, TypeVar
+
+from cachetools import TTLCache
+from langchain_core.messages import BaseMessage
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from config import settings
+from rag_system.core.llm_hedging import LLMHedger
+
+logger = logging.getLogger(__name__)
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+class StructuredOutputCache:
+    """Process-wide structured-output cache with per-node metrics."""
+
+    _memory: Optional[TTLCache] = None
+    _db: Optional[sqlite3.Connection] = None
+    _db_lock = threading.Lock()
+    _stats: defaultdict[str, dict[str, int]] = defaultdict(
+        lambda: {"hits": 0, "misses": 0, "bypassed": 0}
+    )
+
+    @classmethod
+    def _get_memory(cls) -> TTLCache:
+        """Get (or create) the in-memory TTL cache."""
+        if cls._memory is None:
+            cls._memory = TTLCache(
+                maxsize=settings.llm_cache.max_entries,
+                ttl=settings.llm_cache.ttl_seconds,
+            )
+        return cls._memory
+
+    @classmethod
+    def _get_db(cls) -> Optional[sqlite3.Connection]:
+        """Get (or open) the SQLite persistence store, if configured."""
+        if cls._db is None and settings.llm_cache.persist_path:
+            path = Path(settings.llm_cache.persist_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            cls._db = sqlite3.connect(str(path), check_same_thread=False)
+            cls._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            cls._db.commit()
+            logger.info(f"[LLM_CACHE] Persisting to {path}")
+        return cls._db
+
+    @classmethod
+    def _disk_get(cls, key: str) -> Optional[str]:
+        """Read an unexpired entry from disk."""
+        db = cls._get_db()
+        if db is None:
+            return None
+        with cls._db_lock:
+            row = db.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def _disk_set(cls, key: str, value: str) -> None:
+        """Write an entry to disk and drop expired ones."""
+        db = cls._get_db()
+        if db is None:
+            return
+        now = time.time()
+        with cls._db_lock:
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + settings.llm_cache.ttl_seconds),
+            )
+            db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            db.commit()
+
+    @staticmethod
+    def make_key(
+        llm: ChatOpenAI,
+        schema: type[BaseModel],
+        messages: list[BaseMessage],
+        scope: Optional[str] = None,
+    ) -> str:
+        """
+        Build the cache key for a structured-output call.
+
+        Args:
+            llm: Chat model (model name and temperature are part of the key)
+            schema: Output schema
+            messages: Prompt messages
+            scope: Extra invalidation scope (e.g. collection + document-set version)
+
+        Returns:
+            SHA-256 hex digest
+        """
+        payload = {
+            "model": llm.model_name,
+            "temperature": llm.temperature,
+            "schema": schema.model_json_schema(),
+            "messages": [(message.type, message.content) for message in messages],
+            "scope": scope,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    async def ainvoke_structured(
+        cls,
+        node: str,
+        llm: ChatOpenAI,
+        schema: type[SchemaT],
+        messages: list[BaseMessage],
+        scope: Optional[str] = None,
+        hedge: bool = False,
+    ) -> SchemaT:
+        """
+        Run a structured-output call through the cache.
+
+        Calls with a non-zero temperature are not cached.
+
+        Args:
+            node: Node name for metrics
+            llm: Chat model
+            schema: Output schema
+            messages: Prompt messages
+            scope: Extra invalidation scope (e.g. collection + document-set version)
+            hedge: Send a duplicate request if the call is slow (small calls only)
+
+        Returns:
+            Parsed schema instance
+        """
+        stats = cls._stats[node]
+
+        async def invoke() -> SchemaT:
+            return await llm.with_structured_output(schema).ainvoke(messages)
+
+        async def invoke_uncached() -> SchemaT:
+            if hedge:
+                return await LLMHedger.run(node, invoke)
+            return await invoke()
+
+        if not settings.llm_cache.enabled or llm.temperature:
+            stats["bypassed"] += 1
+            return await invoke_uncached()
+
+        key = cls.make_key(llm, schema, messages, scope)
+        memory = cls._get_memory()
+
+        cached = memory.get(key)
+        if cached is None:
+            cached = await asyncio.to_thread(cls._disk_get, key)
+            if cached is not None:
+                memory[key] = cached
+
+        if cached is not None:
+            stats["hits"] += 1
+            logger.info(f"[LLM_CACHE] Hit for {node}")
+            return schema.model_validate_json(cached)
+
+        stats["misses"] += 1
+        result = await invoke_uncached()
+
+        value = result.model_dump_json()
+        memory[key] = value
+        await asyncio.to_thread(cls._disk_set, key, value)
+
+        return result
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop all cached entries (memory and disk)."""
+        if cls._memory is not None:
+            cls._memory.clear()
+        db = cls._get_db()
+        if db is not None:
+            with cls._db_lock:
+                db.execute("DELETE FROM llm_cache")
+                db.commit()
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get per-node hit/miss counters and cache size.
+
+        Returns:
+            Metrics dictionary
+        """
+        nodes = {}
+        for node, stats in cls._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            nodes[node] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            "enabled": settings.llm_cache.enabled,
+            "entries": len(cls._memory) if cls._memory is not None else 0,
+            "persistent": bool(settings.llm_cache.persist_path),
+            "nodes": nodes,
+        }
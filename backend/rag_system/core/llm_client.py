@@ -0,0 +1,176 @@
+"""
+Process-wide LLM client factory with pooled HTTP connections.
+
+This module keeps one ChatOpenAI instance and one keep-alive httpx
+client pair per (model, params) so agents and tools reuse connections
+instead of repeating TLS handshakes on every query. All requests are
+scheduled through the process-wide LLM governor.
+"""
+
+import importlib.util
+import logging
+from typing import Any, Optional
+
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from config import settings
+from rag_system.core.llm_governor import GovernedAsyncTransport, GovernedSyncTransport
+
+logger = logging.getLogger(__name__)
+
+ClientKey = tuple[Any, ...]
+
+
+class LLMClientFactory:
+    """Pooled LLM client manager with singleton pattern."""
+
+    _chat_models: dict[ClientKey, ChatOpenAI] = {}
+    _embeddings: dict[ClientKey, OpenAIEmbeddings] = {}
+    _http_clients: dict[ClientKey, tuple[httpx.Client, httpx.AsyncClient]] = {}
+
+    @classmethod
+    def _http2_enabled(cls) -> bool:
+        """Use HTTP/2 only when requested and the h2 package is available."""
+        if not settings.llm_client.http2:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("[LLM_CLIENT] h2 package not installed, falling back to HTTP/1.1")
+            return False
+        return True
+
+    @classmethod
+    def _get_http_clients(cls, key: ClientKey) -> tuple[httpx.Client, httpx.AsyncClient]:
+        """Get or create the keep-alive sync/async httpx clients for a key."""
+        if key not in cls._http_clients:
+            client_settings = settings.llm_client
+            limits = httpx.Limits(
+                max_connections=client_settings.max_connections,
+                max_keepalive_connections=client_settings.max_keepalive_connections,
+                keepalive_expiry=client_settings.keepalive_expiry,
+            )
+            timeout = httpx.Timeout(
+                client_settings.timeout,
+                connect=client_settings.connect_timeout,
+            )
+            http2 = cls._http2_enabled()
+            resource = "embeddings" if key[0] == "embeddings" else "chat"
+
+            # Requests go through the governor's rate limits and fair queue
+            cls._http_clients[key] = (
+                httpx.Client(
+                    timeout=timeout,
+                    transport=GovernedSyncTransport(
+                        resource, httpx.HTTPTransport(limits=limits, http2=http2)
+                    ),
+                ),
+                httpx.AsyncClient(
+                    timeout=timeout,
+                    transport=GovernedAsyncTransport(
+                        resource, httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+                    ),
+                ),
+            )
+            logger.info(f"[LLM_CLIENT] Created pooled HTTP clients for {key} (http2={http2})")
+
+        return cls._http_clients[key]
+
+    @classmethod
+    def get_chat_model(
+        cls,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **params: Any,
+    ) -> ChatOpenAI:
+        """
+        Get a shared chat model for the given model and parameters.
+
+        Args:
+            model: LLM model name (defaults to config)
+            temperature: Sampling temperature (defaults to config)
+            max_tokens: Maximum tokens in response (optional)
+            **params: Extra ChatOpenAI parameters (must be hashable)
+
+        Returns:
+            ChatOpenAI instance backed by a pooled HTTP client
+        """
+        model = model or settings.llm.model
+        temperature = temperature if temperature is not None else settings.llm.temperature
+        key: ClientKey = ("chat", model, temperature, max_tokens, *sorted(params.items()))
+
+        if key not in cls._chat_models:
+            http_client, http_async_client = cls._get_http_clients(key)
+            cls._chat_models[key] = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_retries=settings.llm_client.max_retries,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                **params,
+            )
+
+        return cls._chat_models[key]
+
+    @classmethod
+    def get_embeddings(cls, model: Optional[str] = None) -> OpenAIEmbeddings:
+        """
+        Get a shared embeddings client for the given model.
+
+        Args:
+            model: Embedding model name (defaults to config)
+
+        Returns:
+            OpenAIEmbeddings instance backed by a pooled HTTP client
+        """
+        model = model or settings.embedding.model
+        key: ClientKey = ("embeddings", model)
+
+        if key not in cls._embeddings:
+            http_client, http_async_client = cls._get_http_clients(key)
+            cls._embeddings[key] = OpenAIEmbeddings(
+                model=model,
+                max_retries=settings.llm_client.max_retries,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+
+        return cls._embeddings[key]
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """
+        Close all pooled HTTP clients.
+
+        Should be called during application shutdown.
+        """
+        for http_client, http_async_client in cls._http_clients.values():
+            http_client.close()
+            await http_async_client.aclose()
+
+        logger.info(f"[LLM_CLIENT] Closed {len(cls._http_clients)} pooled HTTP client pairs")
+
+        cls._http_clients.clear()
+        cls._chat_models.clear()
+        cls._embeddings.clear()
+
+
+def get_chat_model(
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    **params: Any,
+) -> ChatOpenAI:
+    """Get a shared, pooled chat model."""
+    return LLMClientFactory.get_chat_model(
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **params,
+    )
+
+
+def get_embeddings(model: Optional[str] = None) -> OpenAIEmbeddings:
+    """Get a shared, pooled embeddings client."""
+    return LLMClientFactory.get_embeddings(model=model)
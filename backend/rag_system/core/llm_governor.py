@@ -0,0 +1,608 @@
+"""
+Process-wide governor for LLM and embedding provider calls.
+
+Every request made through the pooled HTTP clients passes through the
+governor, which enforces requests-per-minute and tokens-per-minute token
+buckets plus a concurrency cap, separately for chat and embeddings. The
+buckets follow the provider's `Retry-After` and `x-ratelimit-*` headers.
+Waiting callers are served by weighted fair queuing per (user, priority)
+flow, so one heavy user cannot starve the rest and interactive queries
+go ahead of ingestion.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Iterator, Literal, Optional
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Resource = Literal["chat", "embeddings"]
+Priority = Literal["interactive", "ingestion"]
+
+# Rough vision-token charge per attached image
+IMAGE_TOKENS = 765
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@dataclass(frozen=True)
+class LLMCaller:
+    """Who a provider call is made for."""
+
+    user_id: str = "anonymous"
+    priority: Priority = "interactive"
+
+
+_caller: ContextVar[LLMCaller] = ContextVar("llm_caller", default=LLMCaller())
+
+
+def set_llm_caller(user_id: Any, priority: Priority = "interactive") -> None:
+    """
+    Attribute provider calls made from the current task to a user.
+
+    The caller is stored in a context variable, so it carries over to
+    tasks and worker threads started from the current task.
+
+    Args:
+        user_id: User the calls are made for
+        priority: "interactive" for queries, "ingestion" for document processing
+    """
+    _caller.set(LLMCaller(user_id=str(user_id), priority=priority))
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate-limit reset duration such as "1s", "6m0s" or "20ms"."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Seconds to back off according to Retry-After headers."""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    """Parse an integer header value."""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def estimate_tokens(resource: Resource, content: bytes) -> int:
+    """
+    Estimate the tokens a provider request counts against the TPM budget.
+
+    Args:
+        resource: "chat" or "embeddings"
+        content: JSON request body
+
+    Returns:
+        Estimated tokens (prompt plus maximum completion for chat)
+    """
+    governor_settings = settings.llm_governor
+    try:
+        payload = json.loads(content) if content else {}
+    except ValueError:
+        return int(len(content) / governor_settings.chars_per_token)
+
+    chars = 0
+    tokens = 0
+    if resource == "embeddings":
+        inputs = payload.get("input", [])
+        for item in inputs if isinstance(inputs, list) else [inputs]:
+            if isinstance(item, str):
+                chars += len(item)
+            elif isinstance(item, list):
+                # Pre-tokenized input
+                tokens += len(item)
+        return tokens + int(chars / governor_settings.chars_per_token)
+
+    for message in payload.get("messages", []):
+        message_content = message.get("content")
+        if isinstance(message_content, str):
+            chars += len(message_content)
+        elif isinstance(message_content, list):
+            for part in message_content:
+                if part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                else:
+                    tokens += IMAGE_TOKENS
+
+    completion_tokens = (
+        payload.get("max_completion_tokens")
+        or payload.get("max_tokens")
+        or governor_settings.default_completion_tokens
+    )
+    return tokens + int(chars / governor_settings.chars_per_token) + completion_tokens
+
+
+class TokenBucket:
+    """Per-minute token bucket that can be corrected by provider headers."""
+
+    def __init__(self, per_minute: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Configured budget per minute
+        """
+        self.configured = per_minute
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Refill rate per second."""
+        return self.capacity / 60
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Seconds until `amount` can be taken.
+
+        Requests larger than the whole bucket only wait for a full bucket
+        and leave it in debt.
+
+        Args:
+            amount: Tokens needed
+            now: Current monotonic time
+
+        Returns:
+            Seconds to wait (0 if available now)
+        """
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Consume tokens (after wait_time returned 0)."""
+        self.level -= amount
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket for a provider-requested back-off."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe(
+        self,
+        limit: Optional[int],
+        remaining: Optional[int],
+        reset_seconds: Optional[float],
+    ) -> None:
+        """
+        Align the bucket with the provider's view of the budget.
+
+        Args:
+            limit: Provider limit per minute
+            remaining: Provider budget left in the window
+            reset_seconds: Seconds until the provider budget is fully reset
+        """
+        self._refill(time.monotonic())
+        if limit:
+            self.capacity = float(min(self.configured, limit))
+        if remaining is not None:
+            # Other processes share the provider budget; never assume more than it reports
+            self.level = min(self.level, float(remaining))
+            if remaining <= 0 and reset_seconds:
+                self.pause(reset_seconds)
+
+
+@dataclass(order=True)
+class _Waiter:
+    """A caller waiting for a provider slot."""
+
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    cost: int = field(compare=False)
+    caller: LLMCaller = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class _ResourceScheduler:
+    """Rate limits and weighted fair queue of one provider resource."""
+
+    def __init__(self, name: Resource, rpm: int, tpm: int, max_concurrency: int):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._heap: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._flow_tags: dict[tuple[str, str], float] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats: dict[str, Any] = {"granted": 0, "rate_limited": 0}
+        self.wait_stats: dict[str, dict[str, float]] = {}
+
+    @staticmethod
+    def _weight(priority: Priority) -> float:
+        """Fair-queuing weight of a priority class."""
+        if priority == "ingestion":
+            return settings.llm_governor.ingestion_weight
+        return settings.llm_governor.interactive_weight
+
+    async def acquire(self, cost: int, caller: LLMCaller) -> None:
+        """
+        Wait until the caller may send a request of `cost` tokens.
+
+        Args:
+            cost: Estimated request tokens
+            caller: Caller the request is made for
+        """
+        flow = (caller.user_id, caller.priority)
+        start_tag = max(self._virtual_time, self._flow_tags.get(flow, 0.0))
+        finish_tag = start_tag + max(cost, 1) / self._weight(caller.priority)
+        self._flow_tags[flow] = finish_tag
+
+        waiter = _Waiter(
+            finish_tag=finish_tag,
+            seq=next(self._seq),
+            start_tag=start_tag,
+            cost=cost,
+            caller=caller,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic(),
+        )
+        heapq.heappush(self._heap, waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the caller went away
+                self.release()
+            self._dispatch()
+            raise
+
+        self._record_wait(caller.priority, time.monotonic() - waiter.enqueued_at)
+
+    def _record_wait(self, priority: Priority, seconds: float) -> None:
+        """Track queue wait per priority class."""
+        stats = self.wait_stats.setdefault(
+            priority, {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        wait_ms = seconds * 1000
+        stats["count"] += 1
+        stats["total_ms"] += wait_ms
+        stats["max_ms"] = max(stats["max_ms"], wait_ms)
+
+    def _dispatch(self) -> None:
+        """Grant slots to queued callers in fair-queuing order."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._heap:
+            waiter = self._heap[0]
+            if waiter.future.done():
+                heapq.heappop(self._heap)
+                continue
+            if self.in_flight >= self.max_concurrency:
+                return
+
+            now = time.monotonic()
+            delay = max(
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(waiter.cost, now),
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._heap)
+            self.requests.take(1)
+            self.tokens.take(waiter.cost)
+            self.in_flight += 1
+            self.stats["granted"] += 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            waiter.future.set_result(None)
+
+        # All flows are idle; their tags no longer matter
+        self._flow_tags.clear()
+
+    def release(self) -> None:
+        """Free a concurrency slot after a response has been read."""
+        self.in_flight = max(self.in_flight - 1, 0)
+        self._dispatch()
+
+    def observe(self, status_code: int, headers: httpx.Headers) -> None:
+        """
+        Adapt the buckets to a provider response.
+
+        Args:
+            status_code: HTTP status
+            headers: Response headers
+        """
+        self.requests.observe(
+            _parse_int(headers.get("x-ratelimit-limit-requests")),
+            _parse_int(headers.get("x-ratelimit-remaining-requests")),
+            _parse_duration(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.observe(
+            _parse_int(headers.get("x-ratelimit-limit-tokens")),
+            _parse_int(headers.get("x-ratelimit-remaining-tokens")),
+            _parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+        if status_code == 429:
+            self.stats["rate_limited"] += 1
+            retry_after = _parse_retry_after(headers) or 1.0
+            self.requests.pause(retry_after)
+            logger.warning(f"[LLM_GOVERNOR] {self.name} rate limited, backing off {retry_after:.1f}s")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Scheduler metrics."""
+        return {
+            **self.stats,
+            "queued": sum(1 for waiter in self._heap if not waiter.future.done()),
+            "in_flight": self.in_flight,
+            "rpm_limit": int(self.requests.capacity),
+            "tpm_limit": int(self.tokens.capacity),
+            "queue_wait": {
+                priority: {
+                    "count": int(stats["count"]),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                }
+                for priority, stats in self.wait_stats.items()
+            },
+        }
+
+
+class LLMGovernor:
+    """Process-wide schedulers for chat and embedding calls."""
+
+    _schedulers: dict[Resource, _ResourceScheduler] = {}
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _bypassed = 0
+    _bypassed_lock = threading.Lock()
+
+    @classmethod
+    def bind_loop(cls) -> None:
+        """
+        Bind the governor to the running event loop.
+
+        Must be called at startup so calls made from worker threads
+        (e.g. document embedding during ingestion) can be scheduled.
+        """
+        cls._loop = asyncio.get_running_loop()
+
+    @classmethod
+    def get_scheduler(cls, resource: Resource) -> _ResourceScheduler:
+        """Get (or create) the scheduler of a resource."""
+        if resource not in cls._schedulers:
+            governor_settings = settings.llm_governor
+            if resource == "embeddings":
+                cls._schedulers[resource] = _ResourceScheduler(
+                    resource,
+                    rpm=governor_settings.embedding_rpm,
+                    tpm=governor_settings.embedding_tpm,
+                    max_concurrency=governor_settings.embedding_max_concurrency,
+                )
+            else:
+                cls._schedulers[resource] = _ResourceScheduler(
+                    resource,
+                    rpm=governor_settings.chat_rpm,
+                    tpm=governor_settings.chat_tpm,
+                    max_concurrency=governor_settings.chat_max_concurrency,
+                )
+        return cls._schedulers[resource]
+
+    @classmethod
+    def loop_for_thread(cls) -> Optional[asyncio.AbstractEventLoop]:
+        """
+        Get the bound loop if the current thread may block on it.
+
+        Returns:
+            Bound loop, or None if unbound, stopped or running in this thread
+        """
+        loop = cls._loop
+        if loop is None or not loop.is_running():
+            return None
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return loop
+        return None
+
+    @classmethod
+    def record_bypass(cls) -> None:
+        """Count a call sent without scheduling (thread-safe)."""
+        with cls._bypassed_lock:
+            cls._bypassed += 1
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get governor metrics.
+
+        Returns:
+            Metrics dictionary
+        """
+        return {
+            "enabled": settings.llm_governor.enabled,
+            "bypassed": cls._bypassed,
+            **{name: scheduler.get_stats() for name, scheduler in cls._schedulers.items()},
+        }
+
+
+class _ReleasingAsyncStream(httpx.AsyncByteStream):
+    """Response body that frees the governor slot when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release, release = None, self._release
+                release()
+
+
+class _ReleasingSyncStream(httpx.SyncByteStream):
+    """Sync response body that frees the governor slot when closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release, release = None, self._release
+                release()
+
+
+class GovernedAsyncTransport(httpx.AsyncBaseTransport):
+    """Async transport that schedules requests through the governor."""
+
+    def __init__(self, resource: Resource, transport: httpx.AsyncBaseTransport):
+        """
+        Wrap a transport.
+
+        Args:
+            resource: "chat" or "embeddings"
+            transport: Underlying pooled transport
+        """
+        self.resource = resource
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not settings.llm_governor.enabled:
+            return await self._transport.handle_async_request(request)
+
+        scheduler = LLMGovernor.get_scheduler(self.resource)
+        await scheduler.acquire(estimate_tokens(self.resource, request.content), _caller.get())
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            scheduler.release()
+            raise
+
+        scheduler.observe(response.status_code, response.headers)
+        if response.is_closed:
+            scheduler.release()
+        else:
+            response.stream = _ReleasingAsyncStream(response.stream, scheduler.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class GovernedSyncTransport(httpx.BaseTransport):
+    """
+    Sync transport that schedules requests through the governor.
+
+    Sync clients run in worker threads, so the request waits on the
+    governor's event loop; calls made with no usable loop are sent
+    ungoverned.
+    """
+
+    def __init__(self, resource: Resource, transport: httpx.BaseTransport):
+        """
+        Wrap a transport.
+
+        Args:
+            resource: "chat" or "embeddings"
+            transport: Underlying pooled transport
+        """
+        self.resource = resource
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        loop = LLMGovernor.loop_for_thread() if settings.llm_governor.enabled else None
+        if loop is None:
+            if settings.llm_governor.enabled:
+                LLMGovernor.record_bypass()
+            return self._transport.handle_request(request)
+
+        scheduler = LLMGovernor.get_scheduler(self.resource)
+        asyncio.run_coroutine_threadsafe(
+            scheduler.acquire(estimate_tokens(self.resource, request.content), _caller.get()),
+            loop,
+        ).result()
+
+        def release() -> None:
+            loop.call_soon_threadsafe(scheduler.release)
+
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+
+        loop.call_soon_threadsafe(scheduler.observe, response.status_code, response.headers)
+        if response.is_closed:
+            release()
+        else:
+            response.stream = _ReleasingSyncStream(response.stream, release)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
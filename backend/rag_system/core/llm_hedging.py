@@ -0,0 +1,136 @@
+"""
+Hedged requests for small deterministic LLM calls.
+
+Occasional provider stalls can hold a single call for many seconds. For
+cheap calls whose result does not depend on which request answers
+(query analysis, visual decision, page selection), a duplicate request
+is sent once the primary is slower than a recent latency percentile.
+The first result wins and the other request is cancelled. A budget caps
+hedges at a configured percentage of hedgeable calls.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, TypeVar
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ResultT = TypeVar("ResultT")
+
+
+class LLMHedger:
+    """Process-wide hedging with per-node latency tracking."""
+
+    _latencies: defaultdict[str, deque] = defaultdict(
+        lambda: deque(maxlen=settings.llm_hedging.window_size)
+    )
+    _stats: dict[str, int] = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+
+    @classmethod
+    def hedge_delay(cls, node: str) -> float:
+        """
+        Seconds to wait for the primary request before hedging.
+
+        Args:
+            node: Call type (e.g. "analyze_query")
+
+        Returns:
+            Delay in seconds
+        """
+        hedging = settings.llm_hedging
+        latencies = cls._latencies[node]
+        if len(latencies) < hedging.min_samples:
+            delay_ms = hedging.initial_delay_ms
+        else:
+            delay_ms = float(np.percentile(latencies, hedging.percentile))
+        return max(delay_ms, hedging.min_delay_ms) / 1000
+
+    @classmethod
+    def _has_budget(cls) -> bool:
+        """Check whether another hedge stays within the extra-call budget."""
+        allowed = cls._stats["calls"] * settings.llm_hedging.max_extra_percent / 100
+        return cls._stats["hedged"] + 1 <= allowed
+
+    @classmethod
+    async def run(cls, node: str, call: Callable[[], Awaitable[ResultT]]) -> ResultT:
+        """
+        Run a call, hedging it with a duplicate if it is slow.
+
+        Args:
+            node: Call type used for latency tracking and metrics
+            call: Factory for the request (called once per attempt)
+
+        Returns:
+            Result of the first attempt to succeed
+
+        Raises:
+            Exception: The primary's error if every attempt failed (the
+                hedge's if the primary was cancelled)
+            asyncio.CancelledError: If every attempt was cancelled
+        """
+        if not settings.llm_hedging.enabled:
+            return await call()
+
+        cls._stats["calls"] += 1
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(call())
+        attempts = [primary]
+
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=cls.hedge_delay(node))
+            if not done:
+                if cls._has_budget():
+                    cls._stats["hedged"] += 1
+                    logger.info(f"[HEDGE] {node} slower than {cls.hedge_delay(node):.2f}s, hedging")
+                    attempts.append(asyncio.ensure_future(call()))
+                else:
+                    cls._stats["budget_exhausted"] += 1
+
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # exception() raises CancelledError on a cancelled attempt
+                winner = next(
+                    (task for task in done if not task.cancelled() and task.exception() is None),
+                    None,
+                )
+                if winner is not None:
+                    if winner is not primary:
+                        cls._stats["hedge_wins"] += 1
+                    # End-to-end latency (hedge included) sets the next delay
+                    cls._latencies[node].append((time.monotonic() - started_at) * 1000)
+                    return winner.result()
+
+            failed = [task for task in attempts if not task.cancelled()]
+            if not failed:
+                raise asyncio.CancelledError()
+            raise (primary if primary in failed else failed[0]).exception()
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get hedging counters and current hedge delays.
+
+        Returns:
+            Metrics dictionary
+        """
+        return {
+            "enabled": settings.llm_hedging.enabled,
+            **cls._stats,
+            "extra_call_percent": (
+                round(cls._stats["hedged"] / cls._stats["calls"] * 100, 2)
+                if cls._stats["calls"] else 0.0
+            ),
+            "delay_ms": {
+                node: round(cls.hedge_delay(node) * 1000) for node in list(cls._latencies)
+            },
+        }
@@ -15,6 +15,7 @@ from rag_system.prompts.query_analyzer import (
     QUERY_ANALYZER_PROMPT,
     SYNTHESIZE_ANSWERS_PROMPT,
 )
+from rag_system.prompts.history import HISTORY_SUMMARY_PROMPT
 
 __all__ = [
     "ROUTING_PROMPT",
@@ -25,5 +26,6 @@ __all__ = [
     "PAGE_SELECTION_PROMPT",
     "QUERY_ANALYZER_PROMPT",
     "SYNTHESIZE_ANSWERS_PROMPT",
+    "HISTORY_SUMMARY_PROMPT",
     "build_multimodal_prompt",
 ]
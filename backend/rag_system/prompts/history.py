@@ -0,0 +1,17 @@
+"""Conversation history summarization prompts."""
+
+HISTORY_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a research paper assistant.
+
+Existing summary:
+{existing_summary}
+
+New conversation turns to fold into the summary:
+{conversation}
+
+Instructions:
+1. Produce a single updated summary that merges the existing summary with the new turns.
+2. Keep the questions asked, key facts and conclusions from answers, cited documents/pages, and any user preferences.
+3. Preserve names, numbers and terminology exactly; drop pleasantries and repetition.
+4. Write in compact prose or short bullet points, at most {max_words} words.
+
+Updated summary:"""
@@ -1,9 +1,27 @@
 """Retriever modules for the RAG system."""
 
-from rag_system.retrievers.document_retriever import DocumentRetriever
+from rag_system.retrievers.document_retriever import (
+    DocumentRetriever,
+    get_document_retriever,
+)
 from rag_system.retrievers.image_retriever import ImageRetriever
+from rag_system.retrievers.rerankers import (
+    BaseReranker,
+    BM25Reranker,
+    EmbeddingReranker,
+    LLMReranker,
+    ONNXCrossEncoderReranker,
+    get_reranker,
+)
 
 __all__ = [
     "DocumentRetriever",
+    "get_document_retriever",
     "ImageRetriever",
+    "BaseReranker",
+    "BM25Reranker",
+    "EmbeddingReranker",
+    "LLMReranker",
+    "ONNXCrossEncoderReranker",
+    "get_reranker",
 ]
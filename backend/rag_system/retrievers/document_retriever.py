@@ -5,14 +5,14 @@ This module handles document retrieval from the vector store
 with support for various search strategies including hybrid search and reranking.
 """
 
+import asyncio
 import logging
-import json
+import time
+from functools import lru_cache
 from typing import Optional
 
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-
 from config import settings
+from rag_system.retrievers.rerankers import get_reranker
 from schemas import RetrievedContext, RetrievedChunk
 from vectorstore import ChromaManager
 
@@ -31,6 +31,55 @@ class DocumentRetriever:
         """
         self.collection_name = collection_name
         self.retriever = ChromaManager(collection_name=collection_name)
+        self.reranker = get_reranker(self.retriever)
+    
+    @staticmethod
+    def _to_chunk(doc: dict) -> RetrievedChunk:
+        """Build a RetrievedChunk from a retrieved document dict."""
+        return RetrievedChunk(
+            content=doc["content"],
+            chunk_id=doc.get("id"),
+            page_number=doc.get("page_number"),
+            source_file=doc.get("source", "unknown"),
+            category=doc.get("category"),
+            token_count=(doc.get("metadata") or {}).get("token_count"),
+            relevance_score=doc.get("score"),
+            lexical_score=doc.get("lexical_score"),
+        )
+    
+    @staticmethod
+    def _scores(chunks: list[RetrievedChunk]) -> Optional[list[float]]:
+        """Relevance scores of the chunks, or None if any chunk is unscored."""
+        scores = [chunk.relevance_score for chunk in chunks]
+        return None if any(score is None for score in scores) else scores
+    
+    @staticmethod
+    def is_below_floor(context: Optional[RetrievedContext]) -> bool:
+        """
+        Check whether no retrieved chunk clears the relevance floor.
+        
+        Args:
+            context: Retrieved context (may be None)
+            
+        Returns:
+            True if the context is scored and its best chunk is below the floor
+        """
+        if not context or not context.chunks:
+            return False
+        scores = [chunk.relevance_score for chunk in context.chunks if chunk.relevance_score is not None]
+        return bool(scores) and max(scores) < settings.vectorstore.relevance_floor
+    
+    def _adapt_k(self, chunks: list[RetrievedChunk]) -> list[RetrievedChunk]:
+        """Drop chunks scoring far below the best one (keeps retrieval order)."""
+        scores = self._scores(chunks)
+        if not settings.vectorstore.enable_adaptive_k or not scores:
+            return chunks
+        
+        cutoff = max(scores) - settings.vectorstore.adaptive_k_margin
+        kept = [chunk for chunk, score in zip(chunks, scores) if score >= cutoff]
+        if len(kept) < len(chunks):
+            logger.info(f"[RAG] Adaptive k: kept {len(kept)}/{len(chunks)} chunks (cutoff {cutoff:.2f})")
+        return kept
     
     async def retrieve(
         self,
@@ -70,16 +119,10 @@ class DocumentRetriever:
                 logger.warning("[RAG] No documents retrieved")
                 return None
             
-            # Build chunks with per-document metadata
-            chunks = [
-                RetrievedChunk(
-                    content=doc["content"],
-                    page_number=doc.get("page_number"),
-                    source_file=doc.get("source", "unknown"),
-                    category=doc.get("category"),
-                )
-                for doc in retrieved_docs
-            ]
+            # Build chunks with per-document metadata and scores
+            chunks = self._adapt_k([self._to_chunk(doc) for doc in retrieved_docs])
+            kept_ids = {chunk.chunk_id for chunk in chunks}
+            retrieved_docs = [doc for doc in retrieved_docs if doc.get("id") in kept_ids]
             
             # Extract unique page numbers and source files
             unique_page_numbers = self.retriever.extract_page_numbers(retrieved_docs)
@@ -133,15 +176,7 @@ class DocumentRetriever:
                 logger.warning("[RAG] No documents in hybrid search")
                 return None
             
-            chunks = [
-                RetrievedChunk(
-                    content=doc["content"],
-                    page_number=doc.get("page_number"),
-                    source_file=doc.get("source", "unknown"),
-                    category=doc.get("category"),
-                )
-                for doc in retrieved_docs
-            ]
+            chunks = [self._to_chunk(doc) for doc in retrieved_docs]
             
             unique_page_numbers = self.retriever.extract_page_numbers(retrieved_docs)
             source_files = self.retriever.extract_source_files(retrieved_docs)
@@ -167,7 +202,7 @@ class DocumentRetriever:
         use_hybrid: bool = False,
     ) -> Optional[RetrievedContext]:
         """
-        Retrieve and rerank by LLM relevance.
+        Retrieve and rerank with the configured reranker.
         
         Args:
             query: Search query
@@ -201,6 +236,104 @@ class DocumentRetriever:
             images_justification=context.images_justification,
         )
 
+    async def retrieve_batch(
+        self,
+        queries: list[str],
+        use_hybrid: bool = False,
+        rerank: bool = False,
+    ) -> list[Optional[RetrievedContext]]:
+        """
+        Retrieve context for several sub-queries in one batched pass.
+        
+        Sub-queries are embedded in a single request and searched with a
+        single Chroma query. Chunks shared across sub-queries are built once
+        and reused, while each sub-query keeps its own ranking.
+        
+        Args:
+            queries: Sub-queries, in analyzer order
+            use_hybrid: Whether to fuse semantic and lexical results
+            rerank: Whether to LLM-rerank each sub-query's chunks
+            
+        Returns:
+            Retrieved context per sub-query (None where nothing was found)
+        """
+        k = settings.vectorstore.retrieval_k * 2 if rerank else settings.vectorstore.retrieval_k
+        logger.info(f"[RAG] Batched retrieval for {len(queries)} sub-queries")
+        
+        try:
+            if use_hybrid:
+                batches = await self.retriever.batch_hybrid_retrieve(
+                    queries=queries,
+                    k=k,
+                    semantic_weight=settings.vectorstore.hybrid_semantic_weight,
+                    lexical_weight=settings.vectorstore.hybrid_lexical_weight,
+                )
+            else:
+                batches = await self.retriever.batch_retrieve(queries=queries, k=k)
+        except Exception as e:
+            logger.error(f"[RAG] Batched retrieval error: {str(e)}")
+            raise
+        
+        # Deduplicate chunks across sub-queries by document ID
+        shared_chunks: dict[str, RetrievedChunk] = {}
+        contexts: list[Optional[RetrievedContext]] = []
+        for retrieved_docs in batches:
+            if not retrieved_docs:
+                contexts.append(None)
+                continue
+            
+            chunks = []
+            for doc in retrieved_docs:
+                key = doc.get("id") or doc["content"]
+                if key not in shared_chunks:
+                    shared_chunks[key] = self._to_chunk(doc)
+                # Scores are per sub-query; the rest of the chunk is shared
+                chunks.append(shared_chunks[key].model_copy(update={
+                    "relevance_score": doc.get("score"),
+                    "lexical_score": doc.get("lexical_score"),
+                }))
+            
+            if not use_hybrid:
+                chunks = self._adapt_k(chunks)
+                kept_ids = {chunk.chunk_id for chunk in chunks}
+                retrieved_docs = [doc for doc in retrieved_docs if doc.get("id") in kept_ids]
+            
+            contexts.append(RetrievedContext(
+                chunks=chunks,
+                unique_page_numbers=self.retriever.extract_page_numbers(retrieved_docs),
+                source_files=self.retriever.extract_source_files(retrieved_docs),
+            ))
+        
+        logger.info(
+            f"[RAG] Batched retrieval: {sum(len(c.chunks) for c in contexts if c)} chunks, "
+            f"{len(shared_chunks)} unique"
+        )
+        
+        if rerank:
+            contexts = list(await asyncio.gather(*(
+                self._rerank_context(query, context)
+                for query, context in zip(queries, contexts)
+            )))
+        
+        return contexts
+    
+    async def _rerank_context(
+        self,
+        query: str,
+        context: Optional[RetrievedContext],
+    ) -> Optional[RetrievedContext]:
+        """Rerank a retrieved context's chunks for a query."""
+        if not context or not context.chunks:
+            return context
+        
+        return context.model_copy(update={
+            "chunks": await self.rerank_chunks(
+                query=query,
+                chunks=context.chunks,
+                top_k=settings.vectorstore.rerank_top_k,
+            ),
+        })
+
     async def rerank_chunks(
         self,
         query: str,
@@ -208,7 +341,7 @@ class DocumentRetriever:
         top_k: int = 5,
     ) -> list[RetrievedChunk]:
         """
-        Rerank retrieved chunks using LLM relevance scoring.
+        Rerank retrieved chunks with the configured reranker.
         
         Args:
             query: Search query
@@ -224,54 +357,37 @@ class DocumentRetriever:
         if len(chunks) <= top_k:
             return chunks
         
-        logger.info(f"[RAG] Reranking {len(chunks)} chunks...")
+        # Skip the reranker when the top k are already clearly separated
+        scores = self._scores(chunks)
+        if scores:
+            ranked = sorted(range(len(chunks)), key=lambda i: -scores[i])
+            gap = scores[ranked[top_k - 1]] - scores[ranked[top_k]]
+            if gap >= settings.vectorstore.rerank_skip_margin:
+                logger.info(f"[RAG] Skipped rerank: top {top_k} separated by {gap:.2f}")
+                return [chunks[i] for i in ranked[:top_k]]
         
-        try:
-            llm = ChatOpenAI(
-                model=settings.llm.model,
-                temperature=0.0,  # Deterministic scoring
-            )
-            
-            # Format chunks for LLM evaluation
-            chunks_text = "\n\n".join([
-                f"[Chunk {i+1}] (Page {c.page_number}, {c.source_file})\n{c.content[:300]}..."
-                for i, c in enumerate(chunks)
-            ])
-            
-            prompt = ChatPromptTemplate.from_template(
-                """Given the user query and retrieved chunks, score each chunk's relevance to the query.
-                
-Query: {query}
-
-Chunks:
-{chunks}
+        start_time = time.perf_counter()
+        ranked_chunks = await self.reranker.rerank(query=query, chunks=chunks, top_k=top_k)
+        
+        logger.info(
+            f"[RAG] Reranked {len(chunks)} → {len(ranked_chunks)} chunks with "
+            f"{self.reranker.name} in {(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
+        return ranked_chunks
 
-Return a JSON list with chunk indices and relevance scores (0-1), sorted by score descending.
-Example: [{"chunk_index": 0, "score": 0.95}, ...]
 
-JSON:"""
-            )
-            
-            response = await llm.ainvoke(prompt.format_prompt(
-                query=query,
-                chunks=chunks_text
-            ).to_messages())
-            
-            # Parse scores
-            try:
-                scores = json.loads(response.content)
-                ranked_chunks = []
-                for item in scores[:top_k]:
-                    idx = item.get("chunk_index", 0)
-                    if 0 <= idx < len(chunks):
-                        ranked_chunks.append(chunks[idx])
-                
-                logger.info(f"[RAG] Reranked to top {len(ranked_chunks)} chunks")
-                return ranked_chunks
-            except json.JSONDecodeError:
-                logger.warning("[RAG] Could not parse LLM reranking response")
-                return chunks[:top_k]
-                
-        except Exception as e:
-            logger.error(f"[RAG] Reranking error: {str(e)}")
-            return chunks[:top_k]
+@lru_cache(maxsize=64)
+def get_document_retriever(collection_name: str) -> DocumentRetriever:
+    """
+    Get a cached document retriever for a collection.
+    
+    Reuses the ChromaManager (and its client) across queries on the
+    same collection instead of rebuilding it per request.
+    
+    Args:
+        collection_name: Name of the ChromaDB collection
+        
+    Returns:
+        DocumentRetriever instance
+    """
+    return DocumentRetriever(collection_name=collection_name)
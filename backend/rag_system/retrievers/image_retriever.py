@@ -11,7 +11,7 @@ from pathlib import Path
 from typing import Optional
 from collections import Counter, defaultdict
 
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage
 
 from config import settings
 from schemas import (
@@ -20,7 +20,14 @@ from schemas import (
     PageSelectionDecision,
     SourcePageSelection,
 )
+from rag_system.core.llm_cache import StructuredOutputCache
+from rag_system.core.llm_client import get_chat_model
 from rag_system.tools.pdf_processing import pdf_pages_to_images
+from rag_system.tools.vision_budget import (
+    VisionPlan,
+    infer_content_type,
+    plan_vision_budget,
+)
 from rag_system.prompts import PAGE_SELECTION_PROMPT
 
 logger = logging.getLogger(__name__)
@@ -34,27 +41,25 @@ class ImageRetriever:
     images from PDFs, following the Single Responsibility Principle.
     """
     
-    def __init__(self, session_id: str):
+    def __init__(self):
         """
         Initialize the image retriever.
         
-        Args:
-            session_id: Session ID for locating uploaded documents
+        The retriever is session-agnostic; the upload directory is
+        resolved per call from the session ID.
         """
-        self.session_id = session_id
-        self.upload_dir = Path(settings.upload.directory) / session_id
-        # Initialize LLM for intelligent page selection
-        self.llm = ChatOpenAI(
-            model=settings.llm.model,
-            temperature=settings.llm.temperature,
-        )
+        # Shared LLM for intelligent page selection
+        self.llm = get_chat_model()
     
     async def retrieve(
         self,
         retrieved_context: RetrievedContext,
         query: str,
+        session_id: str,
         max_images: int | None = None,
         max_pages: int | None = None,
+        visual_type: str | None = None,
+        cache_scope: str | None = None,
     ) -> Optional[RetrievedContext]:
         """
         Generate PDF page images from retrieved context asynchronously.
@@ -64,8 +69,11 @@ class ImageRetriever:
         Args:
             retrieved_context: Context with chunks and their page numbers
             query: User query (for justification)
+            session_id: Session ID for locating uploaded documents
             max_images: Maximum number of images to extract (defaults to config)
             max_pages: Maximum number of pages to process (defaults to config)
+            visual_type: Visual content type requested by the visual decision agent
+            cache_scope: Document-set scope for cached page selections
             
         Returns:
             Updated context with images or None if extraction fails
@@ -80,9 +88,11 @@ class ImageRetriever:
         
         logger.info("[IMAGES] Generating PDF page images...")
         
+        upload_dir = Path(settings.upload.directory) / session_id
+        
         try:
-            if not self.upload_dir.exists():
-                logger.warning(f"[IMAGES] Upload directory not found: {self.upload_dir}")
+            if not upload_dir.exists():
+                logger.warning(f"[IMAGES] Upload directory not found: {upload_dir}")
                 return None
             
             # Use LLM to intelligently select which pages to convert (per document)
@@ -90,6 +100,7 @@ class ImageRetriever:
                 query=query,
                 retrieved_context=retrieved_context,
                 max_pages=max_pages,
+                cache_scope=cache_scope,
             )
             
             if not page_selection or not page_selection.selected_pages:
@@ -98,6 +109,16 @@ class ImageRetriever:
             
             logger.info(f"[IMAGES] LLM selection reasoning: {page_selection.reasoning}")
             
+            # Pick detail level, resolution and image count within the token budget
+            vision_plan = self._plan_vision(
+                retrieved_context=retrieved_context,
+                page_selection=page_selection,
+                max_images=max_images,
+                visual_type=visual_type,
+            )
+            if vision_plan:
+                max_images = vision_plan.max_images
+            
             all_images = []
             processed_selections = []
             total_pages_extracted = 0
@@ -117,7 +138,7 @@ class ImageRetriever:
                     continue
                 
                 # Find the PDF file
-                pdf_path = self.upload_dir / source_file
+                pdf_path = upload_dir / source_file
                 if not pdf_path.exists():
                     logger.warning(f"[IMAGES] PDF not found: {pdf_path}")
                     continue
@@ -142,7 +163,8 @@ class ImageRetriever:
                         str(pdf_path),
                         page_indices,
                         settings.image.zoom_factor,
-                        settings.image.max_width,
+                        vision_plan.max_width if vision_plan else settings.image.max_width,
+                        vision_plan.grayscale if vision_plan else False,
                     )
                     all_images.extend(images)
                     processed_selections.append(f"{source_file}:pages{valid_pages}")
@@ -165,6 +187,9 @@ class ImageRetriever:
                         f"Extracted from {processed_selections}. "
                         f"Selection reasoning: {page_selection.reasoning}"
                     ),
+                    images_detail=vision_plan.detail if vision_plan else None,
+                    vision_tokens_estimated=vision_plan.estimated_tokens if vision_plan else 0,
+                    vision_tokens_saved=vision_plan.tokens_saved if vision_plan else 0,
                 )
                 
                 logger.info(f"[IMAGES] Generated {len(all_images)} total images")
@@ -177,11 +202,50 @@ class ImageRetriever:
             logger.error(f"[IMAGES] Error generating images: {str(e)}")
             return None
     
+    def _plan_vision(
+        self,
+        retrieved_context: RetrievedContext,
+        page_selection: PageSelectionDecision,
+        max_images: int,
+        visual_type: str | None = None,
+    ) -> Optional[VisionPlan]:
+        """
+        Build a vision token budget plan for the selected pages.
+        
+        Args:
+            retrieved_context: Retrieved context with chunk categories
+            page_selection: Pages selected for image extraction
+            max_images: Maximum number of images requested
+            visual_type: Visual content type from the visual decision
+            
+        Returns:
+            VisionPlan, or None if the optimizer is disabled
+        """
+        if not settings.image.enable_budget_optimizer:
+            return None
+        
+        selected = {
+            (selection.source_file, page)
+            for selection in page_selection.selected_pages
+            for page in selection.pages
+        }
+        categories = [
+            chunk.category
+            for chunk in retrieved_context.chunks
+            if (chunk.source_file, chunk.page_number) in selected
+        ]
+        
+        return plan_vision_budget(
+            num_images=min(max_images, len(selected)),
+            content_type=infer_content_type(visual_type, categories),
+        )
+    
     async def _select_pages_with_llm(
         self,
         query: str,
         retrieved_context: RetrievedContext,
         max_pages: int | None = None,
+        cache_scope: str | None = None,
     ) -> Optional[PageSelectionDecision]:
         """
         Use LLM to intelligently select which pages to convert to images.
@@ -192,6 +256,7 @@ class ImageRetriever:
             query: User's query
             retrieved_context: Retrieved document context with chunk metadata
             max_pages: Maximum pages to select (defaults to config)
+            cache_scope: Document-set scope for cached selections
             
         Returns:
             PageSelectionDecision with selected pages per source and reasoning
@@ -219,9 +284,15 @@ class ImageRetriever:
                 retrieved_docs_summary=retrieved_docs_summary,
             )
             
-            # Get LLM decision with structured output
-            structured_llm = self.llm.with_structured_output(PageSelectionDecision)
-            decision: PageSelectionDecision = await structured_llm.ainvoke(prompt)
+            # Get LLM decision with structured output (cached per document set)
+            decision: PageSelectionDecision = await StructuredOutputCache.ainvoke_structured(
+                node="select_pages",
+                llm=self.llm,
+                schema=PageSelectionDecision,
+                messages=[HumanMessage(content=prompt)],
+                scope=cache_scope,
+                hedge=True,
+            )
             
             # Validate and filter selected pages
             validated_selections = []
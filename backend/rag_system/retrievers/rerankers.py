@@ -0,0 +1,353 @@
+"""
+Pluggable rerankers for retrieved chunks.
+
+This module provides local, deterministic rerankers (embedding cosine,
+BM25 features, ONNX cross-encoder) alongside the original LLM-based
+reranker, selected with `settings.vectorstore.reranker`.
+"""
+
+import asyncio
+import logging
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from langchain_core.prompts import ChatPromptTemplate
+
+from config import settings
+from rag_system.core.llm_cache import StructuredOutputCache
+from rag_system.core.llm_client import get_chat_model
+from schemas import RerankDecision, RetrievedChunk
+from vectorstore import ChromaManager
+
+try:
+    import onnxruntime
+    from tokenizers import Tokenizer
+except ImportError:  # pragma: no cover - optional dependency
+    onnxruntime = None
+    Tokenizer = None
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _order_by_scores(
+    chunks: list[RetrievedChunk],
+    scores: list[float],
+    top_k: int,
+) -> list[RetrievedChunk]:
+    """Sort chunks by score descending, breaking ties by original rank."""
+    order = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+    return [chunks[i] for i in order[:top_k]]
+
+
+class BaseReranker(ABC):
+    """Interface for chunk rerankers."""
+
+    name: str = "base"
+
+    @abstractmethod
+    async def score(self, query: str, chunks: list[RetrievedChunk]) -> list[float]:
+        """
+        Score each chunk's relevance to the query.
+
+        Args:
+            query: Search query
+            chunks: Candidate chunks
+
+        Returns:
+            One score per chunk (higher is more relevant)
+        """
+
+    async def rerank(
+        self,
+        query: str,
+        chunks: list[RetrievedChunk],
+        top_k: int = 5,
+    ) -> list[RetrievedChunk]:
+        """
+        Rerank chunks and keep the top k.
+
+        Args:
+            query: Search query
+            chunks: Candidate chunks
+            top_k: Number of chunks to keep
+
+        Returns:
+            Reranked chunks
+        """
+        if len(chunks) <= top_k:
+            return chunks
+
+        try:
+            scores = await self.score(query, chunks)
+        except Exception as e:
+            logger.error(f"[RERANK] {self.name} reranker error: {str(e)}")
+            return chunks[:top_k]
+
+        return _order_by_scores(chunks, scores, top_k)
+
+
+class EmbeddingReranker(BaseReranker):
+    """
+    Cosine similarity between the query and stored chunk vectors.
+
+    Semantic retrieval already returns this cosine as each chunk's
+    relevance score, so those scores are reused as-is. Only unscored
+    (lexical-only) chunks are scored here: their vectors are read back
+    from Chroma by chunk ID and the query is embedded (and cached).
+    """
+
+    name = "embedding"
+
+    def __init__(self, chroma_manager: ChromaManager):
+        """
+        Initialize embedding reranker.
+
+        Args:
+            chroma_manager: Collection manager holding the chunk vectors
+        """
+        self.chroma_manager = chroma_manager
+        self._query_vectors: dict[str, np.ndarray] = {}
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a query, reusing vectors from earlier calls."""
+        if query not in self._query_vectors:
+            if len(self._query_vectors) >= 256:
+                self._query_vectors.pop(next(iter(self._query_vectors)))
+            vector = await self.chroma_manager.embeddings.aembed_query(query)
+            self._query_vectors[query] = np.asarray(vector, dtype=np.float32)
+        return self._query_vectors[query]
+
+    async def _chunk_vectors(self, chunks: list[RetrievedChunk]) -> list[np.ndarray]:
+        """Load stored chunk vectors, embedding any chunk without one."""
+        chunk_ids = [chunk.chunk_id for chunk in chunks if chunk.chunk_id]
+        stored: dict[str, np.ndarray] = {}
+        if chunk_ids:
+            response = await asyncio.to_thread(
+                self.chroma_manager.vectorstore._collection.get,
+                ids=chunk_ids,
+                include=["embeddings"],
+            )
+            stored = {
+                chunk_id: np.asarray(vector, dtype=np.float32)
+                for chunk_id, vector in zip(response["ids"], response["embeddings"])
+            }
+
+        missing = [i for i, chunk in enumerate(chunks) if chunk.chunk_id not in stored]
+        embedded: dict[int, np.ndarray] = {}
+        if missing:
+            vectors = await self.chroma_manager.embeddings.aembed_documents(
+                [chunks[i].content for i in missing]
+            )
+            embedded = {i: np.asarray(v, dtype=np.float32) for i, v in zip(missing, vectors)}
+
+        return [
+            embedded[i] if i in embedded else stored[chunk.chunk_id]
+            for i, chunk in enumerate(chunks)
+        ]
+
+    async def score(self, query: str, chunks: list[RetrievedChunk]) -> list[float]:
+        """Score chunks by cosine similarity to the query (reusing retrieval scores)."""
+        scores = [chunk.relevance_score for chunk in chunks]
+        unscored = [i for i, score in enumerate(scores) if score is None]
+        if not unscored:
+            return scores
+
+        query_vector = await self._embed_query(query)
+        matrix = np.vstack(await self._chunk_vectors([chunks[i] for i in unscored]))
+
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+        norms[norms == 0] = 1.0
+        # Clipped to the 0-1 range of the retrieval scores
+        similarities = np.clip(matrix @ query_vector / norms, 0.0, 1.0)
+        for i, similarity in zip(unscored, similarities.tolist()):
+            scores[i] = similarity
+        return scores
+
+
+class BM25Reranker(BaseReranker):
+    """Okapi BM25 over the candidate set (no network, no model)."""
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize BM25 reranker.
+
+        Args:
+            k1: Term frequency saturation
+            b: Length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+    async def score(self, query: str, chunks: list[RetrievedChunk]) -> list[float]:
+        """Score chunks with BM25 using candidate-set document frequencies."""
+        query_terms = set(_TOKEN.findall(query.lower()))
+        docs = [Counter(_TOKEN.findall(chunk.content.lower())) for chunk in chunks]
+        lengths = [sum(doc.values()) for doc in docs]
+        avg_length = (sum(lengths) / len(lengths)) or 1.0
+
+        n = len(docs)
+        idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term in query_terms
+            for df in [sum(1 for doc in docs if term in doc)]
+        }
+
+        scores = []
+        for doc, length in zip(docs, lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    score += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+
+class ONNXCrossEncoderReranker(BaseReranker):
+    """
+    Local cross-encoder (e.g. ms-marco-MiniLM) run with onnxruntime on CPU.
+
+    The model directory must contain `model.onnx` and `tokenizer.json`.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str, max_length: int = 512):
+        """
+        Initialize ONNX cross-encoder reranker.
+
+        Args:
+            model_dir: Directory with model.onnx and tokenizer.json
+            max_length: Maximum tokens per (query, chunk) pair
+
+        Raises:
+            ImportError: If onnxruntime or tokenizers is not installed
+            FileNotFoundError: If the model files are missing
+        """
+        if onnxruntime is None or Tokenizer is None:
+            raise ImportError("onnxruntime and tokenizers are required for the ONNX reranker")
+
+        model_path = Path(model_dir)
+        if not (model_path / "model.onnx").exists() or not (model_path / "tokenizer.json").exists():
+            raise FileNotFoundError(f"ONNX reranker model not found in: {model_dir}")
+
+        self.tokenizer = Tokenizer.from_file(str(model_path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            str(model_path / "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _score_sync(self, query: str, texts: list[str]) -> list[float]:
+        """Run the cross-encoder on (query, text) pairs."""
+        encodings = self.tokenizer.encode_batch([(query, text) for text in texts])
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(
+            None, {name: value for name, value in inputs.items() if name in self.input_names}
+        )[0]
+        return logits.reshape(len(texts), -1)[:, 0].tolist()
+
+    async def score(self, query: str, chunks: list[RetrievedChunk]) -> list[float]:
+        """Score chunks with the cross-encoder in a worker thread."""
+        return await asyncio.to_thread(
+            self._score_sync, query, [chunk.content for chunk in chunks]
+        )
+
+
+class LLMReranker(BaseReranker):
+    """LLM relevance scoring (one generation round trip per uncached call)."""
+
+    name = "llm"
+
+    async def score(self, query: str, chunks: list[RetrievedChunk]) -> list[float]:
+        """Ask the LLM for per-chunk relevance scores."""
+        llm = get_chat_model(temperature=0.0)  # Deterministic scoring
+
+        # Format chunks for LLM evaluation
+        chunks_text = "\n\n".join([
+            f"[Chunk {i}] (Page {c.page_number}, {c.source_file})\n{c.content[:300]}..."
+            for i, c in enumerate(chunks)
+        ])
+
+        prompt = ChatPromptTemplate.from_template(
+            """Given the user query and retrieved chunks, score each chunk's relevance to the query.
+
+Query: {query}
+
+Chunks:
+{chunks}
+
+Return the chunk indices (as shown in brackets) with relevance scores (0-1), sorted by score descending."""
+        )
+
+        # Chunk contents are part of the prompt, so no document-set scope is needed
+        decision: RerankDecision = await StructuredOutputCache.ainvoke_structured(
+            node="rerank_chunks",
+            llm=llm,
+            schema=RerankDecision,
+            messages=prompt.format_prompt(query=query, chunks=chunks_text).to_messages(),
+        )
+
+        # Unscored chunks rank after every scored one
+        scores = [-1.0] * len(chunks)
+        for item in decision.scores:
+            if item.chunk_index < len(chunks):
+                scores[item.chunk_index] = item.score
+        return scores
+
+
+@lru_cache(maxsize=1)
+def _get_onnx_reranker(model_dir: str) -> ONNXCrossEncoderReranker:
+    """Load the ONNX reranker once per process."""
+    return ONNXCrossEncoderReranker(model_dir=model_dir)
+
+
+def get_reranker(
+    chroma_manager: ChromaManager,
+    name: Optional[str] = None,
+) -> BaseReranker:
+    """
+    Build the configured reranker for a collection.
+
+    Falls back to BM25 if the ONNX model cannot be loaded.
+
+    Args:
+        chroma_manager: Collection manager (used for stored chunk vectors)
+        name: Reranker name (defaults to config)
+
+    Returns:
+        Reranker instance
+    """
+    name = name or settings.vectorstore.reranker
+
+    if name == "embedding":
+        return EmbeddingReranker(chroma_manager)
+    if name == "llm":
+        return LLMReranker()
+    if name == "onnx":
+        try:
+            return _get_onnx_reranker(settings.vectorstore.reranker_onnx_model_dir)
+        except (ImportError, FileNotFoundError) as e:
+            logger.warning(f"[RERANK] ONNX reranker unavailable, using BM25: {str(e)}")
+    return BM25Reranker()
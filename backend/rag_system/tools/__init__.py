@@ -3,9 +3,28 @@
 from rag_system.tools.pdf_processing import pdf_pages_to_images
 from rag_system.tools.multimodal_answer import generate_multimodal_answer
 from rag_system.tools.visual_detection import detect_visual_elements
+from rag_system.tools.query_classifier import classify_query_locally, depends_on_history
+from rag_system.tools.context_packer import (
+    PackedContext,
+    get_context_token_budget,
+    pack_context,
+)
+from rag_system.tools.vision_budget import (
+    VisionPlan,
+    estimate_image_tokens,
+    plan_vision_budget,
+)
 
 __all__ = [
     "pdf_pages_to_images",
     "generate_multimodal_answer",
     "detect_visual_elements",
+    "classify_query_locally",
+    "depends_on_history",
+    "PackedContext",
+    "get_context_token_budget",
+    "pack_context",
+    "VisionPlan",
+    "estimate_image_tokens",
+    "plan_vision_budget",
 ]
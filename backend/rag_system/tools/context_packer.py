@@ -0,0 +1,144 @@
+"""
+Token-budgeted context packing tool.
+
+This module deduplicates near-identical or overlapping retrieved chunks
+and packs the rest greedily, in relevance order, under a token budget
+for the answer prompt.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import settings
+from rag_system.utils.message_utils import count_text_tokens, truncate_to_tokens
+from schemas import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# Formatting overhead per chunk ("[Document i] (Source: ..., Page ...)" + separators)
+CHUNK_HEADER_TOKENS = 20
+
+
+@dataclass
+class PackedContext:
+    """Chunks selected for the prompt and what was dropped."""
+
+    chunks: list[RetrievedChunk] = field(default_factory=list)
+    tokens_used: int = 0
+    token_budget: int = 0
+    duplicates_dropped: int = 0
+    over_budget_dropped: int = 0
+
+
+def _shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    """Word n-gram shingles of a text."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _is_duplicate(
+    shingles: set[tuple[str, ...]],
+    kept: list[set[tuple[str, ...]]],
+    threshold: float,
+) -> bool:
+    """Check whether a chunk is mostly contained in (or contains) a kept chunk."""
+    if not shingles:
+        return False
+    for other in kept:
+        if not other:
+            continue
+        overlap = len(shingles & other)
+        # Containment covers both near-identical chunks and overlapping hi_res windows
+        if overlap / min(len(shingles), len(other)) >= threshold:
+            return True
+    return False
+
+
+def chunk_tokens(chunk: RetrievedChunk) -> int:
+    """Tokens a chunk takes in the prompt, using the count stored at ingest when present."""
+    tokens = chunk.token_count if chunk.token_count is not None else count_text_tokens(chunk.content)
+    return tokens + CHUNK_HEADER_TOKENS
+
+
+def get_context_token_budget(
+    model: Optional[str] = None,
+    history_tokens: int = 0,
+    image_tokens: int = 0,
+) -> int:
+    """
+    Get the context token budget for a model after reserving history and images.
+
+    Args:
+        model: LLM model name (defaults to config)
+        history_tokens: Tokens used by the conversation history in the prompt
+        image_tokens: Estimated vision tokens for attached page images
+
+    Returns:
+        Token budget for retrieved chunks
+    """
+    model = model or settings.llm.model
+    prompt_budget = settings.rag.prompt_token_budgets.get(model, settings.rag.prompt_token_budget)
+    budget = prompt_budget - settings.rag.prompt_reserved_tokens - history_tokens - image_tokens
+    return max(budget, settings.rag.min_context_tokens)
+
+
+def pack_context(
+    chunks: list[RetrievedChunk],
+    token_budget: int,
+    dedup_threshold: Optional[float] = None,
+) -> PackedContext:
+    """
+    Deduplicate and pack chunks (in relevance order) under a token budget.
+
+    Chunks that do not fit are skipped so smaller, lower-ranked chunks can
+    still use the remaining budget. If even the top chunk does not fit it
+    is truncated to the budget.
+
+    Args:
+        chunks: Retrieved chunks, most relevant first
+        token_budget: Maximum tokens for the packed chunks
+        dedup_threshold: Shingle containment ratio treated as duplicate (defaults to config)
+
+    Returns:
+        Packed context
+    """
+    dedup_threshold = dedup_threshold if dedup_threshold is not None else settings.rag.dedup_threshold
+    packed = PackedContext(token_budget=token_budget)
+    kept_shingles: list[set[tuple[str, ...]]] = []
+
+    for chunk in chunks:
+        shingles = _shingles(chunk.content or "")
+        if _is_duplicate(shingles, kept_shingles, dedup_threshold):
+            packed.duplicates_dropped += 1
+            continue
+
+        tokens = chunk_tokens(chunk)
+        if packed.tokens_used + tokens > token_budget:
+            packed.over_budget_dropped += 1
+            continue
+
+        packed.chunks.append(chunk)
+        packed.tokens_used += tokens
+        kept_shingles.append(shingles)
+
+    if not packed.chunks and chunks:
+        top = chunks[0]
+        content = truncate_to_tokens(top.content or "", token_budget - CHUNK_HEADER_TOKENS)
+        packed.chunks.append(top.model_copy(update={"content": content, "token_count": None}))
+        packed.tokens_used = count_text_tokens(content) + CHUNK_HEADER_TOKENS
+        packed.over_budget_dropped -= 1
+
+    if packed.duplicates_dropped or packed.over_budget_dropped:
+        logger.info(
+            f"[CONTEXT] Packed {len(packed.chunks)}/{len(chunks)} chunks "
+            f"({packed.tokens_used}/{token_budget} tokens, "
+            f"{packed.duplicates_dropped} duplicates, {packed.over_budget_dropped} over budget)"
+        )
+
+    return packed
@@ -6,10 +6,10 @@ using both text and image context via vision models.
 """
 
 from typing import Optional
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
 from config import settings
+from rag_system.core.llm_client import get_chat_model
 from rag_system.prompts import build_multimodal_prompt
 
 
@@ -19,6 +19,7 @@ async def generate_multimodal_answer(
     images: list[str],
     images_justification: str = "",
     history_context: str = "",
+    detail: Optional[str] = None,
     model: Optional[str] = None,
     temperature: Optional[float] = None,
     max_tokens: Optional[int] = None,
@@ -32,6 +33,7 @@ async def generate_multimodal_answer(
         images: List of base64-encoded images
         images_justification: Explanation of image selection
         history_context: Formatted conversation history
+        detail: Vision detail level (defaults to config)
         model: LLM model name (defaults to config)
         temperature: Temperature for generation (defaults to config)
         max_tokens: Maximum tokens (defaults to config)
@@ -57,14 +59,14 @@ async def generate_multimodal_answer(
             "type": "image_url",
             "image_url": {
                 "url": f"data:image/png;base64,{img_base64}",
-                "detail": settings.image.detail_level,
+                "detail": detail or settings.image.detail_level,
             },
         })
     
     # Use vision-capable model
-    vision_llm = ChatOpenAI(
-        model=model or settings.llm.model,
-        temperature=temperature or settings.llm.temperature,
+    vision_llm = get_chat_model(
+        model=model,
+        temperature=temperature,
         max_tokens=max_tokens or settings.llm.max_tokens,
     )
     
@@ -22,6 +22,7 @@ def pdf_pages_to_images(
     page_numbers: list[int],
     zoom: int | None = None,
     max_width: int | None = None,
+    grayscale: bool = False,
 ) -> list[str]:
     """
     Convert PDF pages to base64-encoded PNG images.
@@ -31,6 +32,7 @@ def pdf_pages_to_images(
         page_numbers: List of page indices (0-based) to convert
         zoom: Zoom factor for rendering (defaults to config)
         max_width: Maximum image width (defaults to config)
+        grayscale: Convert pages to grayscale before encoding
         
     Returns:
         List of base64-encoded PNG images
@@ -67,6 +69,9 @@ def pdf_pages_to_images(
                     new_height = int(img.height * ratio)
                     img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
                 
+                if grayscale:
+                    img = img.convert("L")
+                
                 # Convert to base64 PNG
                 buffer = io.BytesIO()
                 img.save(buffer, format="PNG", optimize=True)
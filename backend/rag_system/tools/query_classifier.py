@@ -0,0 +1,104 @@
+"""
+Local rule-based query classifier.
+
+This module provides a fast, LLM-free check for obviously
+single-intent queries so query analysis can skip the LLM call.
+Anything that might need decomposition is left to the LLM. It also
+flags follow-up queries whose meaning depends on the conversation.
+"""
+
+import re
+from typing import Optional
+
+from schemas import QueryAnalysisResult
+
+COMPARISON_CUES = (
+    "compare", "comparison", "versus", " vs ", " vs.", "differ", "difference",
+    "contrast", "better than", "worse than", "pros and cons", "similarit",
+    "relationship between", "trade-off", "tradeoff",
+)
+
+CONJUNCTION_CUES = (
+    " and ", " or ", " as well as ", " also ", " along with ", " plus ",
+    " then ", ";",
+)
+
+# Words and phrases that refer back to earlier turns
+HISTORY_REFERENCE_WORDS = frozenset({
+    "it", "its", "it's", "this", "that", "these", "those", "they", "them", "their",
+    "he", "she", "him", "her", "his", "hers", "former", "latter", "above",
+    "previous", "previously", "earlier", "again", "else", "elaborate", "continue",
+})
+HISTORY_REFERENCE_PHRASES = (
+    "more detail", "more about", "go on", "tell me more", "explain further",
+    "same thing", "last answer", "you said", "you say", "you mentioned", "the first one",
+    "the second one", "the other one",
+)
+
+INTERROGATIVES = ("what", "how", "why", "when", "where", "which", "who", "whom", "whose")
+
+_SENTENCE_SPLIT = re.compile(r"[.!?]+\s+")
+_WORD = re.compile(r"[a-z0-9'-]+")
+
+
+def classify_query_locally(query: str, max_words: int = 20) -> Optional[QueryAnalysisResult]:
+    """
+    Classify a query as simple without an LLM when the call is unambiguous.
+
+    A query is confidently simple when it is short, a single sentence with
+    at most one question, has at most one interrogative word, and has no
+    comparison or conjunction cues.
+
+    Args:
+        query: User query
+        max_words: Longest query (in words) the fast path will accept
+
+    Returns:
+        Simple QueryAnalysisResult, or None if the query is ambiguous
+    """
+    text = f" {query.strip().lower()} "
+    words = _WORD.findall(text)
+
+    if not words or len(words) > max_words:
+        return None
+    if text.count("?") > 1 or len(_SENTENCE_SPLIT.split(text.strip())) > 1:
+        return None
+    if any(cue in text for cue in COMPARISON_CUES):
+        return None
+    if any(cue in text for cue in CONJUNCTION_CUES) or "," in text:
+        return None
+    if sum(1 for word in words if word in INTERROGATIVES) > 1:
+        return None
+
+    return QueryAnalysisResult(
+        classification="simple",
+        reasoning="Local classifier: short single-intent query with no comparison or conjunction cues",
+        sub_queries=[],
+        is_comparison=False,
+        confidence=0.9,
+    )
+
+
+def depends_on_history(query: str, max_standalone_words: int = 2) -> bool:
+    """
+    Check whether a query likely refers back to earlier turns.
+
+    Follow-ups such as "explain that in more detail" or "what are its
+    limitations?" mean something different as the conversation moves on.
+    Very short queries ("why?") are treated as follow-ups too.
+
+    Args:
+        query: User query
+        max_standalone_words: Queries this short are assumed to be follow-ups
+
+    Returns:
+        True if the query's meaning may depend on the conversation history
+    """
+    text = f" {query.strip().lower()} "
+    words = _WORD.findall(text)
+
+    if len(words) <= max_standalone_words:
+        return True
+    if any(word in HISTORY_REFERENCE_WORDS for word in words):
+        return True
+    return any(phrase in text for phrase in HISTORY_REFERENCE_PHRASES)
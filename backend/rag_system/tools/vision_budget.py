@@ -0,0 +1,198 @@
+"""
+Vision token budget optimization tool.
+
+This module estimates vision token costs with the tile-based cost model
+and picks detail level, resolution, color mode and image count so that
+multimodal answers stay within a configurable token budget.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Iterable, Literal, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ContentType = Literal["table", "diagram", "figure", "text"]
+
+# Tile-based vision cost model (OpenAI GPT-4o family)
+LOW_DETAIL_TOKENS = 85
+HIGH_DETAIL_BASE_TOKENS = 85
+HIGH_DETAIL_TILE_TOKENS = 170
+TILE_SIZE = 512
+MAX_DIMENSION = 2048
+SHORT_SIDE_TARGET = 768
+
+# Resolutions tried (widest first) before falling back to low detail
+HIGH_DETAIL_WIDTH_LADDER = (1024, 768, 512)
+
+# Unstructured element categories hinting at the page content type
+TABLE_CATEGORIES = {"Table"}
+FIGURE_CATEGORIES = {"Image", "Figure", "FigureCaption"}
+
+
+@dataclass(frozen=True)
+class VisionProfile:
+    """Preferred rendering settings for a page content type."""
+
+    detail: Literal["low", "high"]
+    max_width: int
+    grayscale: bool
+
+
+CONTENT_PROFILES: dict[str, VisionProfile] = {
+    # Tables need legible cell text but no color
+    "table": VisionProfile(detail="high", max_width=1024, grayscale=True),
+    # Diagrams often encode meaning in color
+    "diagram": VisionProfile(detail="high", max_width=768, grayscale=False),
+    "figure": VisionProfile(detail="high", max_width=768, grayscale=False),
+    # Plain text pages are already covered by the retrieved chunks
+    "text": VisionProfile(detail="low", max_width=512, grayscale=True),
+}
+
+
+@dataclass
+class VisionPlan:
+    """Rendering and request plan chosen for one multimodal answer."""
+
+    content_type: str
+    detail: Literal["low", "high"]
+    max_width: int
+    grayscale: bool
+    max_images: int
+    estimated_tokens: int
+    baseline_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated tokens saved compared to the unoptimized request."""
+        return max(0, self.baseline_tokens - self.estimated_tokens)
+
+
+def estimate_image_tokens(width: int, height: int, detail: str) -> int:
+    """
+    Estimate vision tokens for a single image using the tile cost model.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        detail: Vision detail level ('low', 'high' or 'auto')
+
+    Returns:
+        Estimated number of input tokens for the image
+    """
+    if detail == "low":
+        return LOW_DETAIL_TOKENS
+
+    # Fit within MAX_DIMENSION x MAX_DIMENSION
+    scale = min(1.0, MAX_DIMENSION / max(width, height))
+    width, height = width * scale, height * scale
+
+    # Scale down so the shortest side is SHORT_SIDE_TARGET
+    shortest = min(width, height)
+    if shortest > SHORT_SIDE_TARGET:
+        scale = SHORT_SIDE_TARGET / shortest
+        width, height = width * scale, height * scale
+
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return HIGH_DETAIL_BASE_TOKENS + HIGH_DETAIL_TILE_TOKENS * tiles
+
+
+def _page_tokens(max_width: int, detail: str, aspect_ratio: float) -> int:
+    """Estimate tokens for one rendered page at the given width."""
+    return estimate_image_tokens(max_width, int(max_width * aspect_ratio), detail)
+
+
+def infer_content_type(
+    visual_type: Optional[str],
+    categories: Iterable[Optional[str]],
+) -> ContentType:
+    """
+    Infer the visual content type of the selected pages.
+
+    Args:
+        visual_type: Visual type requested by the visual decision agent
+        categories: Unstructured categories of chunks on the selected pages
+
+    Returns:
+        Content type used to pick a vision profile
+    """
+    if visual_type in ("table", "diagram", "figure"):
+        return visual_type
+
+    category_set = {c for c in categories if c}
+    if category_set & TABLE_CATEGORIES:
+        return "table"
+    if category_set & FIGURE_CATEGORIES:
+        return "figure"
+    return "text"
+
+
+def plan_vision_budget(
+    num_images: int,
+    content_type: str,
+    token_budget: int | None = None,
+    aspect_ratio: float | None = None,
+) -> VisionPlan:
+    """
+    Pick detail level, resolution, color mode and image count for a request.
+
+    Starts from the profile of the content type and degrades resolution,
+    then detail level, then image count until the estimate fits the budget.
+
+    Args:
+        num_images: Number of page images requested
+        content_type: Page content type ('table', 'diagram', 'figure', 'text')
+        token_budget: Vision token budget per request (defaults to config)
+        aspect_ratio: Assumed page height / width ratio (defaults to config)
+
+    Returns:
+        VisionPlan with the chosen settings and token estimates
+    """
+    token_budget = token_budget or settings.image.token_budget
+    aspect_ratio = aspect_ratio or settings.image.page_aspect_ratio
+    num_images = max(1, num_images)
+
+    baseline_per_image = _page_tokens(
+        settings.image.max_width, settings.image.detail_level, aspect_ratio
+    )
+    baseline_tokens = baseline_per_image * num_images
+
+    profile = CONTENT_PROFILES.get(content_type, CONTENT_PROFILES["text"])
+    detail = profile.detail
+    max_width = min(profile.max_width, settings.image.max_width)
+    count = num_images
+
+    def total() -> int:
+        return _page_tokens(max_width, detail, aspect_ratio) * count
+
+    widths = [w for w in HIGH_DETAIL_WIDTH_LADDER if w < max_width]
+    while total() > token_budget:
+        if detail == "high" and widths:
+            max_width = widths.pop(0)
+        elif detail == "high":
+            detail = "low"
+        elif count > 1:
+            count -= 1
+        else:
+            break
+
+    plan = VisionPlan(
+        content_type=content_type,
+        detail=detail,
+        max_width=max_width,
+        grayscale=profile.grayscale,
+        max_images=count,
+        estimated_tokens=total(),
+        baseline_tokens=baseline_tokens,
+    )
+
+    logger.info(
+        f"[VISION_BUDGET] content={content_type} detail={plan.detail} width={plan.max_width} "
+        f"grayscale={plan.grayscale} images={plan.max_images}/{num_images} "
+        f"tokens~{plan.estimated_tokens} (saved ~{plan.tokens_saved} of {baseline_tokens})"
+    )
+
+    return plan
@@ -1,21 +1,54 @@
 """Utility modules for the RAG system."""
 
 from rag_system.utils.message_utils import (
+    HISTORY_SUMMARY_ID,
     get_trimmed_messages,
     format_history_for_prompt,
     get_history_summary,
+    estimate_history_tokens,
+    is_history_summary,
+    build_history_context,
+    get_history_context,
+    count_text_tokens,
+    truncate_to_tokens,
 )
 from rag_system.utils.checkpoint_utils import (
     LightweightCheckpointSerializer,
     create_lightweight_checkpointer,
 )
+from rag_system.utils.checkpointer import MotorCheckpointSaver
 from rag_system.utils.state_utils import estimate_state_size
+from rag_system.utils.deadline import RunDeadline, deadline_fallback_answer
+from rag_system.utils.run_config import (
+    build_run_config,
+    get_collection_name,
+    get_deadline,
+    get_document_scope,
+    get_session_id,
+    get_speculative_search_ids,
+)
 
 __all__ = [
     "get_trimmed_messages",
     "format_history_for_prompt",
     "get_history_summary",
+    "HISTORY_SUMMARY_ID",
+    "estimate_history_tokens",
+    "is_history_summary",
+    "build_history_context",
+    "get_history_context",
+    "count_text_tokens",
+    "truncate_to_tokens",
     "LightweightCheckpointSerializer",
     "create_lightweight_checkpointer",
+    "MotorCheckpointSaver",
     "estimate_state_size",
+    "RunDeadline",
+    "deadline_fallback_answer",
+    "build_run_config",
+    "get_collection_name",
+    "get_deadline",
+    "get_document_scope",
+    "get_session_id",
+    "get_speculative_search_ids",
 ]
@@ -6,43 +6,59 @@ to reduce storage requirements in MongoDB.
 """
 
 import logging
-from typing import Any, Callable
+import time
+from typing import Any, Callable, Optional
 
 from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
+from config import settings
+from schemas import AnswerWithCitations
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
 logger = logging.getLogger(__name__)
 
+ZSTD_MSGPACK_TYPE = "msgpack+zstd"
+
+# Citations kept on the checkpointed final_answer
+MAX_CHECKPOINT_CITATIONS = 3
+
 TRANSIENT_FIELDS = {
     "retrieved_context",
     "sub_query_results",
+    "sub_query_contexts",
     "web_results",
+    "speculative_search_id",
     "visual_decision",
     "query_analysis",
     "intermediate_reasoning",
+    "history_context",
 }
 
 
 def _minimize_final_answer(value: Any) -> Any:
-    """Keep only essential audit fields from final_answer."""
+    """
+    Keep only essential audit fields from final_answer.
+    
+    The result stays an AnswerWithCitations (with the first few
+    citations) so the state channel keeps its declared type on load.
+    """
     if value is None:
         return None
-    if hasattr(value, 'model_dump'):
-        data = value.model_dump()
+    if isinstance(value, AnswerWithCitations):
+        answer = value
     elif isinstance(value, dict):
-        data = value
+        try:
+            answer = AnswerWithCitations.model_validate(value)
+        except ValueError:
+            return None
     else:
         return value
     
-    return {
-        "answer": data.get("answer", ""),
-        "answer_type": data.get("answer_type", "direct"),
-        "uncertainty": data.get("uncertainty", 0.0),
-        "citations_count": len(data.get("citations", [])),
-        "citations_summary": [
-            {"source": c.get("source_id", ""), "page": c.get("page_number")}
-            for c in data.get("citations", [])[:3]
-        ]
-    }
+    return answer.model_copy(update={"citations": answer.citations[:MAX_CHECKPOINT_CITATIONS]})
 
 
 MINIMAL_FIELDS: dict[str, Callable[[Any], Any]] = {
@@ -51,13 +67,106 @@ MINIMAL_FIELDS: dict[str, Callable[[Any], Any]] = {
 
 
 class LightweightCheckpointSerializer(JsonPlusSerializer):
-    """Excludes large transient fields from MongoDB checkpoints."""
+    """
+    Excludes large transient fields from MongoDB checkpoints.
+    
+    In "msgpack" mode checkpoints are written as msgpack and zstd-compressed
+    above a size threshold, and sizes come from the encoded buffers. Pending
+    writes are small and short-lived, so they are never compressed. The
+    "jsonplus" mode keeps the original JSON-based size estimates.
+    """
+    
+    _stats: dict[str, float] = {
+        "checkpoints": 0,
+        "raw_bytes": 0,
+        "stored_bytes": 0,
+        "encode_ms": 0.0,
+    }
+    
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize the serializer.
+        
+        Args:
+            mode: "msgpack" or "jsonplus" (defaults to config)
+            compression: "zstd" or "none" (defaults to config)
+            compression_level: zstd compression level (defaults to config)
+            **kwargs: Extra JsonPlusSerializer arguments
+        """
+        super().__init__(**kwargs)
+        serde_settings = settings.checkpoint_serde
+        
+        self.mode = mode or serde_settings.mode
+        self.compression = compression or serde_settings.compression
+        self.compression_level = compression_level or serde_settings.compression_level
+        self.min_compress_bytes = serde_settings.min_compress_bytes
+        
+        if self.compression == "zstd" and zstandard is None:
+            logger.warning("[CHECKPOINT] zstandard not installed, writing uncompressed checkpoints")
+            self.compression = "none"
+        
+        # Reused across calls: zstandard.compress() builds a new context each time
+        if self.compression == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        if zstandard is not None:
+            self._decompressor = zstandard.ZstdDecompressor()
     
     def dumps(self, obj: Any) -> bytes:
         if isinstance(obj, dict):
             obj = self._filter_state(obj)
         return super().dumps(obj)
     
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        # Savers serialize checkpoints through dumps_typed, not dumps
+        is_checkpoint = isinstance(obj, dict) and "channel_values" in obj
+        if is_checkpoint:
+            start_time = time.perf_counter()
+            obj = self._filter_state(obj)
+        
+        type_, data = super().dumps_typed(obj)
+        raw_size = len(data)
+        
+        if (
+            is_checkpoint
+            and self.mode == "msgpack"
+            and self.compression == "zstd"
+            and type_ == "msgpack"
+            and raw_size >= self.min_compress_bytes
+        ):
+            type_, data = ZSTD_MSGPACK_TYPE, self._compressor.compress(data)
+        
+        if is_checkpoint:
+            stats = LightweightCheckpointSerializer._stats
+            stats["checkpoints"] += 1
+            stats["raw_bytes"] += raw_size
+            stats["stored_bytes"] += len(data)
+            stats["encode_ms"] += (time.perf_counter() - start_time) * 1000
+            logger.debug(f"[CHECKPOINT] Encoded {raw_size} bytes, stored {len(data)} bytes ({type_})")
+        
+        return type_, data
+    
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, data_ = data
+        if type_ == ZSTD_MSGPACK_TYPE:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read compressed checkpoints")
+            return super().loads_typed(("msgpack", self._decompressor.decompress(data_)))
+        return super().loads_typed(data)
+    
+    @classmethod
+    def get_stats(cls) -> dict[str, float]:
+        """Get cumulative checkpoint encoding statistics."""
+        stats = dict(cls._stats)
+        if stats["raw_bytes"]:
+            stats["compression_ratio"] = round(stats["stored_bytes"] / stats["raw_bytes"], 3)
+        return stats
+    
     def _filter_state(self, data: dict) -> dict:
         filtered = {}
         for key, value in data.items():
@@ -78,7 +187,7 @@ class LightweightCheckpointSerializer(JsonPlusSerializer):
         
         for key, value in channel_values.items():
             if key in TRANSIENT_FIELDS:
-                if value is not None:
+                if value is not None and self.mode == "jsonplus":
                     size = self._estimate_size(value)
                     bytes_saved += size
                     logger.debug(f"[CHECKPOINT] Excluding {key} ({size} bytes)")
@@ -118,7 +227,6 @@ def create_lightweight_checkpointer():
         Configured MongoDBSaver context manager
     """
     from langgraph.checkpoint.mongodb import MongoDBSaver
-    from config import settings
     
     serde = LightweightCheckpointSerializer()
     
@@ -0,0 +1,339 @@
+"""
+Async MongoDB checkpointer backed by the shared Motor client.
+
+This module provides a LangGraph checkpoint saver that reuses the pooled
+Motor connection from `db.mongo.MongoDB`, so checkpoint reads and writes
+never block the event loop or open per-request clients. Documents use the
+same layout as `langgraph.checkpoint.mongodb.MongoDBSaver`, so existing
+checkpoints remain readable. A per-thread counter of stored checkpoints is
+kept alongside, so retention can find threads due for compaction without
+scanning the checkpoints collection. Checkpoints and writes are tagged
+with the workflow run that wrote them, so a cancelled run can be rolled
+back without relying on older checkpoints still being there.
+"""
+
+import logging
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.mongodb.utils import dumps_metadata, loads_metadata
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from config import settings
+from rag_system.utils.checkpoint_utils import LightweightCheckpointSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class MotorCheckpointSaver(BaseCheckpointSaver):
+    """
+    Async-only checkpoint saver using a shared Motor database.
+
+    Sync methods (get_tuple, put, ...) are not supported; the workflow
+    is always run with ainvoke/astream.
+    """
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        checkpoint_collection_name: Optional[str] = None,
+        writes_collection_name: Optional[str] = None,
+        threads_collection_name: Optional[str] = None,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            database: Motor database from the shared client
+            checkpoint_collection_name: Checkpoints collection (defaults to config)
+            writes_collection_name: Pending writes collection (defaults to config)
+            threads_collection_name: Per-thread checkpoint counters (defaults to config)
+            serde: Serializer (defaults to LightweightCheckpointSerializer)
+        """
+        super().__init__(serde=serde or LightweightCheckpointSerializer())
+        self.checkpoint_collection = database[
+            checkpoint_collection_name or settings.mongodb.checkpoints_collection
+        ]
+        self.writes_collection = database[
+            writes_collection_name or settings.mongodb.checkpoint_writes_collection
+        ]
+        self.threads_collection = database[
+            threads_collection_name or settings.mongodb.checkpoint_threads_collection
+        ]
+
+    async def _load_pending_writes(self, config_values: dict) -> list[tuple[str, str, Any]]:
+        """Load pending writes for a checkpoint."""
+        cursor = self.writes_collection.find(
+            config_values,
+            sort=[("task_id", 1), ("idx", 1)],
+        )
+        return [
+            (
+                write["task_id"],
+                write["channel"],
+                self.serde.loads_typed((write["type"], write["value"])),
+            )
+            async for write in cursor
+        ]
+
+    async def _to_tuple(self, doc: dict) -> CheckpointTuple:
+        """Convert a checkpoint document to a CheckpointTuple."""
+        config_values = {
+            "thread_id": doc["thread_id"],
+            "checkpoint_ns": doc["checkpoint_ns"],
+            "checkpoint_id": doc["checkpoint_id"],
+        }
+        parent_config = None
+        if doc.get("parent_checkpoint_id"):
+            parent_config = {
+                "configurable": {
+                    "thread_id": doc["thread_id"],
+                    "checkpoint_ns": doc["checkpoint_ns"],
+                    "checkpoint_id": doc["parent_checkpoint_id"],
+                }
+            }
+
+        return CheckpointTuple(
+            config={"configurable": config_values},
+            checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            metadata=loads_metadata(self.serde, doc["metadata"]),
+            parent_config=parent_config,
+            pending_writes=await self._load_pending_writes(config_values),
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Get a checkpoint tuple.
+
+        Args:
+            config: Run config with thread ID and optional checkpoint ID
+
+        Returns:
+            Matching (or latest) checkpoint tuple, or None
+        """
+        query = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+
+        doc = await self.checkpoint_collection.find_one(
+            query, sort=[("checkpoint_id", -1)]
+        )
+        if doc is None:
+            return None
+
+        return await self._to_tuple(doc)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """
+        List checkpoints, newest first.
+
+        Args:
+            config: Run config to filter by thread/namespace
+            filter: Metadata filter
+            before: Only return checkpoints before this one
+            limit: Maximum number of checkpoints
+
+        Yields:
+            Checkpoint tuples
+        """
+        query: dict[str, Any] = {}
+        if config is not None:
+            configurable = config["configurable"]
+            if "thread_id" in configurable:
+                query["thread_id"] = configurable["thread_id"]
+            if "checkpoint_ns" in configurable:
+                query["checkpoint_ns"] = configurable["checkpoint_ns"]
+
+        if filter:
+            for key, value in filter.items():
+                query[f"metadata.{key}"] = dumps_metadata(self.serde, value)
+
+        if before is not None:
+            query["checkpoint_id"] = {"$lt": before["configurable"]["checkpoint_id"]}
+
+        cursor = self.checkpoint_collection.find(
+            query,
+            sort=[("checkpoint_id", -1)],
+            limit=limit or 0,
+        )
+        async for doc in cursor:
+            yield await self._to_tuple(doc)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Save a checkpoint.
+
+        Args:
+            config: Run config of the parent checkpoint
+            checkpoint: Checkpoint to save
+            metadata: Checkpoint metadata
+            new_versions: New channel versions as of this write
+
+        Returns:
+            Run config pointing at the saved checkpoint
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoint_id = checkpoint["id"]
+
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata = {**metadata, **config.get("metadata", {})}
+
+        result = await self.checkpoint_collection.update_one(
+            {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            },
+            {
+                "$set": {
+                    "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                    "type": type_,
+                    "checkpoint": serialized_checkpoint,
+                    "metadata": dumps_metadata(self.serde, metadata),
+                    "run_id": config["configurable"].get("run_id"),
+                }
+            },
+            upsert=True,
+        )
+        if result.upserted_id is not None:
+            await self.threads_collection.update_one(
+                {"_id": thread_id},
+                {
+                    "$inc": {"checkpoint_count": 1},
+                    "$set": {"updated_at": datetime.now(timezone.utc)},
+                },
+                upsert=True,
+            )
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """
+        Store intermediate writes linked to a checkpoint.
+
+        Args:
+            config: Run config of the related checkpoint
+            writes: (channel, value) pairs to store
+            task_id: ID of the task creating the writes
+            task_path: Path of the task creating the writes
+        """
+        if not writes:
+            return
+
+        configurable = config["configurable"]
+        # Only special channels (errors, interrupts) may overwrite existing writes
+        set_method = (
+            "$set" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "$setOnInsert"
+        )
+
+        operations = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized_value = self.serde.dumps_typed(value)
+            operations.append(
+                UpdateOne(
+                    filter={
+                        "thread_id": configurable["thread_id"],
+                        "checkpoint_ns": configurable["checkpoint_ns"],
+                        "checkpoint_id": configurable["checkpoint_id"],
+                        "task_id": task_id,
+                        "task_path": task_path,
+                        "idx": WRITES_IDX_MAP.get(channel, idx),
+                    },
+                    update={
+                        set_method: {
+                            "channel": channel,
+                            "type": type_,
+                            "value": serialized_value,
+                            "run_id": configurable.get("run_id"),
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+
+        await self.writes_collection.bulk_write(operations, ordered=False)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """
+        Delete all checkpoints and writes for a thread.
+
+        Args:
+            thread_id: Thread (session) ID
+        """
+        await self.checkpoint_collection.delete_many({"thread_id": thread_id})
+        await self.writes_collection.delete_many({"thread_id": thread_id})
+        await self.threads_collection.delete_one({"_id": thread_id})
+        logger.info(f"[CHECKPOINT] Deleted checkpoints for thread {thread_id}")
+
+    async def adelete_run(self, thread_id: str, run_id: str) -> int:
+        """
+        Delete the checkpoints and writes a workflow run wrote to a thread.
+
+        Only documents tagged with the run are removed, so the rollback
+        holds even if retention compacted the thread's older checkpoints
+        while the run was in flight.
+
+        Args:
+            thread_id: Thread (session) ID
+            run_id: Run ID from the run config
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        query = {"thread_id": thread_id, "run_id": run_id}
+
+        result = await self.checkpoint_collection.delete_many(query)
+        await self.writes_collection.delete_many(query)
+        if result.deleted_count:
+            await self.threads_collection.update_one(
+                {"_id": thread_id},
+                {"$inc": {"checkpoint_count": -result.deleted_count}},
+            )
+        logger.info(
+            f"[CHECKPOINT] Rolled back run {run_id} of thread {thread_id} "
+            f"({result.deleted_count} checkpoints deleted)"
+        )
+        return result.deleted_count
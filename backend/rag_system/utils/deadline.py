@@ -0,0 +1,137 @@
+"""
+Per-run latency budget for the RAG workflow.
+
+A RunDeadline travels in the run config so every node can check how
+much time is left and skip optional work (reranking, page images, web
+fallback, synthesis) instead of overrunning the budget. The steps that
+were skipped are recorded and returned with the response.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Optional
+
+from config import settings
+from schemas import AnswerWithCitations
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_FALLBACK_MESSAGE = (
+    "I couldn't find enough relevant information to answer within the time limit. "
+    "Please try again or rephrase your question."
+)
+
+
+class RunDeadline:
+    """Latency budget of one workflow run and the degradations taken to meet it."""
+
+    _stats: Counter = Counter()
+
+    def __init__(self, budget_ms: Optional[int] = None):
+        """
+        Initialize a run deadline.
+
+        Args:
+            budget_ms: Latency budget in milliseconds (None for no deadline)
+        """
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000 if budget_ms else None
+        self.degradations: list[str] = []
+
+    @classmethod
+    def from_request(cls, deadline_ms: Optional[int] = None) -> "RunDeadline":
+        """
+        Build the deadline for a query request.
+
+        Args:
+            deadline_ms: Budget requested by the client (defaults to config)
+
+        Returns:
+            RunDeadline (unbounded if deadlines are disabled)
+        """
+        if not settings.deadline.enabled:
+            return cls()
+        budget_ms = min(deadline_ms or settings.deadline.default_ms, settings.deadline.max_ms)
+        return cls(budget_ms)
+
+    def remaining_ms(self) -> Optional[float]:
+        """Milliseconds left before the deadline (None if unbounded)."""
+        if self.expires_at is None:
+            return None
+        return (self.expires_at - time.monotonic()) * 1000
+
+    def has_budget(self, min_ms: int) -> bool:
+        """
+        Check whether at least `min_ms` of the budget is left.
+
+        Args:
+            min_ms: Budget the next step needs
+
+        Returns:
+            True if unbounded or enough time remains
+        """
+        remaining = self.remaining_ms()
+        return remaining is None or remaining >= min_ms
+
+    def degrade(self, degradation: str) -> None:
+        """
+        Record a step skipped to meet the deadline.
+
+        Args:
+            degradation: Degradation name (e.g. "skipped_rerank")
+        """
+        if degradation in self.degradations:
+            return
+        self.degradations.append(degradation)
+        self._stats[degradation] += 1
+        logger.info(f"[DEADLINE] {degradation} ({self.remaining_ms():.0f}ms left)")
+
+    def timeout(self, min_ms: int = 0) -> asyncio.Timeout:
+        """
+        Async context manager that cancels work at the deadline.
+
+        Args:
+            min_ms: Time the wrapped work always gets, even past the deadline
+
+        Returns:
+            asyncio.Timeout (never fires if unbounded)
+        """
+        remaining = self.remaining_ms()
+        if remaining is None:
+            return asyncio.timeout(None)
+        return asyncio.timeout(max(remaining, min_ms) / 1000)
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get degradation counters.
+
+        Returns:
+            Metrics dictionary
+        """
+        return {
+            "enabled": settings.deadline.enabled,
+            "default_ms": settings.deadline.default_ms,
+            "degradations": dict(cls._stats),
+        }
+
+
+def deadline_fallback_answer(best_answer: Optional[AnswerWithCitations] = None) -> AnswerWithCitations:
+    """
+    Answer for a run whose remaining steps were cut by its deadline.
+
+    Args:
+        best_answer: Best answer produced earlier in the same run, if any
+
+    Returns:
+        The best answer marked partial, or an unable_to_answer notice
+    """
+    if best_answer is not None and best_answer.answer_type != "unable_to_answer":
+        return best_answer.model_copy(update={"answer_type": "partial"})
+    return AnswerWithCitations(
+        answer=DEADLINE_FALLBACK_MESSAGE,
+        answer_type="unable_to_answer",
+        uncertainty=1.0,
+    )
@@ -6,8 +6,9 @@ to prevent unbounded token growth while maintaining context quality.
 """
 
 import logging
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Sequence
+from typing import Any, Mapping, Sequence
 
 import tiktoken
 from langchain_core.messages import (
@@ -23,6 +24,13 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Fixed ID of the running conversation summary message
+HISTORY_SUMMARY_ID = "history_summary"
+
+# Token counts per (message id, content hash); messages are immutable once checkpointed
+_TOKEN_CACHE: OrderedDict[tuple[str, int], int] = OrderedDict()
+_TOKEN_CACHE_SIZE = 4096
+
 
 @lru_cache(maxsize=1)
 def _get_encoding(model: str):
@@ -34,21 +42,36 @@ def _get_encoding(model: str):
         return tiktoken.get_encoding("cl100k_base")
 
 
-def _estimate_tokens(messages: list[BaseMessage]) -> int:
-    """Count tokens for messages using tiktoken."""
+def _count_message_tokens(message: BaseMessage) -> int:
+    """Count tokens for a single message, cached by message ID."""
+    content = str(message.content)
+    key = (message.id, hash(content)) if message.id else None
+    
+    if key is not None and key in _TOKEN_CACHE:
+        _TOKEN_CACHE.move_to_end(key)
+        return _TOKEN_CACHE[key]
+    
     # Get cached encoding (fast after first call)
     encoding = _get_encoding(settings.llm.model)
     
+    # Add overhead for message formatting
+    # OpenAI's format uses ~4 tokens per message for role, separators, etc.
+    tokens = len(encoding.encode(content)) + 4
+    
+    if key is not None:
+        _TOKEN_CACHE[key] = tokens
+        if len(_TOKEN_CACHE) > _TOKEN_CACHE_SIZE:
+            _TOKEN_CACHE.popitem(last=False)
+    
+    return tokens
+
+
+def _estimate_tokens(messages: list[BaseMessage]) -> int:
+    """Count tokens for messages using tiktoken."""
     total_tokens = 0
     
     for message in messages:
-        # Count tokens in message content
-        content = str(message.content)
-        total_tokens += len(encoding.encode(content))
-        
-        # Add overhead for message formatting
-        # OpenAI's format uses ~4 tokens per message for role, separators, etc.
-        total_tokens += 4
+        total_tokens += _count_message_tokens(message)
     
     # Add final overhead
     total_tokens += 2
@@ -56,6 +79,42 @@ def _estimate_tokens(messages: list[BaseMessage]) -> int:
     return total_tokens
 
 
+def count_text_tokens(text: str) -> int:
+    """Count tokens in a text with the configured model's encoding."""
+    if not text:
+        return 0
+    return len(_get_encoding(settings.llm.model).encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate a text to at most max_tokens tokens."""
+    encoding = _get_encoding(settings.llm.model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max(max_tokens, 0)])
+
+
+def is_history_summary(message: BaseMessage) -> bool:
+    """Check whether a message is the running conversation summary."""
+    return isinstance(message, SystemMessage) and message.id == HISTORY_SUMMARY_ID
+
+
+def estimate_history_tokens(messages: Sequence[AnyMessage]) -> int:
+    """
+    Estimate the token size of a conversation history.
+    
+    Args:
+        messages: Sequence of messages
+        
+    Returns:
+        Estimated token count
+    """
+    if not messages:
+        return 0
+    return _estimate_tokens(list(messages))
+
+
 def get_trimmed_messages(
     messages: Sequence[AnyMessage],
     max_messages: int | None = None,
@@ -157,6 +216,10 @@ def format_history_for_prompt(
     lines = ["Recent conversation history:"]
     
     for msg in recent:
+        if is_history_summary(msg):
+            lines.append(f"- Summary of earlier conversation: {msg.content}")
+            continue
+        
         if isinstance(msg, HumanMessage):
             role = "User"
         elif isinstance(msg, AIMessage):
@@ -199,3 +262,35 @@ def get_history_summary(messages: Sequence[AnyMessage]) -> dict:
         "system": system_count,
         "estimated_tokens": _estimate_tokens(list(messages)),
     }
+
+
+def build_history_context(messages: Sequence[AnyMessage]) -> str:
+    """
+    Trim and format conversation history for prompts.
+    
+    Args:
+        messages: Full conversation history including the current query
+        
+    Returns:
+        Formatted history string
+    """
+    return format_history_for_prompt(get_trimmed_messages(messages))
+
+
+def get_history_context(state: Mapping[str, Any]) -> str:
+    """
+    Get the formatted history for the current run.
+    
+    Uses the value computed once by the add_user_message node and
+    falls back to computing it from the state's messages.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Formatted history string
+    """
+    history_context = state.get("history_context")
+    if history_context is None:
+        history_context = build_history_context(list(state.get("messages", [])))
+    return history_context
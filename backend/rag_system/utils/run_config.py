@@ -0,0 +1,139 @@
+"""
+Run configuration helpers for the compiled RAG workflow.
+
+The workflow graph is compiled once per process, so session- and
+collection-specific dependencies are resolved from the run config
+(`configurable`) at node execution time.
+"""
+
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from config import settings
+from rag_system.utils.deadline import RunDeadline
+
+
+def get_configurable(config: Optional[RunnableConfig]) -> dict[str, Any]:
+    """Get the `configurable` section of a run config."""
+    if not config:
+        return {}
+    return config.get("configurable") or {}
+
+
+def get_session_id(config: Optional[RunnableConfig]) -> str:
+    """
+    Get the session ID for the current run.
+
+    Args:
+        config: Run config passed to the node
+
+    Returns:
+        Session ID (the checkpoint thread ID)
+
+    Raises:
+        ValueError: If the run config has no thread ID
+    """
+    session_id = get_configurable(config).get("thread_id")
+    if not session_id:
+        raise ValueError("Run config is missing configurable.thread_id")
+    return session_id
+
+
+def get_collection_name(config: Optional[RunnableConfig]) -> str:
+    """
+    Get the vector store collection name for the current run.
+
+    Defaults to the session ID, which is the collection name used at ingest.
+
+    Args:
+        config: Run config passed to the node
+
+    Returns:
+        ChromaDB collection name
+    """
+    return get_configurable(config).get("collection_name") or get_session_id(config)
+
+
+def get_document_scope(config: Optional[RunnableConfig]) -> Optional[str]:
+    """
+    Get the cache scope for the run's document set.
+
+    Changes whenever documents are added to or removed from the session,
+    so cached results that depend on the documents are invalidated.
+
+    Args:
+        config: Run config passed to the node
+
+    Returns:
+        "<collection>:v<document_set_version>", or None without a run config
+    """
+    if not get_configurable(config).get("thread_id"):
+        return None
+    version = get_configurable(config).get("document_set_version", 0)
+    return f"{get_collection_name(config)}:v{version}"
+
+
+def get_deadline(config: Optional[RunnableConfig]) -> RunDeadline:
+    """
+    Get the latency budget for the current run.
+
+    Args:
+        config: Run config passed to the node
+
+    Returns:
+        RunDeadline (unbounded if the run has none)
+    """
+    return get_configurable(config).get("deadline") or RunDeadline()
+
+
+def get_speculative_search_ids(config: Optional[RunnableConfig]) -> set[str]:
+    """
+    Get the IDs of speculative web searches started by the current run.
+
+    The workflow discards any still unclaimed when the run ends, so
+    cancelled or failed runs don't leave searches running.
+
+    Args:
+        config: Run config passed to the node
+
+    Returns:
+        Mutable set shared by all nodes of the run (empty set without a run config)
+    """
+    return get_configurable(config).get("speculative_search_ids", set())
+
+
+def build_run_config(
+    session_id: str,
+    collection_name: Optional[str] = None,
+    document_set_version: int = 0,
+    deadline: Optional[RunDeadline] = None,
+    **configurable: Any,
+) -> RunnableConfig:
+    """
+    Build the run config for a workflow invocation.
+
+    Args:
+        session_id: Session identifier (used as checkpoint thread ID)
+        collection_name: ChromaDB collection name (defaults to session ID)
+        document_set_version: Session document-set version (cache invalidation)
+        deadline: Latency budget shared by all nodes of the run
+        **configurable: Extra values made available to nodes
+
+    Returns:
+        RunnableConfig for ainvoke/astream
+    """
+    return {
+        "configurable": {
+            "thread_id": session_id,
+            "collection_name": collection_name or session_id,
+            "document_set_version": document_set_version,
+            "deadline": deadline or RunDeadline(),
+            "speculative_search_ids": set(),
+            **configurable,
+        },
+        "metadata": {"session_id": session_id},
+        "run_name": "RAG_Workflow",
+        # Caps parallel branches (e.g. complex-query sub-queries) per step
+        "max_concurrency": settings.query_analyzer.max_parallel_sub_queries,
+    }
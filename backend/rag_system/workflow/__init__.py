@@ -1,5 +1,5 @@
 """Workflow orchestration for the RAG system."""
 
-from rag_system.workflow.graph import RAGWorkflow
+from rag_system.workflow.graph import RAGWorkflow, get_rag_workflow, init_rag_workflow
 
-__all__ = ["RAGWorkflow"]
+__all__ = ["RAGWorkflow", "get_rag_workflow", "init_rag_workflow"]
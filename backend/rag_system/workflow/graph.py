@@ -6,16 +6,20 @@ all agents, retrievers, and routing logic.
 """
 
 import logging
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Optional
+from uuid import uuid4
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 from config import settings
-from schemas import GraphState
+from schemas import AnswerWithCitations, GraphState
 from rag_system.agents import (
     VisualDecisionAgent,
     RAGAnswerAgent,
@@ -26,21 +30,26 @@ from rag_system.agents import (
     SubQueryProcessorAgent,
     SubQueryCollectorAgent,
     AnswerSynthesisAgent,
+    HistoryCompactionAgent,
 )
-from rag_system.retrievers import DocumentRetriever, ImageRetriever
+from rag_system.retrievers import ImageRetriever
 from rag_system.workflow.nodes import (
     create_rag_retrieve_node,
+    create_batch_retrieve_node,
     create_retrieve_images_node,
     create_add_user_message_node,
+    create_deadline_fallback_node,
 )
 from rag_system.workflow.routes import (
+    retrieval_route,
     visual_route,
-    query_analysis_route,
-    sub_query_loop_route,
-    quality_or_collect_route,
-    web_answer_route,
+    quality_check_route,
+    sub_query_fan_out_route,
+    query_analysis_fan_out_route,
 )
-from rag_system.utils import LightweightCheckpointSerializer
+from rag_system.utils.checkpointer import MotorCheckpointSaver
+from rag_system.utils.deadline import RunDeadline
+from rag_system.utils.run_config import build_run_config, get_speculative_search_ids
 
 logger = logging.getLogger(__name__)
 
@@ -51,49 +60,75 @@ class RAGWorkflow:
     
     This class orchestrates the entire RAG pipeline including query analysis,
     document retrieval, answer generation, and quality checking.
+    
+    The graph is built and compiled once; sessions are isolated by the
+    checkpoint thread ID and the collection name in the run config.
     """
     
     def __init__(
         self,
-        session_id: str,
-        collection_name: str,
         model: Optional[str] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
     ):
         """
         Initialize RAG workflow.
         
         Args:
-            session_id: Unique session identifier
-            collection_name: ChromaDB collection name
             model: LLM model name (optional)
+            checkpointer: Checkpoint saver to compile with (optional)
         """
-        self.session_id = session_id
-        self.collection_name = collection_name
         self.model = model or settings.llm.model
         
         # Initialize agents
-        self.visual_agent = VisualDecisionAgent(model=self.model, session_id=session_id)
-        self.rag_agent = RAGAnswerAgent(model=self.model, session_id=session_id)
+        self.visual_agent = VisualDecisionAgent(model=self.model)
+        self.rag_agent = RAGAnswerAgent(model=self.model)
         self.quality_agent = QualityCheckAgent()
-        self.web_agent = WebSearchAgent(model=self.model, session_id=session_id)
+        self.web_agent = WebSearchAgent(model=self.model)
         self.formatter_agent = ResponseFormattingAgent()
         
-        self.query_analyzer_agent = QueryAnalyzerAgent(model=self.model, session_id=session_id)
-        self.sub_query_processor = SubQueryProcessorAgent(session_id=session_id)
-        self.sub_query_collector = SubQueryCollectorAgent(session_id=session_id)
-        self.answer_synthesis_agent = AnswerSynthesisAgent(model=self.model, session_id=session_id)
+        self.query_analyzer_agent = QueryAnalyzerAgent(model=self.model)
+        self.sub_query_collector = SubQueryCollectorAgent()
+        self.answer_synthesis_agent = AnswerSynthesisAgent(model=self.model)
+        self.history_compaction_agent = HistoryCompactionAgent(model=self.model)
         
-        # Initialize retrievers
-        self.doc_retriever = DocumentRetriever(collection_name=collection_name)
-        self.img_retriever = ImageRetriever(session_id=session_id)
+        # Initialize retrievers (document retrievers are resolved per run)
+        self.img_retriever = ImageRetriever()
         
         # Create node functions
-        self._add_user_message_node = create_add_user_message_node(session_id)
-        self._rag_retrieve_node = create_rag_retrieve_node(self.doc_retriever, session_id)
-        self._retrieve_images_node = create_retrieve_images_node(self.img_retriever, session_id)
+        self._add_user_message_node = create_add_user_message_node()
+        self._rag_retrieve_node = create_rag_retrieve_node()
+        self._batch_retrieve_node = create_batch_retrieve_node()
+        self._retrieve_images_node = create_retrieve_images_node(self.img_retriever)
+        self._deadline_fallback_node = create_deadline_fallback_node()
+        
+        # Complex-query branches reuse the same pipeline steps
+        self.sub_query_processor = SubQueryProcessorAgent(
+            rag_retrieve_node=self._rag_retrieve_node,
+            retrieve_images_node=self._retrieve_images_node,
+            visual_agent=self.visual_agent,
+            rag_agent=self.rag_agent,
+            web_agent=self.web_agent,
+        )
         
-        # Build workflow graph
+        # Build and compile workflow graph
         self.graph = self._build_graph()
+        self.checkpointer = checkpointer
+        self.compiled = self.graph.compile(checkpointer=checkpointer)
+    
+    async def _rag_retrieve_and_speculate(self, state: GraphState, config: RunnableConfig) -> dict:
+        """Retrieve context, starting the web fallback early if retrieval is weak."""
+        update = await self._rag_retrieve_node(state, config)
+        update.update(self.web_agent.start_speculative_search(
+            state.get("query", ""), update.get("retrieved_context")
+        ))
+        if update.get("speculative_search_id"):
+            get_speculative_search_ids(config).add(update["speculative_search_id"])
+        return update
+    
+    def _discard_speculative_searches(self, config: RunnableConfig) -> None:
+        """Cancel a finished, failed or cancelled run's unclaimed speculative searches."""
+        for search_id in get_speculative_search_ids(config):
+            self.web_agent.discard_speculative_search(search_id)
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow with all nodes and edges."""
@@ -103,16 +138,18 @@ class RAGWorkflow:
         # Add nodes
         workflow.add_node("add_user_message", self._add_user_message_node)
         workflow.add_node("analyze_query", self.query_analyzer_agent.analyze_query)
-        workflow.add_node("prepare_sub_query", self.sub_query_processor.prepare_sub_query)
-        workflow.add_node("collect_sub_query_result", self.sub_query_collector.collect_result)
+        workflow.add_node("batch_retrieve_sub_queries", self._batch_retrieve_node)
+        workflow.add_node("process_sub_query", self.sub_query_processor.process_sub_query)
+        workflow.add_node("collect_sub_query_results", self.sub_query_collector.collect_results)
         workflow.add_node("synthesize_answers", self.answer_synthesis_agent.synthesize_answers)
-        workflow.add_node("rag_retrieve", self._rag_retrieve_node)
+        workflow.add_node("rag_retrieve", self._rag_retrieve_and_speculate)
         workflow.add_node("visual_decide", self.visual_agent.decide_visual_context)
         workflow.add_node("retrieve_images", self._retrieve_images_node)
         workflow.add_node("generate_rag_answer", self.rag_agent.generate_answer)
         workflow.add_node("check_rag_quality", self.quality_agent.check_quality)
         workflow.add_node("web_search", self.web_agent.search)
         workflow.add_node("generate_web_answer", self.web_agent.generate_answer)
+        workflow.add_node("deadline_fallback", self._deadline_fallback_node)
         workflow.add_node("format_response", self.formatter_agent.format_response)
         
         # Set entry point
@@ -121,22 +158,33 @@ class RAGWorkflow:
         # Define edges
         workflow.add_edge("add_user_message", "analyze_query")
         
-        # Query analyzer branching
+        # Query analyzer branching (complex queries fan out one branch per sub-query,
+        # optionally after one batched retrieval for all sub-queries)
         workflow.add_conditional_edges(
             "analyze_query",
-            query_analysis_route,
-            {
-                "simple_rag": "rag_retrieve",
-                "complex_rag": "prepare_sub_query",
-                "too_complex": "format_response",
-            },
+            query_analysis_fan_out_route,
+            ["rag_retrieve", "batch_retrieve_sub_queries", "process_sub_query", "format_response"],
+        )
+        workflow.add_conditional_edges(
+            "batch_retrieve_sub_queries",
+            sub_query_fan_out_route,
+            ["rag_retrieve", "process_sub_query", "format_response"],
         )
         
-        # Complex query sub-query loop
-        workflow.add_edge("prepare_sub_query", "rag_retrieve")
+        # Parallel sub-query branches join before synthesis
+        workflow.add_edge("process_sub_query", "collect_sub_query_results")
+        workflow.add_edge("collect_sub_query_results", "synthesize_answers")
         
         # RAG pipeline
-        workflow.add_edge("rag_retrieve", "visual_decide")
+        workflow.add_conditional_edges(
+            "rag_retrieve",
+            retrieval_route,
+            {
+                "visual_decide": "visual_decide",
+                "web_search": "web_search",
+                "deadline_fallback": "deadline_fallback",
+            },
+        )
         workflow.add_conditional_edges(
             "visual_decide",
             visual_route,
@@ -151,21 +199,11 @@ class RAGWorkflow:
         # Quality check routing
         workflow.add_conditional_edges(
             "check_rag_quality",
-            quality_or_collect_route,
+            quality_check_route,
             {
                 "web_search": "web_search",
+                "deadline_fallback": "deadline_fallback",
                 "format_response": "format_response",
-                "collect_sub_query": "collect_sub_query_result",
-            },
-        )
-        
-        # Sub-query collection and loop
-        workflow.add_conditional_edges(
-            "collect_sub_query_result",
-            sub_query_loop_route,
-            {
-                "continue_loop": "prepare_sub_query",
-                "synthesize": "synthesize_answers",
             },
         )
         
@@ -174,91 +212,258 @@ class RAGWorkflow:
         
         # Web search fallback path
         workflow.add_edge("web_search", "generate_web_answer")
-        workflow.add_conditional_edges(
-            "generate_web_answer",
-            web_answer_route,
-            {
-                "format_response": "format_response",
-                "collect_sub_query": "collect_sub_query_result",
-            },
-        )
+        workflow.add_edge("generate_web_answer", "format_response")
+        
+        # Deadline cut the web fallback: answer with what this run has
+        workflow.add_edge("deadline_fallback", "format_response")
         
-        # Terminal node
+        # Terminal (history compaction runs after the turn, see acompact_history)
         workflow.add_edge("format_response", END)
         
         return workflow
     
-    async def ainvoke(self, query: str) -> dict:
+    async def ainvoke(
+        self,
+        query: str,
+        session_id: str,
+        collection_name: Optional[str] = None,
+        document_set_version: int = 0,
+        deadline: Optional[RunDeadline] = None,
+        run_id: Optional[str] = None,
+    ) -> dict:
         """
         Invoke workflow asynchronously with MongoDB checkpointing.
         
         Args:
             query: User query
+            session_id: Session identifier (checkpoint thread ID)
+            collection_name: ChromaDB collection name (defaults to session ID)
+            document_set_version: Session document-set version (cache invalidation)
+            deadline: Latency budget for the run (degradations are recorded on it)
+            run_id: Tag for the checkpoints this run writes (see arollback)
             
         Returns:
             Final graph state
         """
         initial_state = {"query": query}
+        config = build_run_config(
+            session_id, collection_name, document_set_version, deadline, run_id=run_id
+        )
         
-        serde = LightweightCheckpointSerializer()
-        with MongoDBSaver.from_conn_string(
-            conn_string=settings.mongodb.uri.get_secret_value(),
-            db_name=settings.mongodb.database,
-            collection_name=settings.mongodb.checkpoints_collection,
-            serde=serde,
-        ) as checkpointer:
-            compiled = self.graph.compile(checkpointer=checkpointer)
-            result = await compiled.ainvoke(
-                initial_state,
-                config={
-                    "configurable": {"thread_id": self.session_id},
-                    "metadata": {"session_id": self.session_id},
-                    "run_name": "RAG_Workflow"
-                }
-            )
-            return result
+        try:
+            return await self.compiled.ainvoke(initial_state, config=config)
+        finally:
+            self._discard_speculative_searches(config)
     
-    async def astream(self, query: str) -> AsyncGenerator[dict, None]:
+    async def astream(
+        self,
+        query: str,
+        session_id: str,
+        collection_name: Optional[str] = None,
+        document_set_version: int = 0,
+        deadline: Optional[RunDeadline] = None,
+        stream_mode: str | list[str] = "updates",
+        run_id: Optional[str] = None,
+    ) -> AsyncGenerator[Any, None]:
         """
         Stream workflow execution asynchronously.
         
         Args:
             query: User query
+            session_id: Session identifier (checkpoint thread ID)
+            collection_name: ChromaDB collection name (defaults to session ID)
+            document_set_version: Session document-set version (cache invalidation)
+            deadline: Latency budget for the run (degradations are recorded on it)
+            stream_mode: LangGraph stream mode(s); with a list, items are
+                (mode, payload) tuples, e.g. ["updates", "messages"] for
+                node updates plus LLM tokens
+            run_id: Tag for the checkpoints this run writes (see arollback)
             
         Yields:
-            Step updates from graph execution
+            Step updates (and LLM message chunks) from graph execution
         """
         initial_state = {"query": query}
+        config = build_run_config(
+            session_id, collection_name, document_set_version, deadline, run_id=run_id
+        )
         
-        serde = LightweightCheckpointSerializer()
-        with MongoDBSaver.from_conn_string(
-            conn_string=settings.mongodb.uri.get_secret_value(),
-            db_name=settings.mongodb.database,
-            collection_name=settings.mongodb.checkpoints_collection,
-            serde=serde,
-        ) as checkpointer:
-            compiled = self.graph.compile(checkpointer=checkpointer)
-            async for step in compiled.astream(
-                initial_state,
-                config={
-                    "configurable": {"thread_id": self.session_id},
-                    "metadata": {"session_id": self.session_id},
-                    "run_name": "RAG_Workflow"
-                }
-            ):
+        try:
+            async for step in self.compiled.astream(initial_state, config=config, stream_mode=stream_mode):
                 yield step
+        finally:
+            self._discard_speculative_searches(config)
     
-    async def invoke(self, query: str) -> dict:
+    async def invoke(
+        self,
+        query: str,
+        session_id: str,
+        collection_name: Optional[str] = None,
+        document_set_version: int = 0,
+        deadline: Optional[RunDeadline] = None,
+    ) -> dict:
         """
         Invoke workflow (alias for ainvoke).
         
         Args:
             query: User query
+            session_id: Session identifier (checkpoint thread ID)
+            collection_name: ChromaDB collection name (defaults to session ID)
+            document_set_version: Session document-set version (cache invalidation)
+            deadline: Latency budget for the run (degradations are recorded on it)
             
         Returns:
             Final graph state
         """
-        return await self.ainvoke(query)
+        return await self.ainvoke(query, session_id, collection_name, document_set_version, deadline)
+    
+    async def arollback(self, session_id: str, run_id: str) -> None:
+        """
+        Discard the checkpoints written by a cancelled run.
+        
+        Args:
+            session_id: Session identifier (checkpoint thread ID)
+            run_id: Run ID the run was started with
+        """
+        if not isinstance(self.checkpointer, MotorCheckpointSaver):
+            logger.warning("[WORKFLOW] Checkpointer does not support rollback")
+            return
+        await self.checkpointer.adelete_run(session_id, run_id)
+    
+    async def arecord_turn(
+        self,
+        query: str,
+        answer: AnswerWithCitations,
+        session_id: str,
+        collection_name: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ) -> None:
+        """
+        Append a turn answered outside the graph (e.g. from the answer cache).
+        
+        The question and answer are written to the session's checkpoint as
+        if the run had finished, so follow-up questions see them in history.
+        
+        Args:
+            query: User query
+            answer: Answer returned to the user
+            session_id: Session identifier (checkpoint thread ID)
+            collection_name: ChromaDB collection name (defaults to session ID)
+            run_id: Tag for the checkpoint written (see arollback)
+        """
+        await self.compiled.aupdate_state(
+            build_run_config(session_id, collection_name, run_id=run_id),
+            {
+                "messages": [
+                    HumanMessage(content=query, id=str(uuid4())),
+                    AIMessage(
+                        content=answer.answer,
+                        id=str(uuid4()),
+                        additional_kwargs={
+                            "answer_type": answer.answer_type,
+                            "citations_count": len(answer.citations),
+                            "cache_hit": True,
+                        },
+                    ),
+                ],
+                "query": query,
+                "final_answer": answer,
+            },
+            as_node="format_response",
+        )
+    
+    async def asummarize_history(
+        self,
+        session_id: str,
+    ) -> Optional[tuple[SystemMessage, list[BaseMessage]]]:
+        """
+        Summarize a session's older turns if its history has grown too large.
+        
+        Only reads the checkpoint; apply the result with aapply_history_summary.
+        
+        Args:
+            session_id: Session identifier (checkpoint thread ID)
+            
+        Returns:
+            (new summary, leading messages it replaces), or None
+        """
+        snapshot = await self.compiled.aget_state(build_run_config(session_id))
+        messages = list(snapshot.values.get("messages", []))
+        return await self.history_compaction_agent.summarize_history(messages)
+    
+    async def aapply_history_summary(
+        self,
+        session_id: str,
+        summary: SystemMessage,
+        replaced: list[BaseMessage],
+    ) -> bool:
+        """
+        Replace the summarized messages of a session's history.
+        
+        Must run while no query runs on the session. Turns added since the
+        summary was made are kept; if the summarized messages are no longer
+        the start of history, nothing is changed.
+        
+        Args:
+            session_id: Session identifier (checkpoint thread ID)
+            summary: Summary from asummarize_history
+            replaced: Messages the summary replaces
+            
+        Returns:
+            True if the summary was applied
+        """
+        config = build_run_config(session_id)
+        snapshot = await self.compiled.aget_state(config)
+        messages = list(snapshot.values.get("messages", []))
+        
+        if [m.id for m in messages[:len(replaced)]] != [m.id for m in replaced]:
+            logger.info(f"[WORKFLOW] History of session {session_id} changed; summary discarded")
+            return False
+        
+        # Rebuild the list so the summary stays first, ahead of the kept turns
+        await self.compiled.aupdate_state(
+            config,
+            {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary, *messages[len(replaced):]]},
+            as_node="format_response",
+        )
+        return True
+
+
+_rag_workflow: Optional[RAGWorkflow] = None
+
+
+def init_rag_workflow(checkpointer: BaseCheckpointSaver) -> RAGWorkflow:
+    """
+    Compile the process-wide RAG workflow.
+    
+    Should be called once during application startup.
+    
+    Args:
+        checkpointer: Checkpoint saver shared by all sessions
+        
+    Returns:
+        Compiled RAGWorkflow
+    """
+    global _rag_workflow
+    
+    logger.info("[WORKFLOW] Compiling RAG workflow")
+    _rag_workflow = RAGWorkflow(checkpointer=checkpointer)
+    return _rag_workflow
+
+
+def get_rag_workflow() -> RAGWorkflow:
+    """
+    Get the process-wide compiled RAG workflow.
+    
+    Returns:
+        RAGWorkflow compiled with the shared checkpointer
+        
+    Raises:
+        RuntimeError: If the workflow has not been initialized
+    """
+    if _rag_workflow is None:
+        raise RuntimeError(
+            "RAG workflow not initialized. Call init_rag_workflow() first.")
+    return _rag_workflow
 
 
 # Backward compatibility alias
@@ -2,51 +2,94 @@
 Node creation functions for the RAG workflow graph.
 
 This module provides factory functions for creating workflow nodes.
+Nodes are session-agnostic; per-run dependencies are resolved from the
+run config so the graph can be compiled once per process.
 """
 
 import logging
+from uuid import uuid4
+
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
 from config import settings
+from rag_system.retrievers import get_document_retriever
+from rag_system.utils.deadline import deadline_fallback_answer
+from rag_system.utils.message_utils import build_history_context
+from rag_system.utils.run_config import (
+    get_collection_name,
+    get_deadline,
+    get_document_scope,
+    get_session_id,
+)
 from schemas import GraphState, VisualDecision
 
 logger = logging.getLogger(__name__)
 
 
-def create_add_user_message_node(session_id: str):
+def create_add_user_message_node():
     """Create a node that adds user message to state."""
-    @traceable(name="add_user_message_node", metadata={"session_id": session_id, "step": "add_user_message"})
+    @traceable(name="add_user_message_node", metadata={"step": "add_user_message"})
     async def add_user_message_node(state: GraphState) -> dict:
-        """Add user's query as a HumanMessage to conversation history."""
+        """
+        Add user's query as a HumanMessage and build the run's history context once.
+        
+        Per-run fields are reset so routing never sees the previous
+        run's answer, route or errors from the checkpoint.
+        """
         query = state.get("query", "")
+        user_message = HumanMessage(content=query, id=str(uuid4()))
+        
+        # Trimmed + formatted once per run; answer nodes read it from state
+        history_context = build_history_context([*state.get("messages", []), user_message])
         
         return {
-            "messages": [HumanMessage(content=query)],
+            "messages": [user_message],
+            "history_context": history_context,
+            "final_answer": None,
+            "error_message": None,
+            "web_results": [],
+            "route": None,
         }
     
     return add_user_message_node
 
 
-def create_rag_retrieve_node(doc_retriever, session_id: str):
+def _use_reranking(config: RunnableConfig) -> bool:
+    """Whether to rerank in this run (skipped when the latency budget is short)."""
+    if not settings.vectorstore.enable_reranking:
+        return False
+    deadline = get_deadline(config)
+    if not deadline.has_budget(settings.deadline.rerank_min_ms):
+        deadline.degrade("skipped_rerank")
+        return False
+    return True
+
+
+def create_rag_retrieve_node():
     """Create a RAG retrieval node."""
-    @traceable(name="rag_retrieve_node", metadata={"session_id": session_id, "step": "rag_retrieval"})
-    async def rag_retrieve_node(state: GraphState) -> dict:
+    @traceable(name="rag_retrieve_node", metadata={"step": "rag_retrieval"})
+    async def rag_retrieve_node(state: GraphState, config: RunnableConfig) -> dict:
         """Retrieve documents from vector store asynchronously."""
         query = state.get("query", "")
         query_analysis = state.get("query_analysis")
         
         try:
+            doc_retriever = get_document_retriever(get_collection_name(config))
+            
             # Detect if this is a complex query
             is_complex = (
                 query_analysis is not None and
                 query_analysis.classification == "complex"
             )
             
+            use_reranking = is_complex and _use_reranking(config)
+            
             # Complex query with hybrid + reranking
             if is_complex and settings.vectorstore.enable_hybrid_search:
                 logger.info("[RAG] Complex query - using hybrid search + reranking")
-                if settings.vectorstore.enable_reranking:
+                if use_reranking:
                     retrieved_context = await doc_retriever.retrieve_and_rerank(
                         query=query,
                         k=settings.vectorstore.retrieval_k * 2,
@@ -61,7 +104,7 @@ def create_rag_retrieve_node(doc_retriever, session_id: str):
                         lexical_weight=settings.vectorstore.hybrid_lexical_weight,
                     )
             # Complex query with reranking only
-            elif is_complex and settings.vectorstore.enable_reranking:
+            elif use_reranking:
                 logger.info("[RAG] Complex query - using standard retrieval + reranking")
                 retrieved_context = await doc_retriever.retrieve_and_rerank(
                     query=query,
@@ -81,6 +124,10 @@ def create_rag_retrieve_node(doc_retriever, session_id: str):
             if not retrieved_context:
                 return {"retrieved_context": None}
             
+            if doc_retriever.is_below_floor(retrieved_context):
+                logger.info("[RAG] No chunk clears the relevance floor - skipping RAG answer")
+                return {"retrieved_context": None}
+            
             return {"retrieved_context": retrieved_context}
             
         except Exception as e:
@@ -93,10 +140,44 @@ def create_rag_retrieve_node(doc_retriever, session_id: str):
     return rag_retrieve_node
 
 
-def create_retrieve_images_node(img_retriever, session_id: str):
+def create_batch_retrieve_node():
+    """Create a batched retrieval node for complex-query sub-queries."""
+    @traceable(name="batch_retrieve_sub_queries_node", metadata={"step": "batch_retrieval"})
+    async def batch_retrieve_node(state: GraphState, config: RunnableConfig) -> dict:
+        """Retrieve context for all sub-queries with one embedding and one vector query."""
+        query_analysis = state.get("query_analysis")
+        sub_queries = query_analysis.sub_queries if query_analysis else []
+        
+        if not sub_queries:
+            return {"sub_query_contexts": None}
+        
+        try:
+            doc_retriever = get_document_retriever(get_collection_name(config))
+            sub_query_contexts = await doc_retriever.retrieve_batch(
+                queries=sub_queries,
+                use_hybrid=settings.vectorstore.enable_hybrid_search,
+                rerank=_use_reranking(config),
+            )
+            # Sub-queries with no relevant chunk go straight to web search
+            return {
+                "sub_query_contexts": [
+                    None if doc_retriever.is_below_floor(context) else context
+                    for context in sub_query_contexts
+                ],
+            }
+            
+        except Exception as e:
+            # Branches fall back to retrieving their own context
+            logger.error(f"[RAG] Batched retrieval failed: {str(e)}")
+            return {"sub_query_contexts": None}
+    
+    return batch_retrieve_node
+
+
+def create_retrieve_images_node(img_retriever):
     """Create an image retrieval node."""
-    @traceable(name="retrieve_images_node", metadata={"session_id": session_id, "step": "image_retrieval"})
-    async def retrieve_images_node(state: GraphState) -> dict:
+    @traceable(name="retrieve_images_node", metadata={"step": "image_retrieval"})
+    async def retrieve_images_node(state: GraphState, config: RunnableConfig) -> dict:
         """Generate PDF page images using ImageRetriever asynchronously."""
         visual_decision: VisualDecision | None = state.get("visual_decision")
         retrieved_context = state.get("retrieved_context")
@@ -114,8 +195,11 @@ def create_retrieve_images_node(img_retriever, session_id: str):
             updated_context = await img_retriever.retrieve(
                 retrieved_context=retrieved_context,
                 query=query,
+                session_id=get_session_id(config),
                 max_images=settings.image.max_images,
                 max_pages=settings.image.max_pages,
+                visual_type=visual_decision.visual_type,
+                cache_scope=get_document_scope(config),
             )
             
             if updated_context:
@@ -128,3 +212,13 @@ def create_retrieve_images_node(img_retriever, session_id: str):
             return {}
     
     return retrieve_images_node
+
+
+def create_deadline_fallback_node():
+    """Create a node that answers when the deadline cut the web fallback."""
+    @traceable(name="deadline_fallback_node", metadata={"step": "deadline_fallback"})
+    async def deadline_fallback_node(state: GraphState) -> dict:
+        """Return this run's best answer as partial, or an unable_to_answer notice."""
+        return {"final_answer": deadline_fallback_answer(state.get("final_answer"))}
+    
+    return deadline_fallback_node
@@ -5,11 +5,17 @@ This module provides conditional edge routing logic.
 """
 
 import logging
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Send
 from langsmith import traceable
 
 from config import settings
+from rag_system.agents.quality_check_agent import QualityCheckAgent
+from rag_system.agents.web_search_agent import WebSearchAgent
+from rag_system.utils.run_config import get_deadline
 from schemas import (
     GraphState,
+    SubQueryState,
     VisualDecision,
     AnswerWithCitations,
     QueryAnalysisResult,
@@ -24,6 +30,30 @@ def route_decision(state: GraphState) -> str:
     return state.get("route") or "llm"
 
 
+@traceable(name="retrieval_route_function", metadata={"step": "retrieval_routing_fn"})
+def retrieval_route(state: GraphState, config: RunnableConfig) -> str:
+    """Skip RAG answer generation when nothing relevant was retrieved."""
+    if state.get("retrieved_context"):
+        return "visual_decide"
+    
+    if not _has_web_fallback_budget(state, config):
+        return "deadline_fallback"
+    
+    logger.info("[RAG] No relevant context - going straight to web search")
+    return "web_search"
+
+
+def _has_web_fallback_budget(state: GraphState, config: RunnableConfig) -> bool:
+    """Check the latency budget for the web fallback, recording the skip if short."""
+    deadline = get_deadline(config)
+    if deadline.has_budget(settings.deadline.web_fallback_min_ms):
+        return True
+    
+    deadline.degrade("skipped_web_fallback")
+    WebSearchAgent.discard_speculative_search(state.get("speculative_search_id"))
+    return False
+
+
 @traceable(name="visual_route_function", metadata={"step": "visual_routing_fn"})
 def visual_route(state: GraphState) -> str:
     """Determine if we need to retrieve images."""
@@ -34,20 +64,18 @@ def visual_route(state: GraphState) -> str:
 
 
 @traceable(name="quality_check_route_function", metadata={"step": "quality_check_routing_fn"})
-def quality_check_route(state: GraphState) -> str:
+def quality_check_route(state: GraphState, config: RunnableConfig) -> str:
     """Determine if RAG answer quality is sufficient."""
     final_answer: AnswerWithCitations | None = state.get("final_answer")
     
-    if not final_answer:
-        return "web_search"
-    
-    is_empty = not final_answer.answer or len(final_answer.answer.strip()) < 50
-    has_high_uncertainty = final_answer.uncertainty > 0.6
-    has_no_citations = len(final_answer.citations) == 0
-    
-    if is_empty or has_high_uncertainty or has_no_citations:
+    if QualityCheckAgent.is_low_quality(final_answer):
+        # Out of budget: return the best answer we have
+        if not _has_web_fallback_budget(state, config):
+            return "deadline_fallback"
+        logger.info("[CHECK] RAG quality low - falling back to web search")
         return "web_search"
     
+    logger.info("[CHECK] RAG quality good")
     return "format_response"
 
 
@@ -78,96 +106,70 @@ def query_analysis_route(state: GraphState) -> str:
     return "complex_rag"
 
 
-@traceable(name="sub_query_loop_route_function", metadata={"step": "sub_query_loop_routing_fn"})
-def sub_query_loop_route(state: GraphState) -> str:
-    """
-    Determine if more sub-queries need processing.
-    
-    Args:
-        state: Current graph state
-        
-    Returns:
-        Route name: "continue_loop" or "synthesize"
+@traceable(name="sub_query_fan_out_route_function", metadata={"step": "sub_query_fan_out_fn"})
+def sub_query_fan_out_route(state: GraphState) -> str | list[Send]:
     """
-    query_analysis: QueryAnalysisResult | None = state.get("query_analysis")
-    current_index = state.get("current_sub_query_index", 0)
-    
-    if not query_analysis or not query_analysis.sub_queries:
-        return "synthesize"
-    
-    if current_index < len(query_analysis.sub_queries):
-        return "continue_loop"
+    Route after query analysis, fanning complex queries out per sub-query.
     
-    return "synthesize"
-
-
-def quality_or_collect_route(state: GraphState) -> str:
-    """
-    Extended quality check route that handles sub-query collection.
+    Sub-query context prefetched by batched retrieval is handed to each
+    branch so it skips its own retrieval.
     
     Args:
         state: Current graph state
         
     Returns:
-        Route name: "web_search", "format_response", or "collect_sub_query"
+        "rag_retrieve", "format_response", or one Send per sub-query
+        to "process_sub_query" (run concurrently)
     """
-    query_analysis: QueryAnalysisResult | None = state.get("query_analysis")
-    final_answer: AnswerWithCitations | None = state.get("final_answer")
+    route = query_analysis_route(state)
     
-    # Check if we're in complex query mode
-    is_complex = (
-        query_analysis is not None and 
-        query_analysis.classification == "complex" and
-        query_analysis.sub_queries
-    )
+    if route == "too_complex":
+        return "format_response"
     
-    if not final_answer:
-        logger.info("[CHECK] No RAG answer - will try web search")
-        return "web_search"
+    query_analysis: QueryAnalysisResult | None = state.get("query_analysis")
+    if route == "simple_rag" or not query_analysis.sub_queries:
+        return "rag_retrieve"
     
-    # Quality checks using config values
-    is_empty = not final_answer.answer or len(final_answer.answer.strip()) < settings.rag.min_answer_length
-    has_high_uncertainty = final_answer.uncertainty > settings.rag.quality_uncertainty_threshold
-    has_no_citations = len(final_answer.citations) == 0
+    logger.info(f"[SUB_QUERY] Fanning out {len(query_analysis.sub_queries)} sub-queries")
     
-    if is_empty or has_high_uncertainty or has_no_citations:
-        logger.info(f"[CHECK] RAG quality low - falling back to web search")
-        return "web_search"
+    sub_query_contexts = state.get("sub_query_contexts")
+    if sub_query_contexts is not None and len(sub_query_contexts) != len(query_analysis.sub_queries):
+        sub_query_contexts = None
     
-    # If complex query, collect the sub-query result
-    if is_complex:
-        current_index = state.get("current_sub_query_index", 0)
-        if current_index < len(query_analysis.sub_queries):
-            logger.info(f"[CHECK] RAG quality good - collecting sub-query result")
-            return "collect_sub_query"
+    sends = []
+    for index, sub_query in enumerate(query_analysis.sub_queries):
+        branch_state = SubQueryState(
+            query=sub_query,
+            sub_query_index=index,
+            query_analysis=query_analysis,
+            history_context=state.get("history_context"),
+        )
+        if sub_query_contexts is not None:
+            branch_state["retrieved_context"] = sub_query_contexts[index]
+        sends.append(Send("process_sub_query", branch_state))
     
-    logger.info(f"[CHECK] RAG quality good")
-    return "format_response"
+    return sends
 
 
-def web_answer_route(state: GraphState) -> str:
+@traceable(name="query_analysis_fan_out_route_function", metadata={"step": "query_analysis_fan_out_fn"})
+def query_analysis_fan_out_route(state: GraphState) -> str | list[Send]:
     """
-    Route after web answer generation - handles complex query mode.
+    Route after query analysis, batching sub-query retrieval when enabled.
     
     Args:
         state: Current graph state
         
     Returns:
-        Route name: "format_response" or "collect_sub_query"
+        "batch_retrieve_sub_queries" for complex queries in batched mode,
+        otherwise the result of sub_query_fan_out_route
     """
     query_analysis: QueryAnalysisResult | None = state.get("query_analysis")
     
-    # Check if we're in complex query mode
-    is_complex = (
-        query_analysis is not None and 
-        query_analysis.classification == "complex" and
-        query_analysis.sub_queries
-    )
-    
-    if is_complex:
-        current_index = state.get("current_sub_query_index", 0)
-        if current_index < len(query_analysis.sub_queries):
-            logger.info(f"[WEB_ROUTE] Complex query mode - collecting web answer for sub-query")
-            return "collect_sub_query"
+    if (
+        settings.vectorstore.batch_sub_query_retrieval
+        and query_analysis_route(state) == "complex_rag"
+        and query_analysis.sub_queries
+    ):
+        return "batch_retrieve_sub_queries"
     
-    return "format_response"
+    return sub_query_fan_out_route(state)
@@ -9,9 +9,11 @@ from schemas import (
     ErrorResponse,
 )
 from services import (
+    AdmissionRejectedError,
     SessionNotFoundError,
     IngestionError,
     DocumentNotFoundError,
+    admission_service,
     session_service,
     ingestion_service,
 )
@@ -29,6 +31,7 @@ router = APIRouter(tags=["Documents"])
         401: {"model": ErrorResponse, "description": "Not authenticated"},
         404: {"model": ErrorResponse, "description": "Session not found"},
         413: {"model": ErrorResponse, "description": "File too large"},
+        429: {"model": ErrorResponse, "description": "Server busy, retry later"},
     },
     summary="Upload a PDF document",
     description="Upload a PDF file to a session and ingest it into the vector store.",
@@ -50,31 +53,39 @@ async def upload_document(
         )
 
     try:
-        content = await file.read()
-    except Exception as e:
+        async with admission_service.admit("ingestion"):
+            try:
+                content = await file.read()
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Failed to read file: {str(e)}",
+                )
+
+            try:
+                document = await ingestion_service.upload_and_ingest(
+                    user_id=current_user.id,
+                    session_id=session_id,
+                    filename=file.filename or "document.pdf",
+                    file_content=content,
+                )
+
+                return DocumentUploadResponse(
+                    success=True,
+                    message="Document uploaded and ingested successfully",
+                    document=document,
+                )
+
+            except IngestionError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e),
+                )
+    except AdmissionRejectedError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to read file: {str(e)}",
-        )
-
-    try:
-        document = await ingestion_service.upload_and_ingest(
-            user_id=current_user.id,
-            session_id=session_id,
-            filename=file.filename or "document.pdf",
-            file_content=content,
-        )
-
-        return DocumentUploadResponse(
-            success=True,
-            message="Document uploaded and ingested successfully",
-            document=document,
-        )
-
-    except IngestionError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
         )
 
 
@@ -179,6 +190,7 @@ async def delete_document(
         400: {"model": ErrorResponse, "description": "Document not in failed state"},
         401: {"model": ErrorResponse, "description": "Not authenticated"},
         404: {"model": ErrorResponse, "description": "Document not found"},
+        429: {"model": ErrorResponse, "description": "Server busy, retry later"},
     },
     summary="Retry failed document",
     description="Retry ingestion of a failed document.",
@@ -193,17 +205,25 @@ async def retry_document(
     - **document_id**: Failed document to retry
     """
     try:
-        return await ingestion_service.retry_failed_document(
-            document_id,
-            current_user.id,
-        )
-    except DocumentNotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e),
-        )
-    except IngestionError as e:
+        async with admission_service.admit("ingestion"):
+            try:
+                return await ingestion_service.retry_failed_document(
+                    document_id,
+                    current_user.id,
+                )
+            except DocumentNotFoundError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=str(e),
+                )
+            except IngestionError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e),
+                )
+    except AdmissionRejectedError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
         )
@@ -1,7 +1,7 @@
 import json
 from typing import AsyncGenerator
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
 
 from middleware import CurrentUserDep
@@ -9,11 +9,15 @@ from schemas import (
     QueryRequest,
     QueryResponse,
     ErrorResponse,
+    StreamChunk,
 )
 from services import (
+    AdmissionRejectedError,
     SessionNotFoundError,
     SessionAccessDeniedError,
+    SessionBusyError,
     QueryError,
+    admission_service,
     query_service,
 )
 
@@ -28,6 +32,7 @@ router = APIRouter(tags=["Query"])
         400: {"model": ErrorResponse, "description": "Query processing failed"},
         401: {"model": ErrorResponse, "description": "Not authenticated"},
         404: {"model": ErrorResponse, "description": "Session not found"},
+        429: {"model": ErrorResponse, "description": "Server busy or too many queries queued for the session"},
     },
     summary="Execute RAG query",
     description="Execute a RAG query against a session's documents.",
@@ -52,10 +57,17 @@ async def execute_query(
         )
 
     try:
-        return await query_service.execute_query(
-            session_id=session_id,
-            user_id=current_user.id,
-            query_request=query_request,
+        async with admission_service.admit("query"):
+            return await query_service.execute_query(
+                session_id=session_id,
+                user_id=current_user.id,
+                query_request=query_request,
+            )
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
         )
     except SessionNotFoundError as e:
         raise HTTPException(
@@ -67,6 +79,12 @@ async def execute_query(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e),
         )
+    except SessionBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except QueryError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -83,6 +101,7 @@ async def execute_query(
         },
         401: {"model": ErrorResponse, "description": "Not authenticated"},
         404: {"model": ErrorResponse, "description": "Session not found"},
+        429: {"model": ErrorResponse, "description": "Server busy or too many queries queued for the session"},
     },
     summary="Stream RAG query",
     description="Execute a RAG query with streaming response (Server-Sent Events).",
@@ -91,17 +110,52 @@ async def stream_query(
     session_id: str,
     query_request: QueryRequest,
     current_user: CurrentUserDep,
+    request: Request,
 ):
     """
     Execute a streaming RAG query.
+
+    The run is cancelled if the client disconnects before it finishes.
+    The first event ('queued') reports the run's position in the session
+    queue; a busy server or full queue is rejected with 429 before
+    streaming starts.
     """
-    async def generate() -> AsyncGenerator[str, None]:
-        try:
+    async def admitted_stream() -> AsyncGenerator[StreamChunk, None]:
+        # The admission slot is held for as long as the client is streaming
+        async with admission_service.admit("query"):
             async for chunk in query_service.stream_query(
                 session_id=session_id,
                 user_id=current_user.id,
                 query_request=query_request,
+                is_disconnected=request.is_disconnected,
             ):
+                yield chunk
+
+    stream = admitted_stream()
+
+    # Start the query so a busy server or full session queue can still be answered with 429
+    first_chunk = None
+    first_error = None
+    try:
+        first_chunk = await anext(stream)
+    except (AdmissionRejectedError, SessionBusyError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except StopAsyncIteration:
+        pass
+    except Exception as e:
+        first_error = e
+
+    async def generate() -> AsyncGenerator[str, None]:
+        try:
+            if first_error is not None:
+                raise first_error
+            if first_chunk is not None:
+                yield f"data: {first_chunk.model_dump_json()}\n\n"
+            async for chunk in stream:
                 data = chunk.model_dump_json()
                 yield f"data: {data}\n\n"
 
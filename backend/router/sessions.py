@@ -154,6 +154,7 @@ async def delete_session(
     - **session_id**: Session to delete
 
     This is a soft delete - the session is marked inactive but data is retained.
+    Workflow checkpoints for the session are removed.
     """
     try:
         await session_service.delete_session(session_id, current_user.id)
@@ -9,7 +9,7 @@ from fastapi.responses import StreamingResponse, Response
 
 from middleware import CurrentUserDep
 from schemas import ErrorResponse
-from rag_system import RAGWorkflow 
+from rag_system.workflow import get_rag_workflow
 
 logger = logging.getLogger(__name__)
 
@@ -43,14 +43,7 @@ async def visualize_workflow(
     Returns a PNG image or Mermaid diagram of the workflow structure.
     """
     try:
-        graph = RAGWorkflow(
-            session_id="visualization",
-            collection_name="visualization",
-        )
-
-        from langgraph.checkpoint.memory import MemorySaver
-        checkpointer = MemorySaver()
-        compiled_graph = graph.graph.compile(checkpointer=checkpointer)
+        compiled_graph = get_rag_workflow().compiled
 
         if format == "mermaid":
             try:
@@ -200,14 +193,7 @@ async def get_workflow_structure(
     Returns metadata about nodes, edges, and the overall graph structure.
     """
     try:
-        graph = RAGWorkflow(
-            session_id="structure",
-            collection_name="structure",
-        )
-
-        from langgraph.checkpoint.memory import MemorySaver
-        checkpointer = MemorySaver()
-        compiled_graph = graph.graph.compile(checkpointer=checkpointer)
+        compiled_graph = get_rag_workflow().compiled
 
         graph_structure = compiled_graph.get_graph()
 
@@ -56,6 +56,8 @@ from .query import (
     VisualDecision,
     SourcePageSelection,
     PageSelectionDecision,
+    ChunkRelevanceScore,
+    RerankDecision,
     QueryAnalysisResult,
     SubQueryResult,
     Citation,
@@ -64,6 +66,7 @@ from .query import (
     RetrievedContext,
     WebSearchResult,
     GraphState,
+    SubQueryState,
     StreamChunk,
 )
 
@@ -111,6 +114,8 @@ __all__ = [
     "VisualDecision",
     "SourcePageSelection",
     "PageSelectionDecision",
+    "ChunkRelevanceScore",
+    "RerankDecision",
     "QueryAnalysisResult",
     "SubQueryResult",
     "Citation",
@@ -119,5 +124,6 @@ __all__ = [
     "RetrievedContext",
     "WebSearchResult",
     "GraphState",
+    "SubQueryState",
     "StreamChunk",
 ]
@@ -30,6 +30,11 @@ class QueryRequest(BaseSchema):
         default=True,
         description="Whether to include source citations",
     )
+    deadline_ms: int | None = Field(
+        default=None,
+        ge=1000,
+        description="Latency budget in milliseconds (defaults to server config)",
+    )
 
 
 class RoutingDecision(BaseSchema):
@@ -106,6 +111,28 @@ class PageSelectionDecision(BaseSchema):
     )
 
 
+class ChunkRelevanceScore(BaseSchema):
+    """Relevance score of one retrieved chunk."""
+
+    chunk_index: int = Field(
+        ge=0,
+        description="Zero-based index of the chunk in the candidate list",
+    )
+    score: float = Field(
+        ge=0.0,
+        le=1.0,
+        description="Relevance of the chunk to the query (0-1)",
+    )
+
+
+class RerankDecision(BaseSchema):
+    """LLM relevance scores for reranking retrieved chunks."""
+
+    scores: list[ChunkRelevanceScore] = Field(
+        description="Relevance score per chunk, sorted by score descending",
+    )
+
+
 class QueryAnalysisResult(BaseSchema):
     """Query classification (simple/complex) with extracted sub-queries."""
 
@@ -208,6 +235,10 @@ class RetrievedChunk(BaseSchema):
     content: str = Field(
         description="Text content of the chunk",
     )
+    chunk_id: str | None = Field(
+        default=None,
+        description="Vector store ID of the chunk",
+    )
     page_number: int | None = Field(
         default=None,
         description="Page number this chunk came from (1-indexed)",
@@ -220,6 +251,22 @@ class RetrievedChunk(BaseSchema):
         default=None,
         description="Document category/type from Unstructured",
     )
+    token_count: int | None = Field(
+        default=None,
+        description="Token count of the content (stored at ingest)",
+    )
+    relevance_score: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Semantic similarity to the query (0-1), if retrieved semantically",
+    )
+    lexical_score: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of query words found in the chunk, if retrieved lexically",
+    )
 
 
 class RetrievedContext(BaseSchema):
@@ -245,6 +292,18 @@ class RetrievedContext(BaseSchema):
         default="",
         description="Explanation for page selection",
     )
+    images_detail: str | None = Field(
+        default=None,
+        description="Vision detail level chosen for the images",
+    )
+    vision_tokens_estimated: int = Field(
+        default=0,
+        description="Estimated vision tokens for the attached images",
+    )
+    vision_tokens_saved: int = Field(
+        default=0,
+        description="Estimated vision tokens saved by the budget optimizer",
+    )
 
     @property
     def text_chunks(self) -> list[str]:
@@ -270,6 +329,22 @@ class WebSearchResult(BaseSchema):
     )
 
 
+def merge_sub_query_results(
+    left: list[SubQueryResult] | None,
+    right: list[SubQueryResult] | None,
+) -> list[SubQueryResult]:
+    """
+    Reducer for sub-query results written by parallel branches.
+
+    An empty update resets the list; otherwise results replace earlier
+    ones for the same sub-query and are appended in update order.
+    """
+    if not right:
+        return []
+    replaced = {result.sub_query for result in right}
+    return [result for result in (left or []) if result.sub_query not in replaced] + list(right)
+
+
 class GraphState(TypedDict, total=False):
     """
     LangGraph state that tracks the entire workflow.
@@ -279,6 +354,8 @@ class GraphState(TypedDict, total=False):
 
     query: str
 
+    history_context: str | None
+
     route: Literal["llm", "web_search", "multimodal_rag"] | None
 
     routing_decision: RoutingDecision | None
@@ -287,7 +364,9 @@ class GraphState(TypedDict, total=False):
 
     current_sub_query_index: int
 
-    sub_query_results: list[SubQueryResult]
+    sub_query_results: Annotated[list[SubQueryResult], merge_sub_query_results]
+
+    sub_query_contexts: list[RetrievedContext | None] | None
 
     visual_decision: VisualDecision | None
 
@@ -295,6 +374,8 @@ class GraphState(TypedDict, total=False):
 
     web_results: list[WebSearchResult]
 
+    speculative_search_id: str | None
+
     intermediate_reasoning: str
 
     final_answer: AnswerWithCitations | None
@@ -302,6 +383,22 @@ class GraphState(TypedDict, total=False):
     error_message: str | None
 
 
+class SubQueryState(TypedDict, total=False):
+    """
+    Per-branch state for one sub-query of a complex query.
+    """
+
+    query: str
+
+    sub_query_index: int
+
+    query_analysis: QueryAnalysisResult | None
+
+    history_context: str | None
+
+    retrieved_context: RetrievedContext | None
+
+
 class QueryResponse(BaseSchema):
     """RAG query response."""
 
@@ -320,6 +417,14 @@ class QueryResponse(BaseSchema):
         default=None,
         description="Visual context decision",
     )
+    cache_hit: bool = Field(
+        default=False,
+        description="Whether the answer was served from the session's answer cache",
+    )
+    degradations: list[str] = Field(
+        default_factory=list,
+        description="Optional steps skipped to meet the latency budget",
+    )
     processing_time_ms: float = Field(
         description="Processing time in milliseconds",
     )
@@ -357,8 +462,11 @@ class QueryResponse(BaseSchema):
 class StreamChunk(BaseSchema):
     """Single chunk in streaming response."""
 
-    type: Literal["routing", "retrieval", "visual", "answer_chunk", "citation", "done", "error"] = Field(
-        description="Chunk type",
+    type: Literal["queued", "routing", "retrieval", "visual", "answer_chunk", "answer_reset", "citation", "done", "error"] = Field(
+        description=(
+            "Chunk type ('queued' reports the run's position in the session queue, 0 = running; "
+            "'answer_reset' discards answer chunks streamed so far)"
+        ),
     )
     content: str | dict = Field(
         description="Chunk content",
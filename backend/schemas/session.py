@@ -62,6 +62,11 @@ class SessionInDB(MongoBaseSchema, TimestampMixin):
         ge=0,
         description="Number of documents in this session",
     )
+    document_set_version: int = Field(
+        default=0,
+        ge=0,
+        description="Incremented whenever documents are added or removed (cache invalidation)",
+    )
     last_activity_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         description="Last activity timestamp",
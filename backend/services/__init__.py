@@ -1,6 +1,21 @@
 """Services module exports."""
 
 from .auth_service import AuthService, AuthenticationError, auth_service
+from .admission_service import (
+    AdmissionService,
+    AdmissionRejectedError,
+    admission_service,
+)
+from .answer_cache_service import (
+    AnswerCacheLookup,
+    AnswerCacheService,
+    answer_cache_service,
+)
+from .checkpoint_retention_service import (
+    CheckpointRetentionService,
+    RetentionStats,
+    checkpoint_retention_service,
+)
 from .session_service import (
     SessionService,
     SessionNotFoundError,
@@ -13,12 +28,27 @@ from .ingestion_service import (
     DocumentNotFoundError,
     ingestion_service,
 )
+from .session_queue_service import (
+    SessionQueueService,
+    SessionBusyError,
+    SessionQueueError,
+    session_queue_service,
+)
 from .query_service import QueryService, QueryError, query_service
 
 __all__ = [
     "AuthService",
     "AuthenticationError",
     "auth_service",
+    "AdmissionService",
+    "AdmissionRejectedError",
+    "admission_service",
+    "AnswerCacheLookup",
+    "AnswerCacheService",
+    "answer_cache_service",
+    "CheckpointRetentionService",
+    "RetentionStats",
+    "checkpoint_retention_service",
     "SessionService",
     "SessionNotFoundError",
     "SessionAccessDeniedError",
@@ -27,6 +57,10 @@ __all__ = [
     "IngestionError",
     "DocumentNotFoundError",
     "ingestion_service",
+    "SessionQueueService",
+    "SessionBusyError",
+    "SessionQueueError",
+    "session_queue_service",
     "QueryService",
     "QueryError",
     "query_service",
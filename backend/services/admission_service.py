@@ -0,0 +1,185 @@
+"""
+Admission control service.
+
+Under a spike every accepted request starts graph or ingestion work,
+saturating the event loop and the thread pool for everyone. This
+service caps concurrent queries and ingestions per process with a short
+wait queue; requests beyond it are rejected right away so clients can
+retry (or the load balancer can route elsewhere).
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Literal
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+WorkKind = Literal["query", "ingestion"]
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when the process is too busy to accept a request."""
+
+    def __init__(self, kind: WorkKind, retry_after: int):
+        super().__init__(f"Server is busy with {kind} requests, retry later")
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class _AdmissionGate:
+    """Concurrency limit with a bounded wait queue for one kind of work."""
+
+    def __init__(self, kind: WorkKind, max_inflight: int, max_queued: int):
+        self.kind = kind
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self.stats: dict[str, Any] = {
+            "admitted": 0, "rejected": 0, "timed_out": 0, "queued": 0, "wait_ms_max": 0.0,
+        }
+
+    @property
+    def saturated(self) -> bool:
+        """Whether new requests would be rejected right away."""
+        return self.in_flight >= self.max_inflight and self.waiting >= self.max_queued
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        """Count a rejection and build its error."""
+        self.stats[reason] += 1
+        logger.warning(
+            f"[ADMISSION] Rejected {self.kind} ({reason}): "
+            f"{self.in_flight} in flight, {self.waiting} waiting"
+        )
+        return AdmissionRejectedError(self.kind, settings.admission.retry_after_seconds)
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting briefly if all are busy.
+
+        Raises:
+            AdmissionRejectedError: If the wait queue is full or the wait timed out
+        """
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queued:
+                raise self._reject("rejected")
+
+            self.waiting += 1
+            self.stats["queued"] += 1
+            started_at = time.monotonic()
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(), settings.admission.queue_timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                raise self._reject("timed_out")
+            finally:
+                self.waiting -= 1
+            wait_ms = (time.monotonic() - started_at) * 1000
+            self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+
+    def release(self) -> None:
+        """Free a slot."""
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def get_status(self) -> dict[str, Any]:
+        """Current load of the gate."""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_inflight,
+            "waiting": self.waiting,
+            "max_queued": self.max_queued,
+            "saturated": self.saturated,
+        }
+
+
+class AdmissionService:
+    """Service for per-process admission control."""
+
+    _gates: dict[WorkKind, _AdmissionGate] = {}
+
+    @classmethod
+    def _get_gate(cls, kind: WorkKind) -> _AdmissionGate:
+        """Get (or create) the gate of a kind of work."""
+        if kind not in cls._gates:
+            admission = settings.admission
+            if kind == "ingestion":
+                cls._gates[kind] = _AdmissionGate(
+                    kind, admission.max_inflight_ingestions, admission.max_queued_ingestions
+                )
+            else:
+                cls._gates[kind] = _AdmissionGate(
+                    kind, admission.max_inflight_queries, admission.max_queued_queries
+                )
+        return cls._gates[kind]
+
+    @classmethod
+    @asynccontextmanager
+    async def admit(cls, kind: WorkKind) -> AsyncIterator[None]:
+        """
+        Hold a slot for a request while the block runs.
+
+        Args:
+            kind: "query" or "ingestion"
+
+        Raises:
+            AdmissionRejectedError: If the process is too busy
+        """
+        if not settings.admission.enabled:
+            yield
+            return
+
+        gate = cls._get_gate(kind)
+        await gate.acquire()
+        try:
+            yield
+        finally:
+            gate.release()
+
+    @classmethod
+    def get_status(cls) -> dict[str, Any]:
+        """
+        Get current load per kind of work (for readiness checks).
+
+        Returns:
+            Status dictionary with an overall "saturated" flag
+        """
+        if not settings.admission.enabled:
+            return {"enabled": False, "saturated": False}
+
+        gates = {kind: cls._get_gate(kind) for kind in ("query", "ingestion")}
+        return {
+            "enabled": True,
+            "saturated": any(gate.saturated for gate in gates.values()),
+            **{kind: gate.get_status() for kind, gate in gates.items()},
+        }
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get admission counters.
+
+        Returns:
+            Metrics dictionary
+        """
+        return {
+            "enabled": settings.admission.enabled,
+            **{
+                kind: {**gate.stats, "wait_ms_max": round(gate.stats["wait_ms_max"], 1)}
+                for kind, gate in cls._gates.items()
+            },
+        }
+
+
+admission_service = AdmissionService()
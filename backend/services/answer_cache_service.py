@@ -0,0 +1,231 @@
+"""
+Semantic answer cache service.
+
+Students in the same session often ask paraphrases of the same question.
+This service keeps recent answers per session and matches new queries by
+embedding similarity, so repeated questions skip the workflow entirely.
+Entries are tied to the session's document-set version and dropped as
+soon as documents are ingested or deleted. Follow-up queries that refer
+back to the conversation are neither served nor cached, since their
+answer changes with the history.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+from config import settings
+from rag_system.core.llm_client import get_embeddings
+from rag_system.tools.query_classifier import depends_on_history
+from schemas import AnswerWithCitations
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(query: str) -> str:
+    """Normalize a query for exact matching."""
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer with its query embedding."""
+
+    query: str
+    embedding: np.ndarray
+    answer: AnswerWithCitations
+    created_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class AnswerCacheLookup:
+    """Result of an answer cache lookup."""
+
+    answer: Optional[AnswerWithCitations] = None
+    similarity: float = 0.0
+    matched_query: Optional[str] = None
+    embedding: Optional[np.ndarray] = None
+
+    @property
+    def hit(self) -> bool:
+        """Whether a cached answer was found."""
+        return self.answer is not None
+
+
+@dataclass
+class _SessionEntries:
+    """Cached answers of one session for one document-set version."""
+
+    document_set_version: int
+    entries: list[CachedAnswer] = field(default_factory=list)
+
+
+class AnswerCacheService:
+    """Service for per-session semantic answer caching."""
+
+    _sessions: LRUCache = LRUCache(maxsize=settings.answer_cache.max_sessions)
+    _stats: dict[str, int] = {
+        "hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "history_dependent": 0,
+    }
+
+    @classmethod
+    def _get_entries(cls, session_id: str, document_set_version: int) -> Optional[_SessionEntries]:
+        """Get a session's unexpired entries, dropping them if the document set changed."""
+        session_entries: Optional[_SessionEntries] = cls._sessions.get(session_id)
+        if session_entries is None:
+            return None
+
+        if session_entries.document_set_version != document_set_version:
+            cls.invalidate(session_id)
+            return None
+
+        cutoff = time.time() - settings.answer_cache.ttl_seconds
+        session_entries.entries = [e for e in session_entries.entries if e.created_at >= cutoff]
+        return session_entries
+
+    @classmethod
+    async def lookup(
+        cls,
+        session_id: str,
+        document_set_version: int,
+        query: str,
+    ) -> AnswerCacheLookup:
+        """
+        Find a cached answer for a query (or a paraphrase of it).
+
+        Args:
+            session_id: Session identifier
+            document_set_version: Current document-set version of the session
+            query: User query
+
+        Returns:
+            Lookup result; on a miss it carries the query embedding for store()
+            (none for history-dependent queries, so they are not stored)
+        """
+        if not settings.answer_cache.enabled:
+            return AnswerCacheLookup()
+
+        if depends_on_history(query):
+            cls._stats["history_dependent"] += 1
+            return AnswerCacheLookup()
+
+        session_entries = cls._get_entries(session_id, document_set_version)
+        entries = session_entries.entries if session_entries else []
+
+        normalized = _normalize(query)
+        for entry in entries:
+            if _normalize(entry.query) == normalized:
+                cls._stats["hits"] += 1
+                logger.info(f"[ANSWER_CACHE] Exact hit for session {session_id}")
+                return AnswerCacheLookup(
+                    answer=entry.answer,
+                    similarity=1.0,
+                    matched_query=entry.query,
+                    embedding=entry.embedding,
+                )
+
+        try:
+            embedding = np.asarray(await get_embeddings().aembed_query(query), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"[ANSWER_CACHE] Query embedding failed: {str(e)}")
+            cls._stats["misses"] += 1
+            return AnswerCacheLookup()
+        embedding /= np.linalg.norm(embedding) or 1.0
+
+        best: Optional[CachedAnswer] = None
+        best_similarity = 0.0
+        for entry in entries:
+            similarity = float(entry.embedding @ embedding)
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+
+        if best is not None and best_similarity >= settings.answer_cache.similarity_threshold:
+            cls._stats["hits"] += 1
+            logger.info(
+                f"[ANSWER_CACHE] Semantic hit for session {session_id} "
+                f"(similarity {best_similarity:.3f}): {best.query}"
+            )
+            return AnswerCacheLookup(
+                answer=best.answer,
+                similarity=best_similarity,
+                matched_query=best.query,
+                embedding=embedding,
+            )
+
+        cls._stats["misses"] += 1
+        return AnswerCacheLookup(similarity=best_similarity, embedding=embedding)
+
+    @classmethod
+    def store(
+        cls,
+        session_id: str,
+        document_set_version: int,
+        query: str,
+        answer: AnswerWithCitations,
+        embedding: Optional[np.ndarray],
+    ) -> None:
+        """
+        Cache an answer for a session.
+
+        Args:
+            session_id: Session identifier
+            document_set_version: Document-set version the answer was produced with
+            query: User query
+            answer: Final answer
+            embedding: Normalized query embedding from lookup()
+        """
+        if not settings.answer_cache.enabled or embedding is None:
+            return
+        if depends_on_history(query):
+            return
+        # Deadline-cut (partial) answers would otherwise outlive the run that was short on time
+        if answer.answer_type in ("unable_to_answer", "partial") or not answer.answer:
+            return
+
+        session_entries = cls._get_entries(session_id, document_set_version)
+        if session_entries is None:
+            session_entries = _SessionEntries(document_set_version=document_set_version)
+            cls._sessions[session_id] = session_entries
+
+        session_entries.entries.append(CachedAnswer(query=query, embedding=embedding, answer=answer))
+        overflow = len(session_entries.entries) - settings.answer_cache.max_entries_per_session
+        if overflow > 0:
+            del session_entries.entries[:overflow]
+
+        cls._stats["stores"] += 1
+
+    @classmethod
+    def invalidate(cls, session_id: str) -> None:
+        """
+        Drop all cached answers of a session.
+
+        Args:
+            session_id: Session identifier
+        """
+        if cls._sessions.pop(session_id, None) is not None:
+            cls._stats["invalidations"] += 1
+            logger.info(f"[ANSWER_CACHE] Invalidated session {session_id}")
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get answer cache metrics.
+
+        Returns:
+            Metrics dictionary
+        """
+        lookups = cls._stats["hits"] + cls._stats["misses"]
+        return {
+            "enabled": settings.answer_cache.enabled,
+            **cls._stats,
+            "hit_rate": round(cls._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "sessions": len(cls._sessions),
+            "entries": sum(len(s.entries) for s in cls._sessions.values()),
+        }
+
+
+answer_cache_service = AnswerCacheService()
@@ -0,0 +1,344 @@
+"""
+Checkpoint retention service for LangGraph session threads.
+
+Every query checkpoints into the session's thread, but only the latest
+checkpoint is needed to resume a conversation. This service trims old
+checkpoints per thread, purges threads of inactive or deleted sessions,
+and runs as a periodic background task. Threads due for compaction come
+from the checkpointer's per-thread counters, and purged sessions are
+marked, so a pass never scans the checkpoints collection as a whole.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from config import settings
+from crud import session_run_queue_crud
+from db import (
+    get_checkpoints_collection,
+    get_checkpoint_threads_collection,
+    get_checkpoint_writes_collection,
+    get_sessions_collection,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionStats:
+    """Documents and bytes reclaimed by a retention operation."""
+
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    bytes_reclaimed: int = 0
+    threads_compacted: int = 0
+    threads_purged: int = 0
+
+    def add(self, other: "RetentionStats") -> None:
+        """Accumulate another stats object into this one."""
+        self.checkpoints_deleted += other.checkpoints_deleted
+        self.writes_deleted += other.writes_deleted
+        self.bytes_reclaimed += other.bytes_reclaimed
+        self.threads_compacted += other.threads_compacted
+        self.threads_purged += other.threads_purged
+
+
+class CheckpointRetentionService:
+    """Service for checkpoint compaction and cleanup."""
+
+    _totals: RetentionStats = RetentionStats()
+    _runs: int = 0
+    _last_run_at: Optional[datetime] = None
+    _last_run_duration_ms: Optional[float] = None
+    _last_error: Optional[str] = None
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def _delete_matching(
+        collection: AsyncIOMotorCollection,
+        query: dict,
+    ) -> tuple[int, int]:
+        """
+        Delete documents matching a query.
+
+        Args:
+            collection: Collection to delete from
+            query: Delete filter
+
+        Returns:
+            Tuple of (documents deleted, BSON bytes reclaimed; 0 unless
+            byte accounting is enabled)
+        """
+        size_bytes = 0
+        # Sizing reads every matched document again, so it is opt-in
+        if settings.checkpoint_retention.measure_bytes:
+            async for row in collection.aggregate([
+                {"$match": query},
+                {"$group": {"_id": None, "bytes": {"$sum": {"$bsonSize": "$$ROOT"}}}},
+            ]):
+                size_bytes = row["bytes"]
+
+        result = await collection.delete_many(query)
+        return result.deleted_count, size_bytes
+
+    @classmethod
+    async def compact_thread(
+        cls,
+        thread_id: str,
+        keep_last: Optional[int] = None,
+    ) -> RetentionStats:
+        """
+        Keep only the newest checkpoints of a thread.
+
+        Args:
+            thread_id: Thread (session) ID
+            keep_last: Checkpoints to keep per namespace (defaults to config)
+
+        Returns:
+            Reclaimed documents and bytes
+        """
+        keep_last = keep_last or settings.checkpoint_retention.keep_last
+        checkpoints = get_checkpoints_collection()
+        writes = get_checkpoint_writes_collection()
+        stats = RetentionStats()
+
+        for checkpoint_ns in await checkpoints.distinct("checkpoint_ns", {"thread_id": thread_id}):
+            # Checkpoint IDs are time-ordered; everything older than the Nth newest goes
+            cursor = checkpoints.find(
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns},
+                projection={"checkpoint_id": 1},
+                sort=[("checkpoint_id", -1)],
+                skip=keep_last - 1,
+                limit=1,
+            )
+            oldest_kept = [doc["checkpoint_id"] async for doc in cursor]
+            if not oldest_kept:
+                continue
+
+            query = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": {"$lt": oldest_kept[0]},
+            }
+            deleted, size_bytes = await cls._delete_matching(checkpoints, query)
+            stats.checkpoints_deleted += deleted
+            stats.bytes_reclaimed += size_bytes
+
+            deleted, size_bytes = await cls._delete_matching(writes, query)
+            stats.writes_deleted += deleted
+            stats.bytes_reclaimed += size_bytes
+
+        if stats.checkpoints_deleted or stats.writes_deleted:
+            stats.threads_compacted = 1
+
+        # Resync the thread's counter (capped so extra namespaces don't retrigger compaction)
+        remaining = await checkpoints.count_documents({"thread_id": thread_id})
+        await get_checkpoint_threads_collection().update_one(
+            {"_id": thread_id},
+            {"$set": {"checkpoint_count": min(remaining, keep_last)}},
+        )
+
+        return stats
+
+    @classmethod
+    async def purge_thread(cls, thread_id: str) -> RetentionStats:
+        """
+        Delete all checkpoints and writes of a thread.
+
+        Args:
+            thread_id: Thread (session) ID
+
+        Returns:
+            Reclaimed documents and bytes
+        """
+        query = {"thread_id": thread_id}
+        stats = RetentionStats()
+
+        deleted, size_bytes = await cls._delete_matching(get_checkpoints_collection(), query)
+        stats.checkpoints_deleted += deleted
+        stats.bytes_reclaimed += size_bytes
+
+        deleted, size_bytes = await cls._delete_matching(get_checkpoint_writes_collection(), query)
+        stats.writes_deleted += deleted
+        stats.bytes_reclaimed += size_bytes
+
+        await get_checkpoint_threads_collection().delete_one({"_id": thread_id})
+
+        if stats.checkpoints_deleted or stats.writes_deleted:
+            stats.threads_purged = 1
+            logger.info(
+                f"[RETENTION] Purged thread {thread_id}: "
+                f"{stats.checkpoints_deleted} checkpoints, {stats.writes_deleted} writes"
+            )
+
+        return stats
+
+    @classmethod
+    async def purge_inactive_sessions(cls) -> RetentionStats:
+        """
+        Purge checkpoints of sessions that are deleted or past the inactivity TTL.
+
+        Handled sessions are marked with `checkpoints_purged_at` (cleared
+        again on new activity), so each is only visited once.
+
+        Returns:
+            Reclaimed documents and bytes
+        """
+        retention = settings.checkpoint_retention
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=retention.inactive_ttl_days)
+        sessions = get_sessions_collection()
+        checkpoints = get_checkpoints_collection()
+        stats = RetentionStats()
+
+        # One indexed query per condition (an $or would scan every unmarked session)
+        for query in (
+            {"checkpoints_purged_at": None, "is_active": False},
+            {"checkpoints_purged_at": None, "last_activity_at": {"$lt": cutoff}},
+        ):
+            cursor = sessions.find(query, projection={"session_id": 1}, limit=retention.batch_size)
+            async for session in cursor:
+                thread_id = session["session_id"]
+                if await checkpoints.find_one({"thread_id": thread_id}, projection={"_id": 1}) is not None:
+                    stats.add(await cls.purge_thread(thread_id))
+                await sessions.update_one(
+                    {"_id": session["_id"]},
+                    {"$set": {"checkpoints_purged_at": now}},
+                )
+                if stats.threads_purged >= retention.batch_size:
+                    return stats
+
+        return stats
+
+    @classmethod
+    async def compact_threads(cls) -> RetentionStats:
+        """
+        Compact threads holding more than keep_last checkpoints.
+
+        Candidates come from the per-thread counters the checkpointer
+        maintains, so no pass scans the checkpoints collection. Threads whose
+        session holds a run-queue lease are skipped until the next pass, so
+        compaction never races a run writing (or rolling back) checkpoints.
+
+        Returns:
+            Reclaimed documents and bytes
+        """
+        retention = settings.checkpoint_retention
+        stats = RetentionStats()
+
+        cursor = get_checkpoint_threads_collection().find(
+            {"checkpoint_count": {"$gt": retention.keep_last}},
+            projection={"_id": 1},
+            limit=retention.batch_size,
+        )
+        thread_ids = [row["_id"] async for row in cursor]
+        leased = await session_run_queue_crud.get_leased_sessions(thread_ids)
+
+        for thread_id in thread_ids:
+            if thread_id not in leased:
+                stats.add(await cls.compact_thread(thread_id))
+
+        return stats
+
+    @classmethod
+    async def run_compaction(cls) -> RetentionStats:
+        """
+        Run one retention pass (inactive purge, then per-thread compaction).
+
+        Returns:
+            Reclaimed documents and bytes for this pass
+        """
+        start_time = time.time()
+
+        stats = await cls.purge_inactive_sessions()
+        stats.add(await cls.compact_threads())
+
+        cls._runs += 1
+        cls._totals.add(stats)
+        cls._last_run_at = datetime.now(timezone.utc)
+        cls._last_run_duration_ms = (time.time() - start_time) * 1000
+        cls._last_error = None
+
+        reclaimed = (
+            f", {stats.bytes_reclaimed / 1024:.1f}KB reclaimed"
+            if settings.checkpoint_retention.measure_bytes else ""
+        )
+        logger.info(
+            f"[RETENTION] Pass complete: {stats.checkpoints_deleted} checkpoints, "
+            f"{stats.writes_deleted} writes{reclaimed} in {cls._last_run_duration_ms:.0f}ms"
+        )
+
+        return stats
+
+    @classmethod
+    async def _run_forever(cls) -> None:
+        """Run compaction passes on the configured interval."""
+        interval = settings.checkpoint_retention.interval_seconds
+
+        while True:
+            try:
+                await cls.run_compaction()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                cls._last_error = str(e)
+                logger.error(f"[RETENTION] Compaction pass failed: {str(e)}")
+
+            await asyncio.sleep(interval)
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the background compaction task."""
+        if not settings.checkpoint_retention.enabled or cls._task is not None:
+            return
+
+        cls._task = asyncio.create_task(cls._run_forever())
+        logger.info("[RETENTION] Background compaction started")
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Stop the background compaction task."""
+        if cls._task is None:
+            return
+
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    async def get_metrics(cls) -> dict[str, Any]:
+        """
+        Get retention metrics and current checkpoint collection sizes.
+
+        Returns:
+            Metrics dictionary
+        """
+        return {
+            "enabled": settings.checkpoint_retention.enabled,
+            "keep_last": settings.checkpoint_retention.keep_last,
+            "runs": cls._runs,
+            "last_run_at": cls._last_run_at.isoformat() if cls._last_run_at else None,
+            "last_run_duration_ms": cls._last_run_duration_ms,
+            "last_error": cls._last_error,
+            "checkpoints_deleted": cls._totals.checkpoints_deleted,
+            "writes_deleted": cls._totals.writes_deleted,
+            "bytes_reclaimed": (
+                cls._totals.bytes_reclaimed if settings.checkpoint_retention.measure_bytes else None
+            ),
+            "threads_compacted": cls._totals.threads_compacted,
+            "threads_purged": cls._totals.threads_purged,
+            "checkpoint_documents": await get_checkpoints_collection().estimated_document_count(),
+            "checkpoint_write_documents": await get_checkpoint_writes_collection().estimated_document_count(),
+        }
+
+
+checkpoint_retention_service = CheckpointRetentionService()
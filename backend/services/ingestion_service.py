@@ -12,6 +12,7 @@ from typing import Optional
 from langsmith import traceable
 from config import settings
 from crud import document_crud
+from rag_system.core import set_llm_caller
 from schemas import (
     DocumentCreate,
     DocumentInDB,
@@ -110,6 +111,9 @@ class IngestionService:
         document: DocumentInDB,
     ) -> DocumentInDB:
         """Ingest document into vector store."""
+        # Embedding calls made for ingestion yield to interactive queries
+        set_llm_caller(document.user_id, "ingestion")
+
         try:
             await document_crud.mark_processing(document.id)
 
@@ -125,6 +129,9 @@ class IngestionService:
                 page_count=page_count,
             )
 
+            # New chunks are searchable now; answers cached since upload are stale
+            await session_service.bump_document_set_version(document.session_id)
+
             logger.info(
                 f"Ingested document {document.file_name}: "
                 f"{chunk_count} chunks, {page_count} pages"
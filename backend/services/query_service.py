@@ -2,33 +2,519 @@
 Query service for RAG workflow execution.
 """
 
+import asyncio
 import logging
 import time
-from typing import AsyncGenerator, Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
+from uuid import uuid4
+
+from langchain_core.messages import AIMessageChunk
 
 from config import settings
 from crud import session_crud, session_message_crud
 from schemas import (
+    AnswerWithCitations,
     QueryRequest,
     QueryResponse,
     GraphState,
     StreamChunk,
 )
+from services.answer_cache_service import answer_cache_service
+from services.session_queue_service import SessionBusyError, SessionTicket, session_queue_service
 from services.session_service import session_service
 from utils.object_id import PyObjectId
-from rag_system import RAGWorkflow 
+from rag_system.core import set_llm_caller
+from rag_system.utils import RunDeadline
+from rag_system.workflow import get_rag_workflow
 
 logger = logging.getLogger(__name__)
 
+# Nodes whose LLM tokens are forwarded as answer_chunk events
+SIMPLE_ANSWER_NODES = frozenset({"generate_rag_answer", "generate_web_answer"})
+COMPLEX_ANSWER_NODES = frozenset({"synthesize_answers"})
+
+# Seconds between client-disconnect checks while a streamed run is in progress
+DISCONNECT_POLL_INTERVAL = 0.5
+
+FlightKey = tuple[str, str, bool]
+
 
 class QueryError(Exception):
     """Raised when query processing fails."""
     pass
 
 
+class QueryCancelledError(Exception):
+    """Raised when the streaming client disconnects mid-run."""
+    pass
+
+
+@dataclass
+class _FlightResult:
+    """Outcome of a workflow run shared by every subscriber."""
+
+    final_answer: Optional[AnswerWithCitations]
+    routing_decision: Any = None
+    visual_decision: Any = None
+    cache_hit: bool = False
+    degradations: list[str] = field(default_factory=list)
+    intermediate_steps: list[dict[str, Any]] = field(default_factory=list)
+    streamed_answer: str = ""
+
+
+class _Flight:
+    """
+    One workflow run shared by identical concurrent queries.
+
+    The run executes in its own task and publishes its stream events.
+    Every request for the same (session, query, include_sources), the
+    one that started the run included, subscribes to those events and
+    the final result. The run is cancelled once no subscriber is left.
+    """
+
+    def __init__(self, key: FlightKey):
+        """
+        Initialize an empty flight.
+
+        Args:
+            key: Coalescing key
+        """
+        self.key = key
+        self.events: list[StreamChunk] = []
+        self.result: Optional[_FlightResult] = None
+        self.error: Optional[Exception] = None
+        self.done = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._updated = asyncio.Event()
+
+    def _notify(self) -> None:
+        """Wake every waiting subscriber."""
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def publish(self, chunk: StreamChunk) -> None:
+        """Append a stream event for all subscribers."""
+        self.events.append(chunk)
+        self._notify()
+
+    def finish(
+        self,
+        result: Optional[_FlightResult] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Complete the flight with a result or an error."""
+        self.result = result
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def follow(
+        self,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncGenerator[StreamChunk, None]:
+        """
+        Yield the run's events (past ones first), checking for a client disconnect.
+
+        Args:
+            is_disconnected: Async check for a client disconnect
+
+        Yields:
+            Stream events published by the run
+
+        Raises:
+            QueryCancelledError: If the client disconnected
+            Exception: The run's error if it failed
+        """
+        index = 0
+        next_check = time.monotonic() + DISCONNECT_POLL_INTERVAL
+        while True:
+            # Poll on a fixed interval so a busy stream is checked too
+            if is_disconnected is not None and time.monotonic() >= next_check:
+                if await is_disconnected():
+                    raise QueryCancelledError("Client disconnected")
+                next_check = time.monotonic() + DISCONNECT_POLL_INTERVAL
+
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+            updated = self._updated
+            try:
+                await asyncio.wait_for(updated.wait(), max(next_check - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def wait(self) -> _FlightResult:
+        """
+        Wait for the run's result.
+
+        Returns:
+            Flight result
+
+        Raises:
+            Exception: The run's error if it failed
+        """
+        async for _ in self.follow():
+            pass
+        return self.result
+
+
 class QueryService:
     """Service for RAG query execution."""
 
+    _flights: dict[FlightKey, _Flight] = {}
+    _stats: dict[str, int] = {"cancelled_runs": 0, "coalesced_queries": 0, "history_compactions": 0}
+    _background_tasks: set[asyncio.Task] = set()
+    _compacting: set[str] = set()
+
+    @staticmethod
+    async def _record_cached_turn(
+        graph,
+        query: str,
+        answer: AnswerWithCitations,
+        session_id: str,
+        run_id: str,
+    ) -> None:
+        """Record a cache-served turn in the session history (best effort)."""
+        try:
+            await graph.arecord_turn(query, answer, session_id, run_id=run_id)
+        except Exception as e:
+            logger.warning(f"[ANSWER_CACHE] Failed to record cached turn for session {session_id}: {str(e)}")
+
+    @staticmethod
+    def _citations_metadata(final_answer: AnswerWithCitations) -> list[dict[str, Any]]:
+        """Serialize an answer's citations for session message metadata."""
+        return [
+            {
+                "source_type": c.source_type,
+                "source_id": c.source_id,
+                "page_number": c.page_number,
+                "url": c.url,
+                "confidence": c.confidence,
+                "snippet": c.snippet,
+            }
+            for c in final_answer.citations
+        ]
+
+    @staticmethod
+    def _queued_chunk(position: int) -> StreamChunk:
+        """Stream event reporting a run's position in its session queue."""
+        return StreamChunk(
+            type="queued",
+            content={"position": position},
+            timestamp=datetime.now(timezone.utc),
+        )
+
+    @classmethod
+    async def _join_flight(
+        cls,
+        session_id: str,
+        document_set_version: int,
+        query_request: QueryRequest,
+        deadline: RunDeadline,
+    ) -> tuple[_Flight, bool]:
+        """
+        Subscribe to the in-progress run for an identical query, or start one.
+
+        A new run takes a slot in the session's run queue first.
+
+        Args:
+            session_id: Session identifier
+            document_set_version: Current document-set version of the session
+            query_request: Query request data
+            deadline: Latency budget (used only if a new run is started)
+
+        Returns:
+            Tuple of (flight, whether this request started it)
+
+        Raises:
+            SessionBusyError: If the session's run queue is full
+        """
+        key: FlightKey = (
+            session_id,
+            " ".join(query_request.query.lower().split()),
+            query_request.include_sources,
+        )
+
+        flight = cls._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight(key)
+            cls._flights[key] = flight
+            try:
+                ticket = await session_queue_service.enqueue(session_id)
+            except Exception as e:
+                del cls._flights[key]
+                flight.finish(error=e)
+                raise
+
+            flight.publish(cls._queued_chunk(ticket.position if ticket else 0))
+            flight.task = asyncio.create_task(
+                cls._run_flight(flight, session_id, document_set_version, query_request.query, deadline, ticket)
+            )
+        else:
+            cls._stats["coalesced_queries"] += 1
+            logger.info(f"[QUERY] Coalesced identical query for session {session_id}")
+
+        flight.subscribers += 1
+        return flight, leader
+
+    @classmethod
+    def _leave_flight(cls, flight: _Flight) -> None:
+        """Unsubscribe from a flight, cancelling its run if nobody is left."""
+        flight.subscribers -= 1
+        if flight.subscribers > 0 or flight.done:
+            return
+
+        if cls._flights.get(flight.key) is flight:
+            del cls._flights[flight.key]
+        if flight.task is not None:
+            flight.task.cancel()
+
+    @classmethod
+    async def _run_flight(
+        cls,
+        flight: _Flight,
+        session_id: str,
+        document_set_version: int,
+        query: str,
+        deadline: RunDeadline,
+        ticket: Optional[SessionTicket],
+    ) -> None:
+        """
+        Run the workflow for a flight and publish its stream events.
+
+        The run waits for its turn in the session queue first. If it is
+        cancelled (every subscriber left), the checkpoints it wrote are
+        rolled back. Once it has answered and released the session, history
+        compaction is started in the background.
+        """
+        graph = get_rag_workflow()
+        # Tags the run's checkpoints so a cancel removes exactly those
+        run_id = uuid4().hex
+        # Set once the run holds the session (a queued run has written nothing)
+        started = False
+        answered = False
+
+        try:
+            await session_queue_service.wait_turn(
+                ticket,
+                on_position=lambda position: flight.publish(cls._queued_chunk(position)),
+            )
+
+            started = True
+
+            cache_lookup = await answer_cache_service.lookup(session_id, document_set_version, query)
+            if cache_lookup.hit:
+                await cls._record_cached_turn(graph, query, cache_lookup.answer, session_id, run_id)
+                flight.finish(_FlightResult(
+                    final_answer=cache_lookup.answer,
+                    cache_hit=True,
+                    degradations=deadline.degradations,
+                ))
+                answered = True
+                return
+
+            result = _FlightResult(final_answer=None, degradations=deadline.degradations)
+            token_nodes = SIMPLE_ANSWER_NODES
+            streaming_task = None
+
+            async for mode, payload in graph.astream(
+                query,
+                session_id,
+                document_set_version=document_set_version,
+                deadline=deadline,
+                stream_mode=["updates", "messages"],
+                run_id=run_id,
+            ):
+                if mode == "messages":
+                    message_chunk, metadata = payload
+                    node_name = metadata.get("langgraph_node")
+                    token = message_chunk.content if isinstance(message_chunk, AIMessageChunk) else None
+                    if node_name not in token_nodes or not token or not isinstance(token, str):
+                        continue
+
+                    # A new answer node run (e.g. web fallback after a failed quality check)
+                    task = (node_name, metadata.get("langgraph_step"))
+                    if task != streaming_task:
+                        if result.streamed_answer:
+                            flight.publish(StreamChunk(
+                                type="answer_reset",
+                                content={"node": node_name},
+                                timestamp=datetime.now(timezone.utc),
+                            ))
+                        streaming_task = task
+                        result.streamed_answer = ""
+
+                    result.streamed_answer += token
+                    flight.publish(StreamChunk(
+                        type="answer_chunk",
+                        content={"chunk": token},
+                        timestamp=datetime.now(timezone.utc),
+                    ))
+                    continue
+
+                for node_name, node_data in payload.items():
+                    if not isinstance(node_data, dict):
+                        continue
+
+                    if node_name == "analyze_query":
+                        query_analysis = node_data.get("query_analysis")
+                        if query_analysis and query_analysis.classification == "complex":
+                            # Sub-query answers are intermediate; only the synthesis is streamed
+                            token_nodes = COMPLEX_ANSWER_NODES
+                    elif node_name == "route":
+                        routing_decision = node_data.get("routing_decision")
+                        result.routing_decision = routing_decision
+                        step_content = routing_decision.model_dump() if routing_decision else {}
+                        result.intermediate_steps.append({
+                            "type": "routing",
+                            "content": step_content.get("decision", "Routing...")
+                        })
+                        flight.publish(StreamChunk(
+                            type="routing",
+                            content=step_content,
+                            timestamp=datetime.now(timezone.utc),
+                        ))
+                    elif node_name == "rag_retrieve":
+                        retrieved_context = node_data.get("retrieved_context")
+                        doc_count = len(retrieved_context.chunks) if retrieved_context and hasattr(
+                            retrieved_context, 'chunks') else 0
+                        result.intermediate_steps.append({
+                            "type": "retrieval",
+                            "content": f"Retrieved {doc_count} documents"
+                        })
+                        flight.publish(StreamChunk(
+                            type="retrieval",
+                            content={"retrieved": bool(
+                                retrieved_context), "count": doc_count},
+                            timestamp=datetime.now(timezone.utc),
+                        ))
+                    elif node_name == "visual_decide":
+                        visual_decision = node_data.get("visual_decision")
+                        result.visual_decision = visual_decision
+                        step_content = visual_decision.model_dump() if visual_decision else {}
+                        result.intermediate_steps.append({
+                            "type": "visual",
+                            "content": step_content.get("decision", "Processing visuals...")
+                        })
+                        flight.publish(StreamChunk(
+                            type="visual",
+                            content=step_content,
+                            timestamp=datetime.now(timezone.utc),
+                        ))
+                    elif node_name == "format_response":
+                        result.final_answer = node_data.get("final_answer")
+
+            if result.final_answer:
+                answer_cache_service.store(
+                    session_id,
+                    document_set_version,
+                    query,
+                    result.final_answer,
+                    cache_lookup.embedding,
+                )
+
+            flight.finish(result)
+            answered = True
+
+        except asyncio.CancelledError:
+            cls._stats["cancelled_runs"] += 1
+            flight.finish(error=QueryError("Query run was cancelled"))
+            try:
+                # A run cancelled while queued wrote nothing (another run may hold the session)
+                if started:
+                    await graph.arollback(session_id, run_id)
+            except Exception as e:
+                logger.error(f"[QUERY] Checkpoint rollback failed for session {session_id}: {str(e)}")
+            logger.info(f"[QUERY] Discarded cancelled run for session {session_id}")
+            raise
+        except Exception as e:
+            logger.error(f"Query run failed for session {session_id}: {str(e)}")
+            flight.finish(error=e)
+        finally:
+            if cls._flights.get(flight.key) is flight:
+                del cls._flights[flight.key]
+            await session_queue_service.release(ticket)
+            if answered:
+                cls._compact_in_background(session_id)
+
+    @classmethod
+    async def _compact_history(cls, session_id: str) -> None:
+        """Fold a session's older turns into its summary (best effort)."""
+        graph = get_rag_workflow()
+        try:
+            compaction = await asyncio.wait_for(
+                graph.asummarize_history(session_id),
+                settings.llm.history_summary_timeout_seconds,
+            )
+            if compaction is None:
+                return
+
+            # Applied between runs so the rewrite cannot interleave with a run's checkpoints
+            ticket = await session_queue_service.enqueue(session_id)
+            try:
+                await session_queue_service.wait_turn(ticket)
+                if await graph.aapply_history_summary(session_id, *compaction):
+                    cls._stats["history_compactions"] += 1
+            finally:
+                await session_queue_service.release(ticket)
+
+        except asyncio.TimeoutError:
+            logger.warning(f"[QUERY] History compaction timed out for session {session_id}")
+        except SessionBusyError:
+            logger.info(f"[QUERY] Session {session_id} busy; history compaction deferred")
+        except Exception as e:
+            logger.error(f"[QUERY] History compaction failed for session {session_id}: {str(e)}")
+        finally:
+            cls._compacting.discard(session_id)
+
+    @classmethod
+    def _compact_in_background(cls, session_id: str) -> None:
+        """Start history compaction for a session unless one is already running."""
+        if not settings.llm.enable_history_summary or session_id in cls._compacting:
+            return
+
+        cls._compacting.add(session_id)
+        task = asyncio.create_task(cls._compact_history(session_id))
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+
+    @staticmethod
+    async def _delete_user_message(user_message_id: Optional[PyObjectId]) -> None:
+        """Delete the user message of a cancelled query (best effort)."""
+        if user_message_id is None:
+            return
+        try:
+            await session_message_crud.delete(user_message_id)
+        except Exception as e:
+            logger.error(f"[QUERY] Failed to delete user message of cancelled run: {str(e)}")
+
+    @classmethod
+    def _delete_in_background(cls, user_message_id: Optional[PyObjectId]) -> None:
+        """Delete a user message from a task that is itself being cancelled."""
+        task = asyncio.create_task(cls._delete_user_message(user_message_id))
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get query service counters.
+
+        Returns:
+            Metrics dictionary
+        """
+        return {**cls._stats, "runs_in_flight": len(cls._flights)}
+
     @classmethod
     async def execute_query(
         cls,
@@ -38,22 +524,25 @@ class QueryService:
     ) -> QueryResponse:
         """Execute RAG query against session."""
         start_time = time.time()
+        deadline = RunDeadline.from_request(query_request.deadline_ms)
+        set_llm_caller(user_id, "interactive")
 
         session = await session_service.validate_session_access(session_id, user_id)
 
         await session_service.update_activity(session_id)
 
         try:
-            graph = RAGWorkflow(
-                session_id=session_id,
-                collection_name=session_id,
+            flight, _ = await cls._join_flight(
+                session_id, session.document_set_version, query_request, deadline
             )
-
-            result = await graph.ainvoke(query_request.query)
+            try:
+                result = await flight.wait()
+            finally:
+                cls._leave_flight(flight)
 
             processing_time = (time.time() - start_time) * 1000
 
-            final_answer = result.get("final_answer")
+            final_answer = result.final_answer
 
             if final_answer is None:
                 raise QueryError("No answer generated")
@@ -68,19 +557,7 @@ class QueryService:
 
                 metadata = None
                 if query_request.include_sources and final_answer.citations:
-                    metadata = {
-                        "citations": [
-                            {
-                                "source_type": c.source_type,
-                                "source_id": c.source_id,
-                                "page_number": c.page_number,
-                                "url": c.url,
-                                "confidence": c.confidence,
-                                "snippet": c.snippet,
-                            }
-                            for c in final_answer.citations
-                        ]
-                    }
+                    metadata = {"citations": cls._citations_metadata(final_answer)}
 
                 await session_message_crud.create(
                     session_id=session_id,
@@ -98,12 +575,16 @@ class QueryService:
                 query=query_request.query,
                 answer=final_answer.answer,
                 citations=final_answer.citations if query_request.include_sources else [],
-                routing=result.get("routing_decision"),
-                visual_decision=result.get("visual_decision"),
+                routing=result.routing_decision,
+                visual_decision=result.visual_decision,
+                cache_hit=result.cache_hit,
+                degradations=result.degradations,
                 processing_time_ms=processing_time,
                 session_id=session_id,
             )
 
+        except SessionBusyError:
+            raise
         except Exception as e:
             logger.error(f"Query failed for session {session_id}: {str(e)}")
             raise QueryError(f"Query processing failed: {str(e)}")
@@ -114,135 +595,100 @@ class QueryService:
         session_id: str,
         user_id: PyObjectId,
         query_request: QueryRequest,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
     ) -> AsyncGenerator[StreamChunk, None]:
         """
         Stream RAG query execution.
 
+        An identical query already running for the session is joined
+        instead of started again; its events are replayed and streamed.
+        A new run first waits for its turn in the session's run queue and
+        reports its position with 'queued' events.
+        If the client disconnects (or the stream is closed) before the
+        answer is persisted, the user message is removed, and the run is
+        cancelled and its checkpoints rolled back once no other client
+        is following it.
+
         Args:
             session_id: Session identifier
             user_id: User ID for validation
             query_request: Query request data
+            is_disconnected: Async check for a client disconnect (e.g. Request.is_disconnected)
 
         Yields:
             StreamChunk objects as processing progresses
         """
-        from datetime import datetime, timezone
+        deadline = RunDeadline.from_request(query_request.deadline_ms)
+        set_llm_caller(user_id, "interactive")
 
         session = await session_service.validate_session_access(session_id, user_id)
 
         await session_service.update_activity(session_id)
 
+        # Joined before the user message is saved, so a full queue leaves no trace
+        flight, leader = await cls._join_flight(
+            session_id, session.document_set_version, query_request, deadline
+        )
+
+        user_message_id = None
         try:
-            await session_message_crud.create(
+            user_message = await session_message_crud.create(
                 session_id=session_id,
                 user_id=user_id,
                 role="user",
                 content=query_request.query,
             )
+            user_message_id = user_message.id
         except Exception as msg_err:
             logger.error(
                 f"Failed to save user message to session_messages: {str(msg_err)}")
 
-        try:
-            graph = RAGWorkflow(
-                session_id=session_id,
-                collection_name=session_id,
-            )
+        persisted = False
 
-            final_answer = None
-            final_result = None
-            intermediate_steps = []
+        try:
+            async for chunk in flight.follow(is_disconnected):
+                yield chunk
 
-            async for step in graph.astream(query_request.query):
-                for node_name, node_data in step.items():
-                    if node_data is None:
-                        continue
+            result = flight.result
+            final_answer = result.final_answer
 
-                    if node_name == "route":
-                        routing_decision = node_data.get(
-                            "routing_decision") if isinstance(node_data, dict) else None
-                        step_content = routing_decision.model_dump() if routing_decision else {}
-                        intermediate_steps.append({
-                            "type": "routing",
-                            "content": step_content.get("decision", "Routing...")
-                        })
-                        yield StreamChunk(
-                            type="routing",
-                            content=step_content,
-                            timestamp=datetime.now(timezone.utc),
-                        )
-                    elif node_name == "rag_retrieve":
-                        retrieved_context = node_data.get(
-                            "retrieved_context") if isinstance(node_data, dict) else None
-                        doc_count = len(retrieved_context.chunks) if retrieved_context and hasattr(
-                            retrieved_context, 'chunks') else 0
-                        intermediate_steps.append({
-                            "type": "retrieval",
-                            "content": f"Retrieved {doc_count} documents"
-                        })
+            if final_answer:
+                # Answers produced without token streaming (fallbacks, too-complex
+                # queries, cache hits) or differing from the streamed text are sent whole
+                if final_answer.answer != result.streamed_answer:
+                    if result.streamed_answer:
                         yield StreamChunk(
-                            type="retrieval",
-                            content={"retrieved": bool(
-                                retrieved_context), "count": doc_count},
+                            type="answer_reset",
+                            content={"node": "format_response"},
                             timestamp=datetime.now(timezone.utc),
                         )
-                    elif node_name == "visual_decide":
-                        visual_decision = node_data.get(
-                            "visual_decision") if isinstance(node_data, dict) else None
-                        step_content = visual_decision.model_dump() if visual_decision else {}
-                        intermediate_steps.append({
-                            "type": "visual",
-                            "content": step_content.get("decision", "Processing visuals...")
-                        })
+                    yield StreamChunk(
+                        type="answer_chunk",
+                        content={"chunk": final_answer.answer},
+                        timestamp=datetime.now(timezone.utc),
+                    )
+
+                if query_request.include_sources and final_answer.citations:
+                    for citation in final_answer.citations:
                         yield StreamChunk(
-                            type="visual_decision",
-                            content=step_content,
+                            type="citation",
+                            content={
+                                "source_type": citation.source_type,
+                                "source_id": citation.source_id,
+                                "page_number": citation.page_number,
+                                "url": citation.url,
+                                "confidence": citation.confidence,
+                                "snippet": citation.snippet,
+                            },
                             timestamp=datetime.now(timezone.utc),
                         )
-                    elif "answer" in node_name.lower():
-                        answer = node_data.get("final_answer") if isinstance(
-                            node_data, dict) else None
-                        if answer:
-                            final_answer = answer
-                            final_result = node_data
-                            yield StreamChunk(
-                                type="answer_chunk",
-                                content={"chunk": final_answer.answer},
-                                timestamp=datetime.now(timezone.utc),
-                            )
-
-                            if query_request.include_sources and final_answer.citations:
-                                for citation in final_answer.citations:
-                                    yield StreamChunk(
-                                        type="citation",
-                                        content={
-                                            "source_type": citation.source_type,
-                                            "source_id": citation.source_id,
-                                            "page_number": citation.page_number,
-                                            "url": citation.url,
-                                            "confidence": citation.confidence,
-                                            "snippet": citation.snippet,
-                                        },
-                                        timestamp=datetime.now(timezone.utc),
-                                    )
 
-            if final_answer:
                 try:
                     metadata = {
-                        "intermediate_steps": intermediate_steps
+                        "intermediate_steps": result.intermediate_steps
                     }
                     if query_request.include_sources and final_answer.citations:
-                        metadata["citations"] = [
-                            {
-                                "source_type": c.source_type,
-                                "source_id": c.source_id,
-                                "page_number": c.page_number,
-                                "url": c.url,
-                                "confidence": c.confidence,
-                                "snippet": c.snippet,
-                            }
-                            for c in final_answer.citations
-                        ]
+                        metadata["citations"] = cls._citations_metadata(final_answer)
 
                     await session_message_crud.create(
                         session_id=session_id,
@@ -255,12 +701,27 @@ class QueryService:
                     logger.error(
                         f"Failed to save assistant message to session_messages: {str(msg_err)}")
 
+            persisted = True
             yield StreamChunk(
                 type="done",
-                content={"session_id": session_id},
+                content={
+                    "session_id": session_id,
+                    "cache_hit": result.cache_hit,
+                    "coalesced": not leader,
+                    "degradations": result.degradations,
+                },
                 timestamp=datetime.now(timezone.utc),
             )
 
+        except QueryCancelledError:
+            logger.info(f"[QUERY] Client disconnected from session {session_id}")
+            cls._leave_flight(flight)
+            flight = None
+            await cls._delete_user_message(user_message_id)
+        except (asyncio.CancelledError, GeneratorExit):
+            if not persisted:
+                cls._delete_in_background(user_message_id)
+            raise
         except Exception as e:
             logger.error(f"Stream query failed: {str(e)}")
             yield StreamChunk(
@@ -268,6 +729,9 @@ class QueryService:
                 content={"error": str(e)},
                 timestamp=datetime.now(timezone.utc),
             )
+        finally:
+            if flight is not None:
+                cls._leave_flight(flight)
 
 
 query_service = QueryService()
@@ -0,0 +1,191 @@
+"""
+Per-session run queue service.
+
+Concurrent runs on one session's checkpoint thread load the same parent
+checkpoint and overwrite each other's turns. This service runs the
+queries of a session one at a time, in arrival order, with a bounded
+number waiting. The queue lives in MongoDB, so it also serializes runs
+across API processes; different sessions stay fully parallel.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from config import settings
+from crud import session_run_queue_crud
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBusyError(Exception):
+    """Raised when a session's run queue is full."""
+
+    def __init__(self, session_id: str, retry_after: int):
+        super().__init__(f"Too many queries queued for session '{session_id}'")
+        self.retry_after = retry_after
+
+
+class SessionQueueError(Exception):
+    """Raised when a queued run loses its queue slot."""
+    pass
+
+
+@dataclass
+class SessionTicket:
+    """A run's slot in its session's queue."""
+
+    session_id: str
+    ticket: str
+    position: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+    heartbeat: Optional[asyncio.Task] = None
+
+
+class SessionQueueService:
+    """Service for serializing query runs per session."""
+
+    _wakeups: dict[str, asyncio.Event] = {}
+    _stats: dict[str, Any] = {"enqueued": 0, "rejected": 0, "waited": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    @staticmethod
+    def _expiry() -> datetime:
+        """Expiry of a queue entry that is extended now."""
+        return datetime.now(timezone.utc) + timedelta(seconds=settings.session_queue.lease_ttl_seconds)
+
+    @classmethod
+    async def _keep_alive(cls, ticket: SessionTicket) -> None:
+        """Extend a queue entry until it is released."""
+        interval = settings.session_queue.lease_ttl_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await session_run_queue_crud.extend(ticket.session_id, ticket.ticket, cls._expiry()):
+                    logger.warning(f"[SESSION_QUEUE] Slot of session {ticket.session_id} expired")
+                    return
+            except Exception as e:
+                logger.warning(f"[SESSION_QUEUE] Heartbeat failed for session {ticket.session_id}: {str(e)}")
+
+    @classmethod
+    async def enqueue(cls, session_id: str) -> Optional[SessionTicket]:
+        """
+        Take a slot in a session's run queue.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Ticket, or None if queuing is disabled
+
+        Raises:
+            SessionBusyError: If the session's queue is full
+        """
+        if not settings.session_queue.enabled:
+            return None
+
+        ticket_id = uuid.uuid4().hex
+        position = await session_run_queue_crud.enqueue(
+            session_id, ticket_id, cls._expiry(), settings.session_queue.max_depth
+        )
+        if position is None:
+            cls._stats["rejected"] += 1
+            logger.info(f"[SESSION_QUEUE] Queue full for session {session_id}")
+            raise SessionBusyError(session_id, settings.session_queue.retry_after_seconds)
+
+        cls._stats["enqueued"] += 1
+        ticket = SessionTicket(session_id=session_id, ticket=ticket_id, position=position)
+        ticket.heartbeat = asyncio.create_task(cls._keep_alive(ticket))
+        if position:
+            logger.info(f"[SESSION_QUEUE] Session {session_id} run queued at position {position}")
+        return ticket
+
+    @classmethod
+    async def wait_turn(
+        cls,
+        ticket: Optional[SessionTicket],
+        on_position: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Wait until a queued run is first in its session's queue.
+
+        Args:
+            ticket: Ticket from enqueue() (None if queuing is disabled)
+            on_position: Called with the new position whenever it changes
+
+        Raises:
+            SessionQueueError: If the slot expired while waiting
+        """
+        if ticket is None or ticket.position == 0:
+            return
+
+        while True:
+            # Woken early when a run of this session ends in this process
+            wakeup = cls._wakeups.setdefault(ticket.session_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(wakeup.wait(), settings.session_queue.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            position = await session_run_queue_crud.get_position(ticket.session_id, ticket.ticket)
+            if position is None:
+                raise SessionQueueError(f"Queue slot of session '{ticket.session_id}' expired")
+            if position != ticket.position:
+                ticket.position = position
+                if on_position is not None:
+                    on_position(position)
+            if position == 0:
+                break
+
+        wait_ms = (time.monotonic() - ticket.enqueued_at) * 1000
+        cls._stats["waited"] += 1
+        cls._stats["wait_ms_total"] += wait_ms
+        cls._stats["wait_ms_max"] = max(cls._stats["wait_ms_max"], wait_ms)
+
+    @classmethod
+    async def release(cls, ticket: Optional[SessionTicket]) -> None:
+        """
+        Give up a queue slot (after the run finished or was cancelled).
+
+        Args:
+            ticket: Ticket from enqueue() (None if queuing is disabled)
+        """
+        if ticket is None:
+            return
+
+        if ticket.heartbeat is not None:
+            ticket.heartbeat.cancel()
+        try:
+            await session_run_queue_crud.dequeue(ticket.session_id, ticket.ticket)
+        except Exception as e:
+            # The entry expires on its own once heartbeats stop
+            logger.error(f"[SESSION_QUEUE] Failed to release slot of session {ticket.session_id}: {str(e)}")
+
+        wakeup = cls._wakeups.pop(ticket.session_id, None)
+        if wakeup is not None:
+            wakeup.set()
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        """
+        Get queue counters.
+
+        Returns:
+            Metrics dictionary
+        """
+        waited = cls._stats["waited"]
+        return {
+            "enabled": settings.session_queue.enabled,
+            "max_depth": settings.session_queue.max_depth,
+            "enqueued": cls._stats["enqueued"],
+            "rejected": cls._stats["rejected"],
+            "waited": waited,
+            "avg_wait_ms": round(cls._stats["wait_ms_total"] / waited, 1) if waited else 0.0,
+            "max_wait_ms": round(cls._stats["wait_ms_max"], 1),
+        }
+
+
+session_queue_service = SessionQueueService()
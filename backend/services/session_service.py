@@ -2,6 +2,7 @@
 Session service for managing RAG sessions.
 """
 
+import logging
 from typing import Optional
 
 from crud import session_crud
@@ -12,8 +13,12 @@ from schemas import (
     SessionUpdate,
     SessionListResponse,
 )
+from services.answer_cache_service import answer_cache_service
+from services.checkpoint_retention_service import checkpoint_retention_service
 from utils.object_id import PyObjectId
 
+logger = logging.getLogger(__name__)
+
 
 class SessionNotFoundError(Exception):
     """Raised when session is not found."""
@@ -103,12 +108,20 @@ class SessionService:
         session_id: str,
         user_id: PyObjectId,
     ) -> bool:
-        """Delete session (soft delete)."""
+        """Delete session (soft delete) and purge its workflow checkpoints."""
         deleted = await session_crud.delete(session_id, user_id)
 
         if not deleted:
             raise SessionNotFoundError(f"Session '{session_id}' not found")
 
+        answer_cache_service.invalidate(session_id)
+
+        try:
+            await checkpoint_retention_service.purge_thread(session_id)
+        except Exception as e:
+            # Left for the background retention pass to pick up
+            logger.error(f"[RETENTION] Failed to purge checkpoints for {session_id}: {str(e)}")
+
         return True
 
     @classmethod
@@ -135,8 +148,15 @@ class SessionService:
 
     @classmethod
     async def increment_documents(cls, session_id: str, delta: int = 1) -> None:
-        """Increment document count for session."""
+        """Increment document count for session (invalidates cached answers)."""
         await session_crud.increment_document_count(session_id, delta)
+        answer_cache_service.invalidate(session_id)
+
+    @classmethod
+    async def bump_document_set_version(cls, session_id: str) -> None:
+        """Mark the session's document set as changed (invalidates cached answers)."""
+        await session_crud.increment_document_set_version(session_id)
+        answer_cache_service.invalidate(session_id)
 
     @classmethod
     async def get_session_messages(
@@ -4,8 +4,9 @@ from pathlib import Path
 from typing import Optional, Tuple
 from collections import Counter
 
+import numpy as np
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
+from langchain_chroma.vectorstores import maximal_marginal_relevance
 from langchain_unstructured import UnstructuredLoader
 from langchain_community.vectorstores.utils import filter_complex_metadata
 
@@ -30,7 +31,10 @@ class ChromaManager:
 
         Path(self.persist_directory).mkdir(parents=True, exist_ok=True)
 
-        self.embeddings = OpenAIEmbeddings(model=self.embedding_model)
+        # Imported lazily: rag_system imports vectorstore at package import time
+        from rag_system.core.llm_client import get_embeddings
+
+        self.embeddings = get_embeddings(model=self.embedding_model)
 
         self.vectorstore = Chroma(
             collection_name=self.collection_name,
@@ -101,9 +105,13 @@ class ChromaManager:
 
         docs = filter_complex_metadata(docs)
 
+        # Imported lazily: rag_system imports vectorstore at package import time
+        from rag_system.utils.message_utils import count_text_tokens
+
         for doc in docs:
             doc.metadata["source_file"] = file_path.name
             doc.metadata["source_path"] = str(file_path)
+            doc.metadata["token_count"] = count_text_tokens(doc.page_content)
 
         return docs, page_numbers
 
@@ -124,31 +132,152 @@ class ChromaManager:
             lambda_mult: MMR diversity parameter (defaults to config)
 
         Returns:
-            List of retrieved document dicts
+            List of retrieved document dicts with relevance scores
+        """
+        results = await self.batch_retrieve(
+            queries=[query],
+            k=k,
+            search_type=search_type,
+            lambda_mult=lambda_mult,
+        )
+        return results[0]
+
+    def _relevance_from_distance(self, distance: float) -> float:
+        """Convert a Chroma distance to a 0-1 cosine relevance score."""
+        space = (self.vectorstore._collection.metadata or {}).get("hnsw:space", "l2")
+        # Squared L2 between unit vectors is 2 - 2cos (embeddings are normalized)
+        similarity = 1.0 - distance / 2.0 if space == "l2" else 1.0 - distance
+        return min(max(similarity, 0.0), 1.0)
+
+    @staticmethod
+    def _to_result(
+        content: str,
+        metadata: Optional[dict],
+        doc_id: Optional[str] = None,
+    ) -> dict:
+        """Build a retrieved document dict from Chroma content and metadata."""
+        metadata = metadata or {}
+        return {
+            "id": doc_id,
+            "content": content,
+            "page_number": metadata.get("page_number"),
+            "source": metadata.get("source_file", "unknown"),
+            "category": metadata.get("category"),
+            "metadata": metadata,
+        }
+
+    async def batch_retrieve(
+        self,
+        queries: list[str],
+        k: int | None = None,
+        search_type: str | None = None,
+        lambda_mult: float | None = None,
+    ) -> list[list[dict]]:
+        """
+        Retrieve documents for several queries in a single pass.
+
+        All queries are embedded with one embeddings request and searched
+        with one Chroma query. Each result carries its relevance score for
+        that query under "score"; callers can deduplicate documents by ID.
+
+        Args:
+            queries: Search queries
+            k: Number of documents per query (defaults to config)
+            search_type: Search type (defaults to config)
+            lambda_mult: MMR diversity parameter (defaults to config)
+
+        Returns:
+            Retrieved document dicts with relevance scores per query, in query order
         """
+        if not queries:
+            return []
+
         k = k or settings.vectorstore.retrieval_k
         search_type = search_type or settings.vectorstore.search_type
         lambda_mult = lambda_mult if lambda_mult is not None else settings.vectorstore.mmr_lambda
-
-        retriever = self.vectorstore.as_retriever(
-            search_type=search_type,
-            search_kwargs={"k": k, "lambda_mult": lambda_mult},
+        use_mmr = search_type == "mmr"
+
+        query_embeddings = await self.embeddings.aembed_documents(queries)
+
+        # Same candidate pool as the MMR retriever (fetch_k=20)
+        include = ["documents", "metadatas", "distances"]
+        if use_mmr:
+            include.append("embeddings")
+        response = await asyncio.to_thread(
+            self.vectorstore._collection.query,
+            query_embeddings=query_embeddings,
+            n_results=max(k, 20) if use_mmr else k,
+            include=include,
         )
 
-        docs = await asyncio.to_thread(retriever.invoke, query)
-
+        shared: dict[str, dict] = {}
         results = []
-        for doc in docs:
-            results.append({
-                "content": doc.page_content,
-                "page_number": doc.metadata.get("page_number"),
-                "source": doc.metadata.get("source_file", "unknown"),
-                "category": doc.metadata.get("category"),
-                "metadata": doc.metadata,
-            })
+        for i, query_embedding in enumerate(query_embeddings):
+            ids = response["ids"][i]
+            order = list(range(len(ids)))
+            if use_mmr and ids:
+                order = maximal_marginal_relevance(
+                    np.array(query_embedding, dtype=np.float32),
+                    response["embeddings"][i],
+                    lambda_mult=lambda_mult,
+                    k=k,
+                )
+
+            query_results = []
+            for j in order[:k]:
+                doc_id = ids[j]
+                if doc_id not in shared:
+                    shared[doc_id] = self._to_result(
+                        response["documents"][i][j],
+                        response["metadatas"][i][j],
+                        doc_id,
+                    )
+                query_results.append({
+                    **shared[doc_id],
+                    "score": self._relevance_from_distance(response["distances"][i][j]),
+                })
+            results.append(query_results)
 
+        logger.info(
+            f"Batch retrieval: {len(queries)} queries, {len(shared)} unique documents"
+        )
         return results
 
+    async def batch_hybrid_retrieve(
+        self,
+        queries: list[str],
+        k: int | None = None,
+        semantic_weight: float = 0.6,
+        lexical_weight: float = 0.4,
+    ) -> list[list[dict]]:
+        """
+        Hybrid retrieval for several queries with one embedding and one collection scan.
+
+        Args:
+            queries: Search queries
+            k: Number of documents per query (defaults to config)
+            semantic_weight: Weight for semantic search
+            lexical_weight: Weight for lexical search
+
+        Returns:
+            Fused document dicts per query, in query order
+        """
+        k = k or settings.vectorstore.retrieval_k
+
+        semantic_batches = await self.batch_retrieve(queries=queries, k=k*2)
+        all_docs = await self._get_all_documents()
+
+        return [
+            self._reciprocal_rank_fusion(
+                semantic_results=semantic_results,
+                lexical_results=self._score_lexical(query, all_docs, k*2),
+                semantic_weight=semantic_weight,
+                lexical_weight=lexical_weight,
+                k=k,
+            )
+            for query, semantic_results in zip(queries, semantic_batches)
+        ]
+
     async def hybrid_retrieve(
         self,
         query: str,
@@ -177,40 +306,41 @@ class ChromaManager:
 
     async def _bm25_search(self, query: str, k: int) -> list[dict]:
         """Perform BM25 lexical search (fallback to all docs sorted by word overlap)."""
+        all_docs = await self._get_all_documents()
+        return self._score_lexical(query, all_docs, k)
+
+    async def _get_all_documents(self) -> Optional[dict]:
+        """Fetch all documents and metadatas of the collection for lexical scoring."""
         try:
-            all_docs = await asyncio.to_thread(
+            return await asyncio.to_thread(
                 self.vectorstore._collection.get,
                 include=["documents", "metadatas"]
             )
+        except Exception as e:
+            logger.error(f"BM25 search error: {e}")
+            return None
 
-            if not all_docs["documents"]:
-                return []
-
-            query_words = set(query.lower().split())
-            scored_docs = []
+    def _score_lexical(self, query: str, all_docs: Optional[dict], k: int) -> list[dict]:
+        """Score documents by query word overlap (stored as "lexical_score") and return the top k."""
+        if not all_docs or not all_docs["documents"]:
+            return []
 
-            for i, doc_text in enumerate(all_docs["documents"]):
-                doc_words = set(doc_text.lower().split())
-                overlap = len(query_words & doc_words)
-                metadata = all_docs["metadatas"][i] if all_docs["metadatas"] else {
-                }
+        query_words = set(query.lower().split())
+        scored_docs = []
 
-                if overlap > 0:
-                    scored_docs.append({
-                        "content": doc_text,
-                        "score": overlap / len(query_words) if query_words else 0,
-                        "page_number": metadata.get("page_number"),
-                        "source": metadata.get("source_file", "unknown"),
-                        "category": metadata.get("category"),
-                        "metadata": metadata,
-                    })
+        for i, doc_text in enumerate(all_docs["documents"]):
+            doc_words = set(doc_text.lower().split())
+            overlap = len(query_words & doc_words)
+            metadata = all_docs["metadatas"][i] if all_docs["metadatas"] else {
+            }
 
-            scored_docs.sort(key=lambda x: x["score"], reverse=True)
-            return scored_docs[:k]
+            if overlap > 0:
+                result = self._to_result(doc_text, metadata, all_docs["ids"][i])
+                result["lexical_score"] = overlap / len(query_words) if query_words else 0
+                scored_docs.append(result)
 
-        except Exception as e:
-            logger.error(f"BM25 search error: {e}")
-            return []
+        scored_docs.sort(key=lambda x: x["lexical_score"], reverse=True)
+        return scored_docs[:k]
 
     def _reciprocal_rank_fusion(
         self,
@@ -220,7 +350,7 @@ class ChromaManager:
         lexical_weight: float,
         k: int,
     ) -> list[dict]:
-        """Combine semantic and lexical results using RRF scoring."""
+        """Combine semantic and lexical results using RRF scoring (keeping both raw scores)."""
         scores = {}
         content_map = {}
 
@@ -236,7 +366,7 @@ class ChromaManager:
             rrf_score = 1.0 / (rank + 60)
             scores[content] = scores.get(
                 content, 0) + (rrf_score * lexical_weight)
-            content_map[content] = doc
+            content_map[content] = {**content_map.get(content, {}), **doc}
 
         sorted_results = sorted(
             [(content, scores[content]) for content in scores],